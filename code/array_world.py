@@ -0,0 +1,570 @@
+import numpy as np
+
+from state import State
+from simulation_world import SimulationWorld
+from transmission import MAX_AGE_GROUP, TransmissionTable
+from outcomes import RECOVERY, get_outcome_table
+from world_builder import check_parameters, get_world_size
+
+"""
+    An alternative simulation engine for very large populations. Instead of one Character, Brain and
+    Coordinates object per person, the whole population is stored in NumPy arrays (one element per character)
+    and each phase of a full turn is computed for all characters at once.
+
+    The engine follows the same rules as SimulationWorld and produces the same outputs (the get_len_* statistics,
+    is_end and the full turn count), but it is not a step-by-step replica of it:
+     - every phase is computed for the whole population at a time, so characters infected during a full turn
+       start moving and can recover only from the next full turn on
+     - when several characters try to move into the same square in the same phase, a random one of them gets it
+     - a spreader only looks for its nearest neighbour within search_radius squares (a spreader without any
+       neighbour that close stays where it is)
+     - a susceptible character in contact with k spreaders is infected with the probability 1 - (1 - rate) ** k,
+       which is the same as giving every contact its own infection draw
+     - with scheduled outcomes (see set_scheduled_outcomes), the outcomes are kept in a calendar keyed by the full
+       turn they are due in, so a turn only touches the spreaders whose disease ends in it
+
+    Directions are stored as integers in the clockwise order of Direction.get_values(): 0 north, 1 east,
+    2 south and 3 west. Squares are numbered row by row in a grid that is surrounded by a border of wall squares,
+    so that neighbouring squares can be found without checking the edges of the world.
+"""
+
+EMPTY = -1   # the occupant of a square without a character
+WALL = -2    # the occupant of a wall square (the border around the world)
+
+X_STEPS = np.array([0, 1, 0, -1])
+Y_STEPS = np.array([-1, 0, 1, 0])
+
+
+def get_rate_array(transmission):
+    """
+    Returns the infection rates of the given table indexed by age group, for every age group the ages array can
+    hold: array of float
+    """
+    rates = np.zeros(MAX_AGE_GROUP + 1)
+    listed = transmission.get_rate_list()
+    rates[:len(listed)] = listed
+    return rates
+
+
+class ArrayWorld:
+
+    def __init__(self, width, height, seed=None, search_radius=4):
+        """
+        Creates a new, empty array-based simulation world with the specified dimensions.
+
+        Parameter width is the width of the world in squares: int
+
+        Parameter height is the height of the world in squares: int
+
+        Parameter seed is the seed of the world's random number generator, or None for a random seed: int
+
+        Parameter search_radius is how far (in squares) spreaders look for their nearest neighbour: int
+        """
+        self.width = width
+        self.height = height
+        self.border = max(search_radius, 2)
+        self.row_length = width + 2 * self.border
+        self.occupants = np.full((height + 2 * self.border) * self.row_length, WALL, dtype=np.int32)
+        self.occupants.reshape(-1, self.row_length)[self.border:self.border + height,
+                                                    self.border:self.border + width] = EMPTY
+        self.claims = np.zeros(len(self.occupants), dtype=np.int64)   # scratch space for try_moves
+        self.steps = Y_STEPS * self.row_length + X_STEPS
+
+        self.random = np.random.default_rng(seed)
+        self.name = None
+        self.mortality_rate = 0
+        self.disease_length = 0
+        self.transmission = TransmissionTable()     # see set_transmission
+        self.infection_rates = get_rate_array(self.transmission)
+        self.full_turn_count = 0
+        self.end = False
+        self.profiler = None    # see set_profiler
+        self.recorder = None    # see set_recorder
+        self.calendar = None    # container, full turn -> list of (characters, outcomes), see set_scheduled_outcomes
+
+        # one element per character, the index of the element is the character's turn number
+        self.positions = np.zeros(0, dtype=np.int64)    # square numbers (see get_square_number)
+        self.facings = np.zeros(0, dtype=np.int8)
+        self.ages = np.zeros(0, dtype=np.int8)
+        self.states = np.zeros(0, dtype=np.int8)
+        self.durations = np.zeros(0, dtype=np.int32)
+        self.disease_lengths = np.zeros(0, dtype=np.int32)
+
+        self.set_contact_radius(1.5)
+        self.set_search_radius(search_radius)
+        self.update_counts()
+
+    @classmethod
+    def from_parameters(cls, name, population_size, number_of_spreaders, duration, mortality_rate, seed=None):
+        """
+        Creates a world with a randomly placed population in the same way as world_builder.create_world.
+
+        Returns: A tuple containing the simulation world object and the size of the world grid.
+        """
+        check_parameters(population_size, number_of_spreaders, duration, mortality_rate)
+
+        size = get_world_size(population_size)
+        world = cls(size, size, seed)
+        world.name = name
+        world.set_mortality_rate(mortality_rate)
+        world.disease_length = duration
+
+        squares = world.random.choice(size * size, population_size, replace=False)
+        states = np.full(population_size, State.SUSCEPTIBLE, dtype=np.int8)
+        states[:number_of_spreaders] = State.INFECTED
+        world.add_characters(squares % size, squares // size, world.random.integers(0, 4, population_size),
+                             world.random.integers(1, 4, population_size), states)
+        return world, size
+
+    @classmethod
+    def from_population(cls, name, population, duration, mortality_rate, seed=None):
+        """
+        Creates a world with the population of the given template, see world_builder.create_world_from_population.
+        The template is read in place and copied into the world's own arrays.
+
+        Parameter population is the initial population: population.PopulationTemplate
+
+        Returns: A tuple containing the simulation world object and the size of the world grid.
+        """
+        check_parameters(population.get_population_size(), population.number_of_spreaders, duration, mortality_rate)
+
+        size = population.size
+        world = cls(size, size, seed)
+        world.name = name
+        world.set_mortality_rate(mortality_rate)
+        world.disease_length = duration
+
+        squares = np.frombuffer(population.squares, dtype=np.int64)
+        states = np.full(len(squares), State.SUSCEPTIBLE, dtype=np.int8)
+        states[:population.number_of_spreaders] = State.INFECTED
+        world.add_characters(squares % size, squares // size, np.frombuffer(population.facings, dtype=np.int8),
+                             np.frombuffer(population.ages, dtype=np.int8), states)
+        return world, size
+
+    def add_characters(self, x, y, facings, ages, states):
+        """
+        Adds new characters in the world. All arguments are arrays with one element per new character.
+        Newly added spreaders get the world's disease length.
+
+        Parameter x, y are the coordinates of the characters: arrays of int
+
+        Parameter facings are the directions the characters are facing (0-3): array of int
+
+        Parameter ages are the age groups of the characters (1-3): array of int
+
+        Parameter states are the states of the characters (see State): array of int
+
+        Raises ValueError if a square is outside the world, is already taken, or is given twice.
+        """
+        x = np.asarray(x)
+        y = np.asarray(y)
+        if ((x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)).any():
+            raise ValueError("The characters must be placed inside the world.")
+
+        positions = self.get_square_number(x, y)
+        if (self.occupants[positions] != EMPTY).any() or len(np.unique(positions)) != len(positions):
+            raise ValueError("Each character must be placed in an empty square of its own.")
+
+        first = len(self.positions)
+        self.occupants[positions] = np.arange(first, first + len(positions))
+        self.positions = np.concatenate([self.positions, positions])
+        self.facings = np.concatenate([self.facings, np.asarray(facings, dtype=np.int8)])
+        self.ages = np.concatenate([self.ages, np.asarray(ages, dtype=np.int8)])
+        self.states = np.concatenate([self.states, np.asarray(states, dtype=np.int8)])
+        self.durations = np.concatenate([self.durations, np.zeros(len(positions), dtype=np.int32)])
+        self.disease_lengths = np.concatenate([self.disease_lengths,
+                                               np.full(len(positions), self.disease_length, dtype=np.int32)])
+        if self.calendar is not None:
+            self.schedule_outcomes(np.flatnonzero(self.states[first:] == State.INFECTED) + first,
+                                   self.full_turn_count)
+        self.update_counts()
+
+    def get_square_number(self, x, y):
+        """
+        Returns the number of the square at the given coordinates in the bordered grid: int or array of int
+        """
+        return (y + self.border) * self.row_length + x + self.border
+
+    def get_coordinates(self, square_number):
+        """
+        Returns the x and y coordinates of the given square number(s): tuple
+        """
+        return square_number % self.row_length - self.border, square_number // self.row_length - self.border
+
+    def get_offsets(self, radius):
+        """
+        Returns the offsets (dx, dy) of the squares within the given distance of a square, excluding the square
+        itself, closest first: list of tuples
+        """
+        reach = int(radius)
+        offsets = [(dx, dy) for dy in range(-reach, reach + 1) for dx in range(-reach, reach + 1)
+                   if 0 < dx * dx + dy * dy <= radius * radius]
+        offsets.sort(key=lambda offset: offset[0] * offset[0] + offset[1] * offset[1])
+        return offsets
+
+    def set_contact_radius(self, radius):
+        """
+        Sets the distance within which an infected character can infect other characters.
+        See SimulationWorld.set_contact_radius()
+
+        Parameter radius is the contact distance in squares: float
+        """
+        if radius > self.border:
+            raise ValueError("The contact radius cannot be larger than the border of the world.")
+        self.contact_radius = radius
+        offsets = self.get_offsets(radius)
+        self.contact_steps = np.array([dy * self.row_length + dx for dx, dy in offsets])
+        self.contact_types = np.array([dx * dx + dy * dy for dx, dy in offsets])    # see transmission.py
+        self.contact_factors = np.array(self.transmission.get_factors(self.contact_types.tolist()))
+
+    def set_transmission(self, transmission):
+        """
+        Sets the rates at which the spreaders infect their susceptible contacts, see
+        SimulationWorld.set_transmission().
+
+        Parameter transmission is the table of the rates: TransmissionTable
+        """
+        self.transmission = transmission
+        self.infection_rates = get_rate_array(transmission)
+        self.contact_factors = np.array(transmission.get_factors(self.contact_types.tolist()))
+
+    def get_transmission(self):
+        return self.transmission
+
+    def set_search_radius(self, radius):
+        """
+        Sets how far spreaders look for their nearest neighbour and precomputes, for each square in that
+        range, the direction a spreader moves in when its nearest neighbour is there (see
+        Spreader.determine_direction).
+
+        Parameter radius is the search distance in squares: int
+        """
+        if radius > self.border:
+            raise ValueError("The search radius cannot be larger than the border of the world.")
+        self.search_radius = radius
+        offsets = self.get_offsets(radius)
+        self.search_steps = np.array([dy * self.row_length + dx for dx, dy in offsets])
+        self.escape_directions = np.array([(3 if dx >= 1 else 1) if abs(dx) >= abs(dy) else (0 if dy >= 1 else 2)
+                                           for dx, dy in offsets])
+
+    def set_mortality_rate(self, mortality_rate_in_percents):
+        self.mortality_rate = mortality_rate_in_percents / 100
+
+    def set_scheduled_outcomes(self, scheduled):
+        """
+        Chooses how the infections end, see SimulationWorld.set_scheduled_outcomes(). With scheduled outcomes, the
+        outcome of every infection is drawn when it starts and put in a calendar under the full turn it is due in,
+        and each full turn only applies the outcomes due in it, instead of drawing for every spreader.
+
+        Parameter scheduled is True to draw the outcomes once per infection: boolean
+        """
+        self.calendar = None
+        if scheduled:
+            self.calendar = {}
+            self.schedule_outcomes(np.flatnonzero(self.states == State.INFECTED), self.full_turn_count)
+
+    def schedule_outcomes(self, spreaders, turn):
+        """
+        Draws the outcomes of the given spreaders, given that their diseases have not ended before their current
+        durations, and puts them in the calendar.
+
+        Parameter spreaders are the characters: array of int
+
+        Parameter turn is the full turn count at which the spreaders had their current durations: int
+        """
+        lengths = self.disease_lengths[spreaders]
+        for length in np.unique(lengths):
+            group = spreaders[lengths == length]
+            table = get_outcome_table(int(length), self.mortality_rate)
+            durations = np.array(table.durations)
+            cumulative = np.array(table.cumulative)
+
+            # the same draw as OutcomeTable.sample, for the whole group at once
+            done = self.durations[group]
+            starts = np.searchsorted(durations, done, side="right")
+            starts = np.where(starts > 0, cumulative[starts - 1], 0.0)
+            values = starts + self.random.random(len(group)) * (1 - starts)
+            positions = np.minimum(np.searchsorted(cumulative, values, side="right"), len(cumulative) - 1)
+            outcomes = np.array(table.outcomes, dtype=np.int8)[positions]
+            due_turns = turn + durations[positions] - done
+
+            order = np.argsort(due_turns, kind="stable")
+            due_turns = due_turns[order]
+            firsts = np.flatnonzero(np.diff(due_turns, prepend=-1))
+            for first, end in zip(firsts, np.append(firsts[1:], len(order))):
+                characters = order[first:end]
+                self.calendar.setdefault(int(due_turns[first]), []).append((group[characters],
+                                                                             outcomes[characters]))
+
+    def get_mortality_rate(self):
+        return self.mortality_rate
+
+    def get_name(self):
+        return self.name
+
+    def get_width(self):
+        return self.width
+
+    def get_height(self):
+        return self.height
+
+    def get_number_of_characters(self):
+        return len(self.positions)
+
+    def get_full_turn_count(self):
+        return self.full_turn_count
+
+    def is_end(self):
+        return self.end
+
+    def next_full_turn(self):
+        """
+        Lets every character take its next turn: first everyone moves, then the spreaders infect the susceptible
+        characters next to them and finally the spreaders recover or die.
+
+        Returns False if there were no infected characters left (the simulation has ended), True otherwise: boolean
+        """
+        if self.state_counts[State.INFECTED, 0] == 0:
+            self.end = True
+            return False
+
+        infected = np.flatnonzero(self.states == State.INFECTED)
+        self.durations[infected] += 1
+        if self.profiler is None:
+            self.move_characters()
+            new_infections = self.find_new_infections(infected)
+            self.end_infections(infected)
+        else:
+            new_infections = self.profile_phases(infected)
+
+        self.states[new_infections] = State.INFECTED
+        self.durations[new_infections] = 0
+        self.disease_lengths[new_infections] = self.disease_length
+
+        self.full_turn_count += 1
+        if self.calendar is not None:
+            self.schedule_outcomes(new_infections, self.full_turn_count)
+        self.update_counts()
+        if self.profiler is not None:
+            self.profiler.end_turn(self.full_turn_count)
+        if self.recorder is not None:
+            self.recorder.record(self)
+        return True
+
+    def set_recorder(self, recorder):
+        """
+        Starts or stops recording the counts of every full turn. The current counts are recorded right away as the
+        first row.
+
+        Parameter recorder receives the world at the end of every full turn, or None to stop recording:
+        TimeSeriesRecorder
+        """
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.record(self)
+
+    def set_profiler(self, profiler):
+        """
+        Starts or stops measuring the time of each phase of the full turns. The phases are computed for the whole
+        population at once, so they are reported under the brain type "All", and the contacts are found as part of
+        the infection phase.
+
+        Parameter profiler receives the measurements, or None to stop measuring: TurnProfiler
+        """
+        self.profiler = profiler
+
+    def profile_phases(self, infected):
+        """
+        Runs the phases of a full turn like next_full_turn, but reports the time of each phase to the profiler.
+
+        Returns the characters infected during the turn, see find_new_infections(): array of int
+        """
+        clock = self.profiler.clock
+        start = clock()
+        self.move_characters()
+        end = clock()
+        self.profiler.add("movement", "All", end - start)
+
+        start = end
+        new_infections = self.find_new_infections(infected)
+        end = clock()
+        self.profiler.add("infection", "All", end - start)
+
+        start = end
+        self.end_infections(infected)
+        self.profiler.add("outcome", "All", clock() - start)
+        return new_infections
+
+    def try_moves(self, movers, directions):
+        """
+        Moves the given characters one square in the given directions, if the squares are empty. If several
+        characters try to move into the same square, a random one of them gets it.
+
+        Returns a boolean array telling which of the characters moved: array of bool
+        """
+        targets = self.positions[movers] + self.steps[directions]
+        free = np.flatnonzero(self.occupants[targets] == EMPTY)
+        free = free[self.random.permutation(len(free))]
+
+        # every character claims its target square, and the claim that is left in the square wins
+        self.claims[targets[free]] = free
+        winners = free[self.claims[targets[free]] == free]
+
+        moved = np.zeros(len(movers), dtype=bool)
+        moved[winners] = True
+        self.occupants[self.positions[movers[winners]]] = EMPTY
+        self.occupants[targets[winners]] = movers[winners]
+        self.positions[movers[winners]] = targets[winners]
+        return moved
+
+    def find_escape_directions(self, spreaders):
+        """
+        Finds for each of the given spreaders the direction away from its nearest neighbour
+        (see Spreader.determine_direction).
+
+        Returns the directions, -1 for spreaders with no neighbour within the search radius: array of int
+        """
+        directions = np.full(len(spreaders), -1)
+        pending = np.arange(len(spreaders))
+        positions = self.positions[spreaders]
+
+        for step, escape_direction in zip(self.search_steps, self.escape_directions):
+            found = self.occupants[positions[pending] + step] >= 0
+            directions[pending[found]] = escape_direction
+            pending = pending[~found]
+            if len(pending) == 0:
+                break
+        return directions
+
+    def move_characters(self, characters=None):
+        """
+        Moves every living character according to the rules of its brain (see Susceptible.move_body,
+        Spreader.move_body and Recovered.move_body).
+
+        Parameter characters are the turn numbers of the characters to move, or None for everyone: array of int
+        """
+        if characters is None:
+            susceptible = np.flatnonzero(self.states == State.SUSCEPTIBLE)
+            spreaders = np.flatnonzero(self.states == State.INFECTED)
+            recovered = np.flatnonzero(self.states == State.RECOVERED)
+        else:
+            states = self.states[characters]
+            susceptible = characters[states == State.SUSCEPTIBLE]
+            spreaders = characters[states == State.INFECTED]
+            recovered = characters[states == State.RECOVERED]
+
+        # spreaders move away from their nearest neighbour, and pick a random direction if there is a wall
+        escape_directions = self.find_escape_directions(spreaders)
+        spreaders = spreaders[escape_directions >= 0]
+        escape_directions = escape_directions[escape_directions >= 0]
+        self.facings[spreaders] = escape_directions
+
+        # recovered characters move in a random direction and face a new random direction after moving
+        random_directions = self.random.integers(0, 4, len(recovered))
+        self.facings[recovered] = random_directions
+
+        movers = np.concatenate([susceptible, spreaders, recovered])
+        moved = self.try_moves(movers, np.concatenate([self.facings[susceptible], escape_directions,
+                                                       random_directions]))
+
+        moved_recovered = recovered[moved[len(susceptible) + len(spreaders):]]
+        self.facings[moved_recovered] = self.random.integers(0, 4, len(moved_recovered))
+
+        blocked = spreaders[~moved[len(susceptible):len(susceptible) + len(spreaders)]]
+        blocked = blocked[self.occupants[self.positions[blocked] + self.steps[self.facings[blocked]]] == WALL]
+        self.facings[blocked] = self.random.integers(0, 4, len(blocked))
+        self.try_moves(blocked, self.facings[blocked])
+
+        # susceptible characters turn clockwise until they find a square to move in
+        waiting = susceptible[~moved[:len(susceptible)]]
+        for turn in range(3):  # stepper
+            if len(waiting) == 0:
+                break
+            directions = (self.facings[waiting] + turn + 1) % 4
+            moved = self.try_moves(waiting, directions)
+            self.facings[waiting[moved]] = directions[moved]
+            waiting = waiting[~moved]
+
+    def find_new_infections(self, spreaders):
+        """
+        Draws the infections caused by the given spreaders. A susceptible character in contact with k spreaders
+        gets infected with the probability 1 - (1 - rate) ** k, where rate is the infection rate of its age group.
+        If the transmission table has contact factors, the rate of each contact is scaled by the factor of its
+        type and the probability is 1 minus the product of (1 - rate) over the contacts.
+
+        Returns the turn numbers of the newly infected characters: array of int
+        """
+        contacts = self.occupants[self.positions[spreaders][:, np.newaxis] + self.contact_steps]
+        if self.transmission.has_contact_factors():
+            factors = np.broadcast_to(self.contact_factors, contacts.shape)[contacts >= 0]
+            contacts = contacts[contacts >= 0]
+            exposed = self.states[contacts] == State.SUSCEPTIBLE
+            contacts = contacts[exposed]
+            with np.errstate(divide="ignore"):
+                escapes = np.log1p(-self.infection_rates[self.ages[contacts]] * factors[exposed])
+            susceptible, contact_numbers = np.unique(contacts, return_inverse=True)
+            probabilities = 1 - np.exp(np.bincount(contact_numbers, escapes, len(susceptible)))
+        else:
+            contacts = contacts[contacts >= 0]
+            susceptible, numbers_of_contacts = np.unique(contacts[self.states[contacts] == State.SUSCEPTIBLE],
+                                                         return_counts=True)
+            probabilities = 1 - (1 - self.infection_rates[self.ages[susceptible]]) ** numbers_of_contacts
+        return susceptible[self.random.random(len(susceptible)) < probabilities]
+
+    def end_infections(self, spreaders):
+        """
+        Lets the given spreaders recover or die: draws their outcomes (see resolve_outcomes) or, with scheduled
+        outcomes, applies the outcomes that are due in this turn.
+        """
+        if self.calendar is None:
+            self.resolve_outcomes(spreaders)
+            return
+        for characters, outcomes in self.calendar.pop(self.full_turn_count + 1, []):
+            self.states[characters] = np.where(outcomes == RECOVERY, State.RECOVERED, State.DECEASED)
+
+    def resolve_outcomes(self, spreaders):
+        """
+        Draws which of the given spreaders recover or die during this turn, using the same probabilities as
+        SimulationWorld.next_character_turn.
+        """
+        durations = self.durations[spreaders]
+        average_lengths = self.disease_lengths[spreaders]
+        coefficients = (1 - 0.5 ** (1 / (average_lengths + 1))) / 0.5
+        hazards = coefficients * (durations / average_lengths)
+
+        recovering = self.random.random(len(spreaders)) < (1 - self.mortality_rate) * hazards
+        dying = ~recovering & (self.random.random(len(spreaders)) < self.mortality_rate * hazards)
+        self.states[spreaders[recovering]] = State.RECOVERED
+        self.states[spreaders[dying]] = State.DECEASED
+
+    def update_counts(self):
+        """
+        Counts the characters by state and age group. Row s of state_counts holds the counts of state s in the
+        same form as the get_len_* methods: total, young, adults, elderly.
+        """
+        age_groups = np.where((self.ages == 1) | (self.ages == 2), self.ages, 3)
+        counts = np.bincount(self.states.astype(np.int64) * 4 + age_groups, minlength=16).reshape(4, 4)
+        counts[:, 0] = counts[:, 1:].sum(axis=1)
+        self.state_counts = counts
+
+    def get_len_age_groups(self):
+        young, adults, elderly = self.state_counts[:, 1:].sum(axis=0)
+        return int(young), int(adults), int(elderly)
+
+    def get_len_spreaders(self):
+        return tuple(int(count) for count in self.state_counts[State.INFECTED])
+
+    def get_len_susceptible(self):
+        return tuple(int(count) for count in self.state_counts[State.SUSCEPTIBLE])
+
+    def get_len_recovered(self):
+        return tuple(int(count) for count in self.state_counts[State.RECOVERED])
+
+    def get_len_deceased(self):
+        return tuple(int(count) for count in self.state_counts[State.DECEASED])
+
+    def get_summary(self):
+        """
+        Returns the final summary of the simulation, see SimulationWorld.get_summary(): list of strings
+        """
+        return SimulationWorld.get_summary(self)
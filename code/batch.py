@@ -0,0 +1,245 @@
+import argparse
+
+from checkpoint import load_world, save_world
+from events import EventLog
+from profiler import TurnProfiler
+from recorder import TimeSeriesRecorder
+from transmission import TransmissionTable, parse_table
+from world_builder import create_world, create_world_from_population
+
+"""
+    Runs simulations without the GUI or any interactive prompts, so that they can be run in batches on machines
+    without a display. Nothing here imports PyQt6.
+
+    Usage: python batch.py --population 1000 --spreaders 10 --duration 14 --mortality 5 --seed 1 --counts
+"""
+
+COLUMNS = ("turn", "spreaders", "susceptible", "recovered", "deceased")
+
+
+def get_counts(world):
+    """
+    Returns the current size of each compartment of the population, in the order of COLUMNS: tuple
+    """
+    return (world.get_full_turn_count(), world.get_len_spreaders()[0], world.get_len_susceptible()[0],
+            world.get_len_recovered()[0], world.get_len_deceased()[0])
+
+
+def run_world(world, max_turns=None, checkpoint_file=None, checkpoint_interval=100):
+    """
+    Runs full turns in the given world until there are no more infected characters or max_turns full turns
+    have been taken.
+
+    Parameter world is the world to run: SimulationWorld
+
+    Parameter max_turns is the largest number of full turns run, or None for no limit: int
+
+    Parameter checkpoint_file is the file the world is saved in every checkpoint_interval full turns and when
+    the run stops, or None: str
+
+    Parameter checkpoint_interval is the number of full turns between checkpoints: int
+
+    Returns the counts of each turn, starting from the initial population (see get_counts()): list of tuples
+    """
+    counts = [get_counts(world)]
+    while max_turns is None or world.get_full_turn_count() < max_turns:
+        if not world.next_full_turn():
+            break
+        counts.append(get_counts(world))
+        if checkpoint_file is not None and world.get_full_turn_count() % checkpoint_interval == 0:
+            save_world(world, checkpoint_file)
+    if checkpoint_file is not None:
+        save_world(world, checkpoint_file)
+    return counts
+
+
+def create_simulation(population_size, number_of_spreaders, duration, mortality_rate, seed=None, name="Disease",
+                      engine="object", workers=None, population=None, transmission=None, scheduled_outcomes=False):
+    """
+    Creates a world from the given parameters, see world_builder.create_world().
+
+    Parameter engine is "object" for SimulationWorld, "array" for the NumPy based ArrayWorld or "tiled" for an
+    ArrayWorld run on several processes (TiledWorld): str
+
+    Parameter workers is the number of worker processes of the tiled engine, or None for one per processor: int
+
+    Parameter population is placed in the world instead of a random population, or None. Its size and number
+    of spreaders must be population_size and number_of_spreaders: population.PopulationTemplate
+
+    Parameter transmission holds the infection rates, or None for the default rates: TransmissionTable
+
+    Parameter scheduled_outcomes tells whether the outcome of each infection is drawn once when it starts (not
+    supported by the tiled engine), see SimulationWorld.set_scheduled_outcomes(): boolean
+
+    Returns the new world: SimulationWorld, ArrayWorld or TiledWorld
+
+    Raises ValueError if the engine is not known, the population does not match the parameters or the engine does
+    not support scheduled outcomes.
+    """
+    if engine not in ("object", "array", "tiled"):
+        raise ValueError(f"Unknown simulation engine: {engine}")
+    if population is not None and (population.get_population_size() != population_size
+                                   or population.number_of_spreaders != number_of_spreaders):
+        raise ValueError("The population template does not match the size of the population and the number of "
+                         "spreaders.")
+
+    if engine == "object":
+        if population is not None:
+            world, size = create_world_from_population(name, population, duration, mortality_rate, seed)
+        else:
+            world, size = create_world(name, population_size, number_of_spreaders, duration, mortality_rate, seed)
+    else:
+        from array_world import ArrayWorld  # NumPy is only needed by the array and tiled engines
+        if population is not None:
+            world, size = ArrayWorld.from_population(name, population, duration, mortality_rate, seed)
+        else:
+            world, size = ArrayWorld.from_parameters(name, population_size, number_of_spreaders, duration,
+                                                     mortality_rate, seed)
+
+    if transmission is not None:
+        world.set_transmission(transmission)
+    if scheduled_outcomes:
+        world.set_scheduled_outcomes(True)
+    if engine == "tiled":
+        from tiled_world import TiledWorld
+        world = TiledWorld(world, workers, seed)
+    return world
+
+
+def run_simulation(population_size, number_of_spreaders, duration, mortality_rate, seed=None, max_turns=None,
+                   name="Disease", engine="object", profiler=None, recorder=None, workers=None, population=None,
+                   transmission=None, scheduled_outcomes=False):
+    """
+    Creates a world from the given parameters and runs it to the end.
+    See create_simulation() for the parameters and run_world() for max_turns. The workers of the tiled engine
+    are stopped when the run ends.
+
+    Parameter profiler measures the time of each phase of the turns, or None: TurnProfiler
+
+    Parameter recorder writes the counts of every turn in a file, or None: TimeSeriesRecorder
+
+    Returns: A tuple containing the finished simulation world and the counts of each turn.
+    """
+    world = create_simulation(population_size, number_of_spreaders, duration, mortality_rate, seed, name, engine,
+                              workers, population, transmission, scheduled_outcomes)
+    try:
+        world.set_profiler(profiler)
+        world.set_recorder(recorder)
+        return world, run_world(world, max_turns)
+    finally:
+        if engine == "tiled":
+            world.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a disease simulation without the GUI.")
+    parser.add_argument("--name", default="Disease", help="the name of the disease")
+    parser.add_argument("--population", type=int, help="the size of the population")
+    parser.add_argument("--spreaders", type=int, help="the number of spreaders")
+    parser.add_argument("--duration", type=int, help="the average duration of the disease")
+    parser.add_argument("--mortality", type=int, help="the mortality rate of the disease (%%)")
+    parser.add_argument("--seed", type=int, default=None, help="the seed of the random number generator")
+    parser.add_argument("--max-turns", type=int, default=None, help="stop after this many full turns")
+    parser.add_argument("--engine", choices=["object", "array", "tiled"], default="object",
+                        help="the simulation engine, array and tiled need NumPy")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="the number of worker processes of the tiled engine (default: one per processor)")
+    parser.add_argument("--counts", action="store_true", help="print the counts of every turn as CSV")
+    parser.add_argument("--infection-rates", default=None,
+                        help="the infection rate of each age group, e.g. 1=0.25,2=0.5,3=0.75 (the default)")
+    parser.add_argument("--contact-factors", default=None,
+                        help="multiply the rates of contacts at each squared distance, e.g. 1=1,2=0.5")
+    parser.add_argument("--scheduled-outcomes", action="store_true",
+                        help="draw when and how each infection ends once, when it starts (object and array engines)")
+    parser.add_argument("--clear-deceased", action="store_true",
+                        help="remove the deceased from the grid so that others can move into their squares")
+    parser.add_argument("--record", default=None,
+                        help="write the counts of every turn by age group in a .csv or .npy file")
+    parser.add_argument("--events", default=None,
+                        help="append every infection, recovery and death to this binary event log (object engine)")
+    parser.add_argument("--profile", action="store_true", help="print the time spent in each phase of the turns")
+    parser.add_argument("--profile-json", default=None, help="save the time of each phase of every turn as JSON")
+    parser.add_argument("--checkpoint", default=None,
+                        help="save the world in this file every --checkpoint-interval turns and at the end")
+    parser.add_argument("--checkpoint-interval", type=int, default=100, help="the number of turns between checkpoints")
+    parser.add_argument("--resume", default=None, help="continue the run saved in this checkpoint file")
+    arguments = parser.parse_args()
+
+    if arguments.resume is None and None in (arguments.population, arguments.spreaders, arguments.duration,
+                                             arguments.mortality):
+        parser.error("--population, --spreaders, --duration and --mortality are required unless --resume is given")
+    if arguments.engine != "object" and (arguments.checkpoint or arguments.resume):
+        parser.error("checkpoints are only supported by the object engine")
+    if arguments.engine != "object" and (arguments.events or arguments.clear_deceased):
+        parser.error("event logs and clearing the deceased are only supported by the object engine")
+    if arguments.engine == "tiled" and (arguments.profile or arguments.profile_json):
+        parser.error("the tiled engine cannot be profiled")
+    if arguments.engine == "tiled" and arguments.scheduled_outcomes:
+        parser.error("the tiled engine does not support scheduled outcomes")
+
+    profiler = None
+    if arguments.profile or arguments.profile_json:
+        profiler = TurnProfiler()
+
+    recorder = None
+    if arguments.record:
+        recorder = TimeSeriesRecorder(arguments.record)
+
+    event_log = None
+    if arguments.events:
+        event_log = EventLog(arguments.events)
+
+    world = None
+    try:
+        transmission = None
+        if arguments.infection_rates or arguments.contact_factors:
+            transmission = TransmissionTable(arguments.infection_rates and parse_table(arguments.infection_rates),
+                                             arguments.contact_factors and parse_table(arguments.contact_factors))
+
+        if arguments.resume is not None:
+            world = load_world(arguments.resume)
+            if transmission is not None:
+                world.set_transmission(transmission)
+            if arguments.scheduled_outcomes:
+                world.set_scheduled_outcomes(True)
+        else:
+            world = create_simulation(arguments.population, arguments.spreaders, arguments.duration,
+                                      arguments.mortality, arguments.seed, arguments.name, arguments.engine,
+                                      arguments.workers, transmission=transmission,
+                                      scheduled_outcomes=arguments.scheduled_outcomes)
+        if arguments.clear_deceased:
+            world.set_clear_deceased(True)
+        world.set_profiler(profiler)
+        world.set_recorder(recorder)
+        if event_log is not None:
+            world.set_event_log(event_log, log_current=arguments.resume is None)
+        counts = run_world(world, arguments.max_turns, arguments.checkpoint, arguments.checkpoint_interval)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if arguments.engine == "tiled" and world is not None:
+            world.close()
+        if recorder is not None:
+            recorder.close()
+        if event_log is not None:
+            event_log.close()
+
+    if arguments.counts:
+        print(",".join(COLUMNS))
+        for row in counts:
+            print(",".join(str(value) for value in row))
+        print()
+
+    for text_string in world.get_summary():
+        print(text_string)
+
+    if arguments.profile:
+        print()
+        for line in profiler.get_table():
+            print(line)
+    if arguments.profile_json:
+        profiler.save_json(arguments.profile_json)
+
+
+if __name__ == "__main__":
+    main()
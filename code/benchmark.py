@@ -0,0 +1,312 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from batch import run_simulation
+from world_builder import create_world
+
+"""
+    Measures how the simulation core scales with the size of the population. For every population size and engine
+    the benchmark times world creation, full turns, the statistics calls and a whole run without the GUI, and
+    measures the peak memory of a world and the memory a world keeps per character (bytes per agent), which
+    limits how many worlds fit in the memory of one machine. The worlds are sized with the same rules as in
+    user_input, so the small populations are also denser than the large ones.
+
+    The results are saved as JSON. When a baseline file from an earlier run is given, every measurement is compared
+    with it and the ones that got slower (or use more memory) than the tolerance allows are reported as regressions.
+
+    With --scaling, the benchmark instead times the full turns of one large world run by the tiled engine with
+    different numbers of worker processes, and compares them with the array engine run in a single process.
+
+    Usage: python benchmark.py --max-size 100000 --output results.json --baseline old_results.json
+           python benchmark.py --scaling 10000000 --workers 1 2 4 8
+"""
+
+SIZES = [10, 30, 75, 100, 1000, 10000, 100000, 1000000]
+
+# the measurements of a result, and whether a larger value is better
+METRICS = {
+    "setup_seconds": False,
+    "turns_per_second": True,
+    "statistics_calls_per_second": True,
+    "end_to_end_seconds": False,
+    "peak_memory_bytes": False,
+    "bytes_per_agent": False,
+}
+
+
+def get_engines():
+    """
+    Returns the engines that can be benchmarked here; the array engine needs NumPy: list of str
+    """
+    try:
+        import numpy
+    except ImportError:
+        return ["object"]
+    return ["object", "array"]
+
+
+def create(engine, population_size, seed):
+    """
+    Creates a world for the benchmark. A long disease without deaths keeps the epidemic going through all the timed
+    turns, and one percent of the population starts as spreaders.
+
+    Returns the world: SimulationWorld or ArrayWorld
+    """
+    spreaders = max(1, population_size // 100)
+    if engine == "array":
+        from array_world import ArrayWorld  # NumPy is only needed by the array engine
+        return ArrayWorld.from_parameters("benchmark", population_size, spreaders, 1000, 0, seed)[0]
+    return create_world("benchmark", population_size, spreaders, 1000, 0, seed)[0]
+
+
+def time_statistics(world, calls):
+    """
+    Returns how many rounds of all the statistics calls the GUI makes can be run in a second: float
+    """
+    start = time.perf_counter()
+    for count in range(calls):  # stepper
+        world.get_len_age_groups()
+        world.get_len_spreaders()
+        world.get_len_susceptible()
+        world.get_len_recovered()
+        world.get_len_deceased()
+    return calls / max(time.perf_counter() - start, 1e-9)
+
+
+def measure_peak_memory(engine, population_size, seed, turns):
+    """
+    Returns the peak memory (in bytes) allocated while creating a world and running a few turns in it: int
+    """
+    tracemalloc.start()
+    world = create(engine, population_size, seed)
+    for count in range(turns):  # stepper
+        world.next_full_turn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def measure_bytes_per_agent(engine, population_size, seed):
+    """
+    Returns the memory (in bytes) a newly created world keeps per character, including the grid: float
+    """
+    tracemalloc.start()
+    world = create(engine, population_size, seed)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del world
+    return size / population_size
+
+
+def benchmark(engine, population_size, turns=10, max_turns=200, seed=1, repeats=3):
+    """
+    Runs all the measurements for one engine and population size. World creation and the timed turns are
+    repeated and the best time is kept, which makes the small measurements less noisy.
+
+    Parameter turns is the number of full turns timed: int
+
+    Parameter max_turns is the turn limit of the end-to-end run: int
+
+    Parameter repeats is the number of times world creation and the timed turns are repeated: int
+
+    Returns the measurements (see METRICS) together with the engine and population size: dict
+    """
+    setup_seconds = None
+    turns_per_second = 0
+    for repeat in range(repeats):  # stepper
+        start = time.perf_counter()
+        world = create(engine, population_size, seed)
+        elapsed = time.perf_counter() - start
+        if setup_seconds is None or elapsed < setup_seconds:
+            setup_seconds = elapsed
+
+        turns_per_second = max(turns_per_second, time_turns(world, turns))
+
+    statistics_calls_per_second = time_statistics(world, 1000)
+
+    start = time.perf_counter()
+    world, counts = run_simulation(population_size, max(1, population_size // 100), 10, 5, seed, max_turns,
+                                   engine=engine)
+    end_to_end_seconds = time.perf_counter() - start
+
+    return {
+        "engine": engine,
+        "population": population_size,
+        "world_size": world.get_width(),
+        "setup_seconds": setup_seconds,
+        "turns_per_second": turns_per_second,
+        "statistics_calls_per_second": statistics_calls_per_second,
+        "end_to_end_seconds": end_to_end_seconds,
+        "end_to_end_turns": len(counts) - 1,
+        "peak_memory_bytes": measure_peak_memory(engine, population_size, seed, 2),
+        "bytes_per_agent": measure_bytes_per_agent(engine, population_size, seed),
+    }
+
+
+def time_turns(world, turns):
+    """
+    Returns how many of the given number of full turns the world runs in a second: float
+    """
+    start = time.perf_counter()
+    for count in range(turns):  # stepper
+        world.next_full_turn()
+    return turns / max(time.perf_counter() - start, 1e-9)
+
+
+def measure_scaling(population_size, worker_counts, turns=10, seed=1, repeats=3, report=None):
+    """
+    Times the full turns of the tiled engine with each of the given numbers of workers, and of the array engine
+    for comparison. The best of the repeats is kept.
+
+    Parameter report is called with each result as soon as it is ready, or None: function
+
+    Returns a list of results, each with the number of workers (0 for the array engine), the number of tiles
+    actually used, the turns per second and the speedup over the array engine: list of dict
+    """
+    from tiled_world import TiledWorld
+
+    results = []
+    array_turns_per_second = 0
+    for repeat in range(repeats):  # stepper
+        world = create("array", population_size, seed)
+        array_turns_per_second = max(array_turns_per_second, time_turns(world, turns))
+    del world
+    results.append({"workers": 0, "tiles": 1, "turns_per_second": array_turns_per_second, "speedup": 1.0})
+    if report is not None:
+        report(results[-1])
+
+    for workers in worker_counts:
+        turns_per_second = 0
+        for repeat in range(repeats):  # stepper
+            with TiledWorld(create("array", population_size, seed), workers, seed) as world:
+                turns_per_second = max(turns_per_second, time_turns(world, turns))
+                tiles = world.get_number_of_workers()
+        results.append({"workers": workers, "tiles": tiles, "turns_per_second": turns_per_second,
+                        "speedup": turns_per_second / array_turns_per_second})
+        if report is not None:
+            report(results[-1])
+    return results
+
+
+def run_benchmarks(sizes, engines, turns=10, max_turns=200, seed=1, repeats=3, report=None):
+    """
+    Benchmarks every combination of the given population sizes and engines.
+
+    Parameter report is called with each result as soon as it is ready, or None: function
+
+    Returns the results of the run together with information about the machine: dict
+    """
+    results = []
+    for engine in engines:
+        create(engine, 10, seed)    # warm up, so that the first result does not include importing the engine
+        for population_size in sizes:
+            result = benchmark(engine, population_size, turns, max_turns, seed, repeats)
+            results.append(result)
+            if report is not None:
+                report(result)
+
+    return {
+        "python": sys.version.split()[0],
+        "machine": platform.platform(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(results, baseline, tolerance=0.2, shortest_time=0.01):
+    """
+    Compares the results with a baseline run. A measurement is a regression if it is worse than the baseline
+    by more than the tolerance (a share of the baseline value). Results without a baseline are skipped, and so
+    are times that stay under shortest_time seconds, since they are mostly noise.
+
+    Returns a list of regressions as tuples (engine, population, metric, baseline value, new value): list
+    """
+    previous = {(result["engine"], result["population"]): result for result in baseline["results"]}
+    regressions = []
+
+    for result in results["results"]:
+        old = previous.get((result["engine"], result["population"]))
+        if old is None:
+            continue
+        for metric, larger_is_better in METRICS.items():
+            if metric not in old:
+                continue
+            if metric.endswith("_seconds") and max(old[metric], result[metric]) < shortest_time:
+                continue
+            if larger_is_better:
+                worse = result[metric] < old[metric] * (1 - tolerance)
+            else:
+                worse = result[metric] > old[metric] * (1 + tolerance)
+            if worse:
+                regressions.append((result["engine"], result["population"], metric, old[metric], result[metric]))
+    return regressions
+
+
+def format_result(result):
+    return (f"{result['engine']:>6} {result['population']:>8} {result['world_size']:>5}  "
+            f"setup {result['setup_seconds']:8.3f} s  {result['turns_per_second']:10.2f} turns/s  "
+            f"{result['statistics_calls_per_second']:10.0f} stats/s  "
+            f"run {result['end_to_end_seconds']:8.2f} s ({result['end_to_end_turns']} turns)  "
+            f"peak {result['peak_memory_bytes'] / 1e6:9.1f} MB  {result['bytes_per_agent']:7.0f} B/agent")
+
+
+def format_scaling(result):
+    engine = f"tiled {result['workers']:>3} workers ({result['tiles']} tiles)" if result["workers"] else "array"
+    return f"{engine:>28}  {result['turns_per_second']:10.3f} turns/s  speedup {result['speedup']:6.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the simulation core at different population sizes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="the population sizes to benchmark")
+    parser.add_argument("--max-size", type=int, default=10000,
+                        help="the largest of the default population sizes (up to 1000000)")
+    parser.add_argument("--engines", nargs="+", default=None, help="the engines to benchmark: object, array")
+    parser.add_argument("--turns", type=int, default=10, help="the number of full turns timed")
+    parser.add_argument("--max-turns", type=int, default=200, help="the turn limit of the end-to-end runs")
+    parser.add_argument("--seed", type=int, default=1, help="the seed of the worlds")
+    parser.add_argument("--repeats", type=int, default=3, help="how many times the timed parts are repeated")
+    parser.add_argument("--output", default="benchmark_results.json", help="the file the results are saved in")
+    parser.add_argument("--baseline", default=None, help="an earlier results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="the allowed slowdown, e.g. 0.2 for 20%%")
+    parser.add_argument("--scaling", type=int, default=None,
+                        help="time the tiled engine with a population of this size instead")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="the numbers of worker processes of the scaling benchmark")
+    arguments = parser.parse_args()
+
+    if arguments.scaling is not None:
+        results = measure_scaling(arguments.scaling, arguments.workers, arguments.turns, arguments.seed,
+                                  arguments.repeats, lambda result: print(format_scaling(result), flush=True))
+        with open(arguments.output, "w") as file:
+            json.dump({"python": sys.version.split()[0], "machine": platform.platform(),
+                       "time": time.strftime("%Y-%m-%d %H:%M:%S"), "population": arguments.scaling,
+                       "scaling": results}, file, indent=2)
+        print(f"The results were saved in {arguments.output}")
+        return
+
+    sizes = arguments.sizes or [size for size in SIZES if size <= arguments.max_size]
+    engines = arguments.engines or get_engines()
+    results = run_benchmarks(sizes, engines, arguments.turns, arguments.max_turns, arguments.seed,
+                             arguments.repeats, lambda result: print(format_result(result), flush=True))
+
+    with open(arguments.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"The results were saved in {arguments.output}")
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, arguments.tolerance)
+        for engine, population, metric, old_value, new_value in regressions:
+            print(f"REGRESSION {engine} {population}: {metric} {old_value:.4g} -> {new_value:.4g}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions compared with the baseline.")
+
+
+if __name__ == "__main__":
+    main()
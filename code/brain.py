@@ -1,31 +1,25 @@
-from character import Character
-
 """
     The class `Brain` represents the "brains" (or artificial intelligence, AI) of
     virtual characters that inhabit two dimensional grid worlds. A brain is equipped
     with an algorithm for determining what a character should do during its turn in a disease
-    simulation. 
-    
+    simulation.
+
     Concrete class that extend this class need to provide implementations for the abstract
     `move_body` method; each such concrete class can represent a new kind of moving behavior.
 
-    The given parameter body is the character that the brain controls.
+    Brains hold no state of their own: one brain of each kind is shared by all the characters that behave that
+    way (see SUSCEPTIBLE, SPREADER and RECOVERED), and whatever a character needs to remember, such as the
+    duration of its disease, is kept in the Character. Changing the behaviour of a character only means giving
+    it another brain, see Character.set_brain.
 """
 
 
-class Brain(Character):
-
-    def __init__(self, body):
-        self.body = body
+class Brain:
 
-    def move_body(self):
-        pass
-
-    # def is_susceptible(self):
-    #    pass
+    def move_body(self, body):
+        """
+        Decides what the given character does during its turn.
 
-    def is_infected(self):
+        Parameter body is the character whose turn it is: Character
+        """
         pass
-
-    # def is_recovered(self):
-    #    pass
@@ -1,7 +1,7 @@
 import math
-import random
 
 from direction import Direction
+from state import State
 # from square import Square
 # from simulation_world import SimulationWorld
 
@@ -16,7 +16,14 @@ class Character():
     out what to do (move, turn about, etc.). Characters with different kinds of brains behave
     differently.
 
+    A world can hold millions of characters, so a character is kept small: its attributes are slots instead of a
+    dictionary, its disease state is one State value (the infected, recovered, susceptible, eliminated and
+    deceased flags are read from it) and its location is just the index of its square.
     """
+
+    __slots__ = ("world", "turn_number", "index", "state", "age", "brain", "facing", "duration", "disease_length",
+                 "outcome_duration", "outcome")
+
     def __init__(self):
         """
         Creates a new simulation character with the given name. The newly
@@ -31,28 +38,62 @@ class Character():
         """
         # self.set_name(name)
         self.world = None           # fixed value
-        self.location = None        # most-recent holder
-        self.eliminated = False     # flag
-        self.deceased = False       # flag
-        self.infected = False
-        self.recovered = False
-        self.susceptible = True
+        self.turn_number = -1       # fixed value, the position of the character in the world's turn order
+        self.index = -1             # most-recent holder, the index of the character's square (see get_index)
+        self.state = State.SUSCEPTIBLE  # most-recent holder, see get_state
 
         self.age = None
-        self.brain = None           # most-recent holder
+        self.brain = None           # most-recent holder, a brain shared with the characters that behave the same
         self.facing = None          # most-recent holder
+
+        # the state the shared brains keep for the character
+        self.duration = 0           # stepper, the number of turns the character has been infected
+        self.disease_length = 0     # fixed value, the average length of the character's disease
+        self.outcome_duration = 0   # fixed value, the duration at which a scheduled outcome happens
+        self.outcome = 0            # fixed value, the scheduled outcome (see outcomes.py), 0 if not scheduled yet
         # self.nearest_neighbour_location = None   # most-recent holder, see get_neighbour_location
 
+    @property
+    def susceptible(self):
+        return self.state == State.SUSCEPTIBLE
+
+    @property
+    def infected(self):
+        return self.state == State.INFECTED
+
+    @property
+    def recovered(self):
+        return self.state == State.RECOVERED
+
+    @property
+    def eliminated(self):
+        return self.state == State.DECEASED
+
+    deceased = eliminated
+
     def get_age(self):
 
         return self.age
 
+    def get_duration(self):
+        """
+        Returns the number of turns the character has been infected: int
+        """
+        return self.duration
+
+    def get_disease_length(self):
+        """
+        Returns the average length of the character's disease in turns: int
+        """
+        return self.disease_length
+
     def set_brain(self, new_brain):
         """
         Sets a "brain" (or AI) for the character (replacing any brain
         previously set, if any): spreader, susceptible, recovered, ...
+        The brains are shared, so the brain's own state does not change; see brain.py.
 
-        Parameter new_brain is the artificial intelligence that controls the character
+        Parameter new_brain is the artificial intelligence that controls the character, e.g. SPREADER
         """
         self.brain = new_brain
 
@@ -76,7 +117,18 @@ class Character():
 
         See get_location_square()
         """
-        return self.location
+        if self.world is None:
+            return None
+        return self.world.get_coordinates(self.index)
+
+    def get_index(self):
+        """
+        Returns the index of the character's square in the world's square arrays, or -1 if the character has not
+        been placed in any world: int
+
+        See SimulationWorld.get_index()
+        """
+        return self.index
 
     def get_location_square(self):
         """
@@ -98,10 +150,10 @@ class Character():
         See Square
         See take_turn()
         """
-        self.infected = False
-        self.eliminated = True
+        previous_state = self.state
+        self.state = State.DECEASED
         self.brain = None
-        # self.brain = None
+        self.state_changed(previous_state)
 
     def set_world(self, world,  location,  facing):
         """
@@ -122,22 +174,40 @@ class Character():
 
         See SimulationWorld.add_character(Character, Coordinates, Direction)
         """
-        target_square = world.get_square(location)
-        if not target_square.is_empty() or self.get_world() is not None:
+        index = world.get_index(location.get_x(), location.get_y())
+        if (index >= 0 and world.occupants[index] is not None) or self.get_world() is not None:
             return False
 
         else:
             self.world = world
-            self.location = location
+            self.index = index
             self.facing = facing
             return True
 
+    def get_state(self):
+        """
+        Returns the disease state of the character: int (see State)
+        """
+        return self.state
+
+    def state_changed(self, previous_state):
+        """
+        Tells the world that the state of the character may have changed so that it can keep its statistics
+        up to date. Called by every method that changes the state.
+
+        Parameter previous_state is the state of the character before the change: int (see State)
+        """
+        if self.world is not None:
+            self.world.update_state_counts(self, previous_state)
+
     def is_infected(self):
         return self.infected
 
     def infect(self):
-        self.infected = True
-        self.susceptible = False
+        previous_state = self.state
+        if previous_state != State.DECEASED:
+            self.state = State.INFECTED
+            self.state_changed(previous_state)
         return self.infected
 
     def is_susceptible(self):
@@ -147,15 +217,17 @@ class Character():
         return self.recovered
 
     def cure(self):
-        self.infected = False
-        self.recovered = True
+        previous_state = self.state
+        if previous_state != State.DECEASED:
+            self.state = State.RECOVERED
+            self.state_changed(previous_state)
 
     def is_deceased(self):
         """
         Returns the boolean value which states whether the character is deceased or
         not or is it lacking a brain: boolean
         """
-        return self.eliminated or self.get_brain() is None
+        return self.state == State.DECEASED or self.brain is None
 
     def is_stuck(self):
 
@@ -175,8 +247,8 @@ class Character():
         if world is None:
             return True
 
-        for value in Direction.get_values():  # most-recent holder
-            if not world.get_square(self.get_location().get_neighbor(value)).is_square_wall():
+        for value in Direction.VALUES:  # most-recent holder
+            if not world.walls[self.index + world.steps[value]]:
                 return False
         return True
 
@@ -198,28 +270,25 @@ class Character():
         if self.is_deceased():  # if self.eliminated is True or self.get_brain in None
             return False
 
-        target = self.get_location().get_neighbor(direction)
-        current_square = self.get_location_square()
-        target_square = self.get_world().get_square(target)
+        world = self.get_world()
+        current_index = self.index
+        target_index = current_index + world.steps[direction]
         self.spin(direction)
 
-        if target_square.is_empty() and not target_square.is_square_wall():
-            current_square.remove_character()
-            self.location = target
-            target_square.set_character(self)
+        if world.is_free(target_index):
+            world.move_character(self, current_index, target_index)
+            self.index = target_index
             return True
 
         # if self is infected and the target square is wall
-        elif self.infected and target_square.is_square_wall():
+        elif self.infected and world.walls[target_index]:
 
-            self.spin(random.choice([Direction.SOUTH, Direction.EAST, Direction.WEST, Direction.NORTH]))
-            target = self.get_location().get_neighbor(self.facing)  # new target square
-            target_square = self.get_world().get_square(target)
+            self.spin(world.random.choice([Direction.SOUTH, Direction.EAST, Direction.WEST, Direction.NORTH]))
+            target_index = current_index + world.steps[self.facing]  # new target square
 
-            if target_square.is_empty() and not target_square.is_square_wall():
-                current_square.remove_character()
-                self.location = target
-                target_square.set_character(self)
+            if world.is_free(target_index):
+                world.move_character(self, current_index, target_index)
+                self.index = target_index
                 return True
             else:
                 return False
@@ -241,8 +310,10 @@ class Character():
 
         Parameter new_facing is the new facing direction of the character: tuple
         """
-        if not self.eliminated:
+        if self.state != State.DECEASED and new_facing != self.facing:
             self.facing = new_facing
+            if self.world is not None:
+                self.world.character_changed(self)
 
     def take_turn(self):
         """
@@ -263,25 +334,18 @@ class Character():
         See Brain.move_body()
         """
         if not self.is_stuck() and not self.is_deceased():
-            self.brain.move_body()
+            self.brain.move_body(self)
 
     def __str__(self):
         return self.get_name() + ' at location ' + str(self.get_location())
 
     def get_neighbour_location(self):
 
-        # finds the coordinates of the nearest neighbour in the world
-        neighbour_location = None
-        shortest_dist = math.inf
-        current_dist = None
-
-        for character in self.get_world().get_characters():
-            current_dist = self.calculate_distance(character)
-            if current_dist < shortest_dist and current_dist != 0:
-                neighbour_location = character.get_location()
-                shortest_dist = current_dist
-
-        return neighbour_location
+        # finds the coordinates of the nearest neighbour in the world, see SimulationWorld.get_nearest_character
+        neighbour = self.get_world().get_nearest_character(self.get_location())
+        if neighbour is None:
+            return None
+        return neighbour.get_location()
 
     def calculate_distance(self, character):
 
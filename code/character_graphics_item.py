@@ -13,6 +13,8 @@ class CharacterGraphicsItem(QtWidgets.QGraphicsPolygonItem):
         Character knows its own location and status.
     """
 
+    ROTATIONS = {Direction.NORTH: 0, Direction.EAST: 90, Direction.SOUTH: 180, Direction.WEST: 270}
+
     def __init__(self, character, square_size):
         # Call init of the parent object
         super(CharacterGraphicsItem, self).__init__()
@@ -60,6 +62,16 @@ class CharacterGraphicsItem(QtWidgets.QGraphicsPolygonItem):
         self.updateRotation()
         self.updateColor()
 
+    def show(self, x, y, facing, color):
+        """
+        Updates the visual representation to the given values, copied from the character at the end of a turn
+        (see SimulationWorker.publish), instead of reading them from the character.
+        """
+        self.setPos(x * self.square_size, y * self.square_size)
+        self.setRotation(CharacterGraphicsItem.ROTATIONS[facing])
+        if color is not None:
+            self.setBrush(color)
+
     def updatePosition(self):
 
         """
@@ -108,22 +120,37 @@ class CharacterGraphicsItem(QtWidgets.QGraphicsPolygonItem):
         and QColor at https://doc.qt.io/qtforpython/PySide6/QtGui/QColor.html
         Look at character.py for checking the status of the individual.
         """
-        # if Character.is_deceased():
-        #    self.scene().removeItem(self)
+        color = get_character_color(self.character)
+        if color is not None:
+            self.setBrush(color)
+
+
+def get_character_color(character):
+    """
+    Returns the colour a character is drawn in, depending on its state and age, or None if there is no colour
+    for it (a susceptible character without an age). The same colours are used in every rendering mode.
+    - black: deceased
+    - red: infected
+    - light yellow, yellow, orange: susceptible young, adult and elderly people
+    - green: recovered
+
+    Returns: QColor
+    """
+    if Character.is_infected(character):
+        return QtGui.QColor(255, 0, 0)          # red, INFECTED
 
-        if Character.is_deceased(self.character):   # black, DECEASED
-            self.setBrush(QtGui.QColor(0, 0, 0))
+    elif Character.is_susceptible(character):
+        if Character.get_age(character) == 1:
+            return QtGui.QColor(255, 255, 200)  # light yellow, YOUNG
+        elif Character.get_age(character) == 2:
+            return QtGui.QColor(255, 255, 0)    # yellow, ADULT
+        elif Character.get_age(character) == 3:
+            return QtGui.QColor(255, 165, 0)    # orange, ELDERLY
 
-        if Character.is_infected(self.character):
-            self.setBrush(QtGui.QColor(255, 0, 0))  # red, INFECTED
+    elif Character.is_recovered(character):
+        return QtGui.QColor(0, 255, 0)          # green, RECOVERED
 
-        elif Character.is_susceptible(self.character):
-            if Character.get_age(self.character) == 1:
-                self.setBrush(QtGui.QColor(255, 255, 200))  # light yellow, YOUNG
-            elif Character.get_age(self.character) == 2:
-                self.setBrush(QtGui.QColor(255, 255, 0))    # yellow, ADULT
-            elif Character.get_age(self.character) == 3:
-                self.setBrush(QtGui.QColor(255, 165, 0))    # orange, ELDERLY
+    elif Character.is_deceased(character):
+        return QtGui.QColor(0, 0, 0)            # black, DECEASED
 
-        elif Character.is_recovered(self.character):
-            self.setBrush(QtGui.QColor(0, 255, 0))          # green, RECOVERED
+    return None
@@ -0,0 +1,205 @@
+import math
+import mmap
+import os
+import struct
+from array import array
+
+from character import Character
+from direction import Direction
+from recovered import RECOVERED
+from simulation_world import SimulationWorld
+from spreader import SPREADER
+from susceptible import SUSCEPTIBLE
+from transmission import TransmissionTable
+
+"""
+    Saves a SimulationWorld in a compact binary file and restores it exactly, so that a long run can be paused,
+    or continued after a crash from its latest checkpoint. A restored world takes the same turns with the same
+    random draws as the original would have.
+
+    The file starts with a fixed header and the name of the world, followed by flat arrays (sections), each
+    aligned to 8 bytes:
+
+    walls            one byte per square of the bordered grid, see SimulationWorld.walls
+    indices          int64 per character: the index of the character's square
+    facings          int8 per character: the position of the facing in Direction.VALUES
+    ages             int8 per character (0 for no age)
+    states           int8 per character: the State of the character
+    brains           int8 per character: the position of the shared brain in BRAINS (0 for no brain)
+    durations        int32 per character: Character.duration
+    disease lengths  int32 per character: Character.disease_length
+    outcome durations  int32 per character: Character.outcome_duration
+    outcomes         int8 per character: Character.outcome, see outcomes.py
+    generator        uint32 words of the state of the world's random number generator
+    gauss            float64: the pending Gaussian value of the generator (NaN for none)
+    rate ages        int64 per age group with an infection rate, see transmission.py
+    rates            float64 per age group with an infection rate
+    contact types    int64 per contact type with a factor
+    contact factors  float64 per contact type with a factor
+
+    The characters are stored in turn order. When a file is loaded, the sections are copied into arrays straight
+    from a memory map of the file.
+
+    Usage:
+        save_world(world, "run.checkpoint")
+        world = load_world("run.checkpoint")
+"""
+
+MAGIC = b"SIMCKPT1"
+VERSION = 6
+
+# magic, version, width, height, characters, turn, full turn count, mortality rate, contact radius, end,
+# whether the squares of the deceased are cleared, whether the outcomes are scheduled, length of the name,
+# infection rates, contact factors
+HEADER = struct.Struct("<8sIIIQQQdd???xIII4x")      # padded to 80 bytes, so the sections stay aligned
+
+BRAINS = [None, SUSCEPTIBLE, SPREADER, RECOVERED]
+GENERATOR_WORDS = 625   # the state of a Mersenne Twister: 624 words and the position in them
+
+
+def get_padding(length):
+    """
+    Returns the number of bytes needed after the given number of bytes to reach the next multiple of 8: int
+    """
+    return -length % 8
+
+
+def get_generator_state(generator):
+    """
+    Returns the words and the pending Gaussian value (NaN for none) of the state of a random.Random: tuple
+    """
+    version, words, gauss = generator.getstate()
+    return words, math.nan if gauss is None else gauss
+
+
+def set_generator_state(generator, words, gauss):
+    """
+    Restores a state returned by get_generator_state() in the given random.Random.
+    """
+    generator.setstate((3, tuple(words), None if math.isnan(gauss) else gauss))
+
+
+def save_world(world, file_name):
+    """
+    Saves the given world in the given file. The file is first written under a temporary name and then renamed,
+    so an earlier checkpoint with the same name is only replaced by a complete one.
+
+    Parameter world is the world to save: SimulationWorld
+
+    Parameter file_name is the file to save the world in: str
+    """
+    characters = world.get_characters()
+    name = (world.get_name() or "").encode()
+
+    indices = array("q", [character.get_index() for character in characters])
+    facings = array("b", [Direction.VALUES.index(character.get_facing()) for character in characters])
+    ages = array("b", [character.get_age() or 0 for character in characters])
+    states = array("b", [character.get_state() for character in characters])
+    brains = array("b", [BRAINS.index(character.get_brain()) for character in characters])
+    durations = array("i", [character.duration for character in characters])
+    disease_lengths = array("i", [character.disease_length for character in characters])
+    outcome_durations = array("i", [character.outcome_duration for character in characters])
+    outcomes = array("b", [character.outcome for character in characters])
+
+    words, gauss = get_generator_state(world.random)
+    transmission = world.get_transmission()
+    sections = [world.walls, indices, facings, ages, states, brains, durations, disease_lengths,
+                outcome_durations, outcomes, array("I", words), array("d", [gauss]),
+                array("q", transmission.rates), array("d", transmission.rates.values()),
+                array("q", transmission.contact_factors), array("d", transmission.contact_factors.values())]
+
+    temporary_name = file_name + ".tmp"
+    with open(temporary_name, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, world.get_width(), world.get_height(), len(characters), world.turn,
+                               world.get_full_turn_count(), world.get_mortality_rate(), world.get_contact_radius(),
+                               world.is_end(), world.clear_deceased, world.scheduled_outcomes, len(name),
+                               len(transmission.rates), len(transmission.contact_factors)))
+        file.write(name + bytes(get_padding(len(name))))
+        for section in sections:
+            data = memoryview(section).cast("B")
+            file.write(data)
+            file.write(bytes(get_padding(len(data))))
+    os.replace(temporary_name, file_name)
+
+
+def load_world(file_name):
+    """
+    Restores a world saved with save_world().
+
+    Parameter file_name is the file the world was saved in: str
+
+    Returns the restored world: SimulationWorld
+
+    Raises ValueError if the file is not a checkpoint of this version.
+    """
+    with open(file_name, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        with memoryview(data) as view:
+            if len(view) < HEADER.size:
+                raise ValueError(f"{file_name} is not a simulation checkpoint")
+            (magic, version, width, height, number_of_characters, turn, full_turn_count,
+             mortality_rate, contact_radius, end, clear_deceased, scheduled_outcomes, name_length, number_of_rates,
+             number_of_factors) = HEADER.unpack_from(view)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{file_name} is not a simulation checkpoint of version {VERSION}")
+
+            offset = HEADER.size
+            name = bytes(view[offset:offset + name_length]).decode()
+            offset += name_length + get_padding(name_length)
+
+            def read(type_code, count):
+                """
+                Returns a copy of the next section of the file as an array of count values of the given type code.
+                """
+                nonlocal offset
+                values = array(type_code)
+                length = values.itemsize * count
+                if offset + length > len(view):
+                    raise ValueError(f"{file_name} is cut short")
+                values.frombytes(view[offset:offset + length])
+                offset += length + get_padding(length)
+                return values
+
+            walls = read("B", (width + 2) * (height + 2))
+            indices = read("q", number_of_characters)
+            facings = read("b", number_of_characters)
+            ages = read("b", number_of_characters)
+            states = read("b", number_of_characters)
+            brains = read("b", number_of_characters)
+            durations = read("i", number_of_characters)
+            disease_lengths = read("i", number_of_characters)
+            outcome_durations = read("i", number_of_characters)
+            outcomes = read("b", number_of_characters)
+            words = read("I", GENERATOR_WORDS)
+            gauss = read("d", 1)[0]
+            rates = dict(zip(read("q", number_of_rates), read("d", number_of_rates)))
+            contact_factors = dict(zip(read("q", number_of_factors), read("d", number_of_factors)))
+
+    world = SimulationWorld(width, height)
+    world.walls[:] = walls
+    world.name = name or None
+    world.mortality_rate = mortality_rate
+    world.set_contact_radius(contact_radius)
+    world.set_clear_deceased(clear_deceased)
+    world.set_scheduled_outcomes(scheduled_outcomes)
+    world.set_transmission(TransmissionTable(rates, contact_factors))
+    set_generator_state(world.random, words, gauss)
+
+    characters = []
+    for turn_number in range(number_of_characters):  # stepper
+        body = Character()
+        body.age = ages[turn_number] or None
+        body.set_brain(BRAINS[brains[turn_number]])
+        body.duration = durations[turn_number]
+        body.disease_length = disease_lengths[turn_number]
+        body.outcome_duration = outcome_durations[turn_number]
+        body.outcome = outcomes[turn_number]
+
+        body.state = states[turn_number]
+        characters.append(body)
+
+    if not world.add_characters(characters, indices, [Direction.VALUES[facing] for facing in facings]):
+        raise ValueError(f"The characters in {file_name} overlap each other or the walls")
+    world.turn = turn
+    world.full_turn_count = full_turn_count
+    world.end = end
+    return world
@@ -9,6 +9,9 @@ class Coordinates():
     A coordinate object is immutable
     after creation.
     """
+
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         """
         Creates a new coordinate pair.
@@ -52,6 +55,12 @@ class Coordinates():
         return Coordinates(self.get_x() + Direction.get_x_step(new_direction) * distance,
                            self.get_y() + Direction.get_y_step(new_direction) * distance)
 
+    def __eq__(self, other):
+        return isinstance(other, Coordinates) and self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def __str__(self):
         """
         Returns a string of the form (X, Y) representing of the coordinate pair
@@ -5,6 +5,10 @@ class Direction:
     SOUTH = (0, 1)
     WEST = (-1, 0)
 
+    VALUES = (NORTH, EAST, SOUTH, WEST)     # clockwise starting from north
+    CLOCKWISE = {NORTH: EAST, EAST: SOUTH, SOUTH: WEST, WEST: NORTH}
+    COUNTER_CLOCKWISE = {NORTH: WEST, EAST: NORTH, SOUTH: EAST, WEST: SOUTH}
+
     @staticmethod
     def get_x_step(facing):
         """
@@ -43,7 +47,7 @@ class Direction:
 
         Returns: list of direction tuples
         """
-        return [Direction.NORTH, Direction.EAST, Direction.SOUTH, Direction.WEST]
+        return list(Direction.VALUES)
 
     @staticmethod
     def get_next_clockwise(direction):
@@ -51,9 +55,7 @@ class Direction:
         Returns the direction 90 degrees clockwise from this direction.
         Returns: another direction tuple clockwise from this one: tuple
         """
-        direction_list = Direction.get_values()
-        index = direction_list.index(direction)
-        return direction_list[(index + 1) % 4]
+        return Direction.CLOCKWISE[direction]
 
     @staticmethod
     def get_next_counter_clockwise(direction):
@@ -61,9 +63,7 @@ class Direction:
         Returns the direction 90 degrees counterclockwise from this direction.
         Returns: another direction counterclockwise from this one: tuple
         """
-        direction_list = Direction.get_values()
-        index = direction_list.index(direction)
-        return direction_list[(index + 3) % 4]
+        return Direction.COUNTER_CLOCKWISE[direction]
 
     @staticmethod
     def get_degrees(direction):
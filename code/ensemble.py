@@ -0,0 +1,179 @@
+import argparse
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from batch import COLUMNS, run_simulation
+from population import PopulationTemplate
+
+"""
+    Runs many independent replicates of the same scenario in parallel on a process pool and combines their
+    epidemic curves. A scenario is a dictionary of the run_simulation parameters population_size,
+    number_of_spreaders, duration and mortality_rate (and optionally name).
+
+    By default every replicate places a random population of its own. With a shared population, the initial
+    population is generated once, published in shared memory (see population.py) and copied by every replicate,
+    so that the replicates only differ in what happens after the start, and the setup does not grow with the
+    number of replicates.
+
+    Usage: python ensemble.py --population 1000 --spreaders 10 --duration 14 --mortality 5 --replicates 100
+"""
+
+
+def derive_seed(base_seed, replicate):
+    """
+    Derives the seed of one replicate from the seed of the whole ensemble. The derived seeds are unrelated to
+    each other, but the same base seed and replicate number always give the same seed: int
+    """
+    digest = hashlib.sha256(f"{base_seed}:{replicate}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def run_replicate(scenario, seed, max_turns=None, engine="object", population_name=None):
+    """
+    Runs one replicate of the scenario. This is the function the worker processes run.
+
+    Parameter population_name is the name of a published population template the replicate starts from, or
+    None for a random population: str
+
+    Returns the counts of each turn, see batch.run_world(): list of tuples
+    """
+    if population_name is None:
+        return run_simulation(seed=seed, max_turns=max_turns, engine=engine, **scenario)[1]
+    with PopulationTemplate.attach(population_name) as population:
+        return run_simulation(seed=seed, max_turns=max_turns, engine=engine, population=population, **scenario)[1]
+
+
+def iter_ensemble(scenario, replicates, base_seed=0, workers=None, max_turns=None, engine="object",
+                  shared_population=False):
+    """
+    Runs the replicates of the scenario on a process pool and yields their results as soon as they finish,
+    so the results come in the order the replicates end, not in the order of their numbers.
+
+    Parameter scenario holds the parameters of run_simulation: dict
+
+    Parameter replicates is the number of replicates: int
+
+    Parameter base_seed is the seed the replicate seeds are derived from, see derive_seed(): int
+
+    Parameter workers is the number of worker processes, or None for one per processor: int
+
+    Parameter max_turns and engine are passed on to run_simulation
+
+    Parameter shared_population tells whether every replicate starts from the same population, generated from
+    the base seed: boolean
+
+    Yields tuples (replicate number, seed, counts of each turn)
+    """
+    population = None
+    population_name = None
+    if shared_population:
+        population = PopulationTemplate.generate(scenario["population_size"], scenario["number_of_spreaders"],
+                                                 derive_seed(base_seed, "population"))
+        population_name = population.publish()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for replicate in range(replicates):  # stepper
+                seed = derive_seed(base_seed, replicate)
+                future = executor.submit(run_replicate, scenario, seed, max_turns, engine, population_name)
+                futures[future] = (replicate, seed)
+
+            for future in as_completed(futures):
+                replicate, seed = futures[future]
+                yield replicate, seed, future.result()
+    finally:
+        if population is not None:
+            population.close()
+
+
+def get_quantile(sorted_values, quantile):
+    """
+    Returns the given quantile (0-1) of the sorted values, interpolating linearly between them: float
+    """
+    position = quantile * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def aggregate_curves(results, quantiles=(0.05, 0.5, 0.95)):
+    """
+    Combines the epidemic curves of the replicates turn by turn. Replicates that ended early are counted with
+    their final counts for the remaining turns. Without results the curves are empty.
+
+    Parameter results are the results of iter_ensemble: list of tuples
+
+    Parameter quantiles are the quantiles (0-1) computed in addition to the mean: tuple
+
+    Returns a dictionary where each count column of COLUMNS maps to a dictionary holding the list of per-turn
+    means under "mean" and the list of per-turn quantiles under each quantile: dict
+    """
+    curves = [counts for replicate, seed, counts in results]
+    length = max((len(counts) for counts in curves), default=0)
+    aggregated = {}
+
+    for column in range(1, len(COLUMNS)):  # stepper
+        mean_curve = []
+        quantile_curves = {quantile: [] for quantile in quantiles}
+
+        for turn in range(length):  # stepper
+            values = sorted(counts[min(turn, len(counts) - 1)][column] for counts in curves)
+            mean_curve.append(sum(values) / len(values))
+            for quantile in quantiles:
+                quantile_curves[quantile].append(get_quantile(values, quantile))
+
+        aggregated[COLUMNS[column]] = {"mean": mean_curve, **quantile_curves}
+    return aggregated
+
+
+def run_ensemble(scenario, replicates, base_seed=0, workers=None, max_turns=None, engine="object",
+                 quantiles=(0.05, 0.5, 0.95), shared_population=False):
+    """
+    Runs the replicates of the scenario and aggregates their curves. See iter_ensemble() and aggregate_curves().
+
+    Returns: A tuple containing the results of the replicates in the order of their numbers and the aggregated
+    curves.
+    """
+    results = sorted(iter_ensemble(scenario, replicates, base_seed, workers, max_turns, engine, shared_population))
+    return results, aggregate_curves(results, quantiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs replicates of a disease simulation in parallel.")
+    parser.add_argument("--population", type=int, required=True, help="the size of the population")
+    parser.add_argument("--spreaders", type=int, required=True, help="the number of spreaders")
+    parser.add_argument("--duration", type=int, required=True, help="the average duration of the disease")
+    parser.add_argument("--mortality", type=int, required=True, help="the mortality rate of the disease (%%)")
+    parser.add_argument("--replicates", type=int, default=100, help="the number of replicates")
+    parser.add_argument("--seed", type=int, default=0, help="the seed the replicate seeds are derived from")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("--max-turns", type=int, default=None, help="stop each replicate after this many turns")
+    parser.add_argument("--engine", choices=["object", "array"], default="object",
+                        help="the simulation engine, array needs NumPy")
+    parser.add_argument("--shared-population", action="store_true",
+                        help="start every replicate from the same population, generated once and shared")
+    arguments = parser.parse_args()
+    if arguments.replicates < 1:
+        parser.error("--replicates must be at least 1")
+
+    scenario = {"population_size": arguments.population, "number_of_spreaders": arguments.spreaders,
+                "duration": arguments.duration, "mortality_rate": arguments.mortality}
+    results, curves = run_ensemble(scenario, arguments.replicates, arguments.seed, arguments.workers,
+                                   arguments.max_turns, arguments.engine,
+                                   shared_population=arguments.shared_population)
+
+    # the mean curve and the 5% and 95% quantiles of each count
+    header = ["turn"]
+    for column in COLUMNS[1:]:
+        header += [f"{column}_mean", f"{column}_q05", f"{column}_q95"]
+    print(",".join(header))
+    for turn in range(len(curves["spreaders"]["mean"])):
+        row = [str(turn)]
+        for column in COLUMNS[1:]:
+            row += [f"{curves[column][quantile][turn]:.2f}" for quantile in ("mean", 0.05, 0.95)]
+        print(",".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import bisect
+import mmap
+import os
+import struct
+from array import array
+
+"""
+    Logs who infected whom and when. An EventLog is given to a SimulationWorld with set_event_log, after which
+    the world reports every infection, recovery and death as a fixed-size binary record:
+
+    turn       the full turn during which the event happened (the spreaders present when the log was set are
+               logged as infections at the current full turn count)
+    infector   the turn number of the spreader who caused an infection, or -1 for recoveries, deaths and the
+               spreaders present when the log was set
+    infectee   the turn number of the character the event happened to
+    location   the square of that character, numbered row by row (y * width + x)
+    type       INFECTION, RECOVERY or DEATH
+
+    Every field is a little-endian int32. The records are appended to the end of the file, so a run continued
+    from a checkpoint can keep logging in the same file, and they are written in buffered chunks.
+
+    EventReader reads a log through a memory map. Its columns are strided views into the file, so millions of
+    events can be queried without turning them all into Python objects.
+"""
+
+INFECTION = 0
+RECOVERY = 1
+DEATH = 2
+
+RECORD = struct.Struct("<iiiii")
+FIELDS = ("turn", "infector", "infectee", "location", "type")
+
+
+class EventLog:
+
+    def __init__(self, file_name, chunk_size=4096):
+        """
+        Opens the given file for appending events.
+
+        Parameter file_name is the file the events are appended to: str
+
+        Parameter chunk_size is the number of events kept in memory before they are written: int
+        """
+        self.file = open(file_name, "ab")
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()   # gatherer of the records not written yet
+        self.buffered = 0
+
+    def log(self, turn, infector, infectee, location, event_type):
+        """
+        Adds an event to the log. See the description of the fields above.
+        """
+        self.buffer += RECORD.pack(turn, infector, infectee, location, event_type)
+        self.buffered += 1
+        if self.buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered events in the file.
+        """
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer = bytearray()
+        self.buffered = 0
+
+    def close(self):
+        """
+        Writes the remaining events and closes the file.
+        """
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+
+class EventReader:
+
+    def __init__(self, file_name):
+        """
+        Opens an event log for reading. The reader should be closed when it is not needed any more.
+
+        Parameter file_name is the file written by EventLog: str
+        """
+        self.file = open(file_name, "rb")
+        self.count = os.fstat(self.file.fileno()).st_size // RECORD.size
+        if self.count > 0:
+            self.map = mmap.mmap(self.file.fileno(), self.count * RECORD.size, access=mmap.ACCESS_READ)
+            self.values = memoryview(self.map).cast("i")
+        else:
+            self.map = None
+            self.values = memoryview(array("i"))
+
+        # column name -> every fifth value starting from the field, a view into the file
+        self.columns = {name: self.values[field::len(FIELDS)] for field, name in enumerate(FIELDS)}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, number):
+        """
+        Returns the event with the given number as a tuple of FIELDS: tuple
+        """
+        if not 0 <= number < self.count:
+            raise IndexError("event number out of range")
+        start = number * len(FIELDS)
+        return tuple(self.values[start:start + len(FIELDS)])
+
+    def get_column(self, name):
+        """
+        Returns one field of every event as a read-only view into the file: memoryview of int
+
+        Parameter name is one of FIELDS: str
+        """
+        return self.columns[name]
+
+    def get_turn_range(self, first_turn, last_turn):
+        """
+        Finds the events of the given full turns. The events are logged in the order of the turns, so they are
+        found by binary search.
+
+        Returns the number of the first event and the number after the last event: tuple
+        """
+        turns = self.columns["turn"]
+        return bisect.bisect_left(turns, first_turn), bisect.bisect_right(turns, last_turn)
+
+    def iter_events(self, event_type=None, first_turn=None, last_turn=None):
+        """
+        Yields the events (tuples of FIELDS) of the given type and full turns one at a time.
+
+        Parameter event_type is INFECTION, RECOVERY, DEATH or None for all events: int
+
+        Parameter first_turn, last_turn limit the events to these full turns, or None for no limit: int
+        """
+        start, end = 0, self.count
+        if first_turn is not None or last_turn is not None:
+            start, end = self.get_turn_range(first_turn if first_turn is not None else -2 ** 31,
+                                             last_turn if last_turn is not None else 2 ** 31 - 1)
+        types = self.columns["type"]
+        for number in range(start, end):  # stepper
+            if event_type is None or types[number] == event_type:
+                yield self[number]
+
+    def count_events(self, event_type):
+        """
+        Returns the number of events of the given type: int
+        """
+        return sum(1 for value in self.columns["type"] if value == event_type)
+
+    def get_infection_turns(self):
+        """
+        Returns the full turn of the infection of each character, indexed by turn number (-1 if the character
+        was never infected): array of int
+        """
+        infection_turns = array("i", [-1]) * (max(self.columns["infectee"], default=-1) + 1)
+        types = self.columns["type"]
+        turns = self.columns["turn"]
+        infectees = self.columns["infectee"]
+        for number in range(self.count):  # stepper
+            if types[number] == INFECTION:
+                infection_turns[infectees[number]] = turns[number]
+        return infection_turns
+
+    def get_generation_intervals(self):
+        """
+        Returns the number of full turns between the infection of each infector and each infection it caused,
+        in the order of the infections: array of int
+        """
+        infection_turns = self.get_infection_turns()
+        intervals = array("i")
+        types = self.columns["type"]
+        turns = self.columns["turn"]
+        infectors = self.columns["infector"]
+        for number in range(self.count):  # stepper
+            if types[number] == INFECTION and infectors[number] >= 0:
+                intervals.append(turns[number] - infection_turns[infectors[number]])
+        return intervals
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        self.values.release()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
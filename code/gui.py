@@ -3,15 +3,25 @@ from PyQt6.QtWidgets import QGraphicsTextItem
 from PyQt6.QtCore import Qt
 
 from character_graphics_item import CharacterGraphicsItem
-from coordinates import Coordinates
+from world_raster_item import WorldRasterItem
+from simulation_worker import SimulationWorker, Snapshot
 
 
 class GUI(QtWidgets.QMainWindow):
     """
     The class GUI handles the drawing of a SimulationWorld and allows user to
     interact with it.
+
+    In the raster mode the whole world is drawn as one image (see WorldRasterItem) instead of
+    one item per square and per character, which makes large populations possible to watch.
+
+    The simulation can be played automatically: a SimulationWorker runs the turns on a background
+    thread while the GUI draws the latest snapshot of the world at a fixed frame rate.
     """
-    def __init__(self, world, square_size):
+
+    FRAME_INTERVAL = 33     # milliseconds between two drawn frames, about 30 frames per second
+
+    def __init__(self, world, square_size, raster=False):
         super().__init__()
 
         self.setCentralWidget(QtWidgets.QWidget())  # QMainWindow must have a centralWidget to be able to add layouts
@@ -19,22 +29,31 @@ class GUI(QtWidgets.QMainWindow):
         self.centralWidget().setLayout(self.horizontal)
         self.world = world
         self.square_size = square_size
-        self.added_characters = []
+        self.character_items = {}   # container, the CharacterGraphicsItem of each character
+        self.raster_item = None     # the WorldRasterItem in the raster mode
+        self.world.track_changes()
+        self.worker = SimulationWorker(self.world, GUI.FRAME_INTERVAL / 1000)
+        self.worker.simulation_ended.connect(self.simulation_ended)
 
         self.init_window()
         self.init_buttons()
 
         # self.gui_exercise = GuiExercise(self.world, self.scene, self.square_size)
 
-        self.add_character_world_grid_items()
-        self.add_character_graphics_items()
-        self.update_characters()
-        self.update_data()
+        if raster:
+            self.raster_item = WorldRasterItem(self.world, self.square_size)
+            self.scene1.addItem(self.raster_item)
+        else:
+            self.add_character_world_grid_items()
+            self.add_character_graphics_items()
+        self.world.take_changed_characters()     # the items were just drawn from the characters themselves
+        self.update_data(Snapshot.get_statistics(self.world))
 
         # Set a timer to call the update function periodically
         self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self.update_characters)
-        self.timer.start(10)    # Milliseconds
+        self.timer.timeout.connect(self.update_frame)
+        self.timer.start(GUI.FRAME_INTERVAL)    # Milliseconds
+        self.worker.start()
 
         bounding_rect = self.scene1.itemsBoundingRect()
         self.view1.setSceneRect(bounding_rect)
@@ -58,7 +77,6 @@ class GUI(QtWidgets.QMainWindow):
                 x_coord = x * square_width
                 y_coord = y * square_height
 
-                square = self.world.get_square(Coordinates(x, y))   # toimiiko pelkkä (x,y)
                 color = QtGui.QColor(211, 211, 211)
 
                 item = QtWidgets.QGraphicsRectItem(x_coord, y_coord, square_width, square_height)
@@ -69,39 +87,25 @@ class GUI(QtWidgets.QMainWindow):
 
         """
         Returns all the CharacterGraphicsItem in the scene.
-
-        NOTE: This is a silly implementation, it would be much more efficient to store
-        all CharacterGraphicsItems in a list and simply return that list.
         """
-        items = []
-        for item in self.scene1.items():
-            if type(item) is CharacterGraphicsItem:
-                items.append(item)
-        return items
+        return list(self.character_items.values())
 
-    def update_data(self):
+    def update_data(self, statistics):
+        """
+        Shows the counts of a snapshot, or the summary if the simulation has ended.
 
-        young, adults, elderly = self.world.get_len_age_groups()
-        number_of_spreaders, spr_young, spr_adults,  spr_elderly = self.world.get_len_spreaders()
-        number_of_susceptible, sus_young, sus_adults, sus_elderly = self.world.get_len_susceptible()
-        number_of_recovered, rec_young, rec_adults, rec_elderly = self.world.get_len_recovered()
-        number_of_deceased, dec_young, dec_adults, dec_elderly = self.world.get_len_deceased()
-        total = number_of_deceased + number_of_susceptible + number_of_recovered + number_of_spreaders
-        number_of_infected = number_of_deceased + number_of_recovered
+        Parameter statistics are the counts, see Snapshot.get_statistics(): dict
+        """
+        young, adults, elderly = statistics["age_groups"]
+        number_of_spreaders, spr_young, spr_adults,  spr_elderly = statistics["spreaders"]
+        number_of_susceptible, sus_young, sus_adults, sus_elderly = statistics["susceptible"]
+        number_of_recovered, rec_young, rec_adults, rec_elderly = statistics["recovered"]
+        number_of_deceased, dec_young, dec_adults, dec_elderly = statistics["deceased"]
 
-        if self.world.is_end():
+        if statistics["end"]:
             self.scene2.clear()
 
-            text_strings = [
-                f"Age group distribution:",
-                f"{young} young people, {adults} adults, {elderly} elderly people\n",
-                f"The simulation is over. There are no more infected people in the population.",
-                f"Out of {total} people, {number_of_deceased + number_of_recovered} got infected.\n",
-                f"{round((number_of_recovered/number_of_infected)*100)}% of the infected got recovered,",
-                f"{rec_young} of them young, {rec_adults} adults and {rec_elderly} elderly people.\n",
-                f"{round((number_of_deceased/number_of_infected)*100)}% of the infected got deceased,",
-                f"{dec_young} of them young, {dec_adults} adults and {dec_elderly} elderly people.\n"
-                ]
+            text_strings = statistics["summary"]
 
             scene_rect = self.scene2.sceneRect()
             scene_width = scene_rect.width()
@@ -165,29 +169,86 @@ class GUI(QtWidgets.QMainWindow):
         If every character already has a CharacterGraphicsItem, this method does nothing.
         """
         for character in self.world.get_characters():
-            if character not in self.added_characters:
+            if character not in self.character_items:
                 character_item = CharacterGraphicsItem(character, self.square_size)
                 self.scene1.addItem(character_item)
-                self.added_characters.append(character)
+                self.character_items[character] = character_item
 
     def init_buttons(self):
         """
         Adds buttons to the window and connects them to their respective functions
         See: QPushButton at https://doc.qt.io/qtforpython/PySide6/QtWidgets/QPushButton.html
         """
+        self.controls = QtWidgets.QVBoxLayout()
+        self.horizontal.addLayout(self.controls)
+
         self.next_turn_btn = QtWidgets.QPushButton("Next full turn")
-        self.next_turn_btn.clicked.connect(self.world.next_full_turn)
-        self.next_turn_btn.clicked.connect(self.update_data)
+        self.next_turn_btn.clicked.connect(self.worker.request_step)
+        self.controls.addWidget(self.next_turn_btn)
 
-        self.horizontal.addWidget(self.next_turn_btn)
+        self.play_btn = QtWidgets.QPushButton("Play")
+        self.play_btn.clicked.connect(self.toggle_play)
+        self.controls.addWidget(self.play_btn)
 
-    def update_characters(self):
+        self.controls.addWidget(QtWidgets.QLabel("Turns per second (0 = max)"))
+        self.speed_box = QtWidgets.QSpinBox()
+        self.speed_box.setRange(0, 10000)
+        self.speed_box.valueChanged.connect(self.worker.set_turns_per_second)
+        self.controls.addWidget(self.speed_box)
+        self.controls.addStretch()
+
+    def toggle_play(self):
+        """
+        Starts or pauses the automatic running of the simulation.
+        """
+        if self.worker.is_playing():
+            self.worker.pause()
+            self.play_btn.setText("Play")
+        elif not self.world.is_end():
+            self.worker.play()
+            self.play_btn.setText("Pause")
+        self.next_turn_btn.setEnabled(not self.worker.is_playing())
+
+    def simulation_ended(self):
+        """
+        Called when the worker finds out that there are no more infected characters.
+        """
+        self.play_btn.setText("Play")
+        self.next_turn_btn.setEnabled(True)
+        self.update_frame()
+
+    def update_frame(self):
         """
-        Iterates over all character items and updates their position to match
-        their physical representations in the simulation world.
+        Draws one frame from the latest snapshot the worker has published: the characters that have changed and
+        the statistics. If no turn has ended since the previous frame, nothing is drawn. The world itself is not
+        read, so the frame never waits for a turn in progress.
+        """
+        snapshot = self.worker.take_snapshot()
+        if snapshot is not None:
+            self.update_characters(snapshot.characters)
+            self.update_data(snapshot.statistics)
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.worker.stop()
+        super().closeEvent(event)
+
+    def update_characters(self, characters):
+        """
+        Updates the items of the characters that have moved, turned or changed state since
+        the last update to match their physical representations in the snapshot.
+        Items of characters that have not changed are left as they are.
+
+        Parameter characters maps each changed character to its values, see Snapshot: dict
         """
-        for character_item in self.get_character_graphics_items():
-            character_item.updateAll()
+        if self.raster_item is not None:
+            self.raster_item.update_characters(characters)
+            return
+
+        for character, (index, x, y, facing, color) in characters.items():
+            character_item = self.character_items.get(character)
+            if character_item is not None:
+                character_item.show(x, y, facing, color)
 
         # self.update_data()
 
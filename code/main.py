@@ -20,7 +20,10 @@ def main():
     global app  # Use global to prevent crashing on exit
     app = QApplication(sys.argv)
 
-    if 50 - size >= 10:
+    if size > 150:
+        # too many people for one graphics item each, draw the world as an image instead
+        gui = GUI(test_world, max(1, 1000 // size), raster=True)
+    elif 50 - size >= 10:
         gui = GUI(test_world, 50-size)
     elif size >= 60:
         gui = GUI(test_world, 8)
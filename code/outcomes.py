@@ -0,0 +1,87 @@
+import bisect
+
+"""
+    Scheduled outcomes of infections. By default a spreader draws at the end of each of its turns whether it
+    recovers or dies during that turn (see SimulationWorld.end_infection_turn), with hazards that grow with the
+    duration d of its disease:
+
+        recovery   (1 - mortality rate) * coefficient * d / disease length
+        death      mortality rate * coefficient * d / disease length, if it did not recover
+
+    where coefficient = (1 - 0.5 ** (1 / (disease length + 1))) / 0.5. The same distribution can be drawn once,
+    when the character is infected: an OutcomeTable holds the probability of every (duration, outcome) pair for
+    one disease length and mortality rate, so a single draw decides both when the disease ends and how.
+
+    The tables are computed once for every disease length and mortality rate, see get_outcome_table().
+"""
+
+RECOVERY = 1
+DEATH = 2
+
+SMALLEST_SURVIVAL = 1e-12   # the tables end when the chance of still being ill is smaller than this
+
+
+class OutcomeTable:
+
+    def __init__(self, disease_length, mortality_rate):
+        """
+        Computes the distribution of the outcomes of an infection.
+
+        Parameter disease_length is the average length of the disease in turns: int
+
+        Parameter mortality_rate is the mortality rate as a fraction (0-1): float
+        """
+        coefficient = (1 - 0.5 ** (1 / (disease_length + 1))) / 0.5
+        self.durations = []             # container, the duration of each outcome
+        self.outcomes = []              # container, RECOVERY or DEATH
+        self.cumulative = []            # container, the probability of this or an earlier outcome
+        survival = 1.0
+        total = 0.0
+        duration = 0
+        while survival > SMALLEST_SURVIVAL:
+            duration += 1
+            hazard = coefficient * (duration / disease_length)
+            recovery = min((1 - mortality_rate) * hazard, 1)
+            death = (1 - recovery) * min(mortality_rate * hazard, 1)
+            for outcome, probability in ((RECOVERY, recovery), (DEATH, death)):
+                if probability > 0:
+                    total += survival * probability
+                    self.durations.append(duration)
+                    self.outcomes.append(outcome)
+                    self.cumulative.append(total)
+            survival *= 1 - recovery - death
+        self.cumulative[-1] = 1.0   # the last outcome also takes the tiny chance left over
+
+    def get_cumulative(self, duration):
+        """
+        Returns the probability that the disease has ended by the given duration: float
+        """
+        position = bisect.bisect_right(self.durations, duration)
+        return self.cumulative[position - 1] if position > 0 else 0.0
+
+    def sample(self, value, duration=0):
+        """
+        Picks an outcome for a character who has been ill for the given duration without an outcome yet.
+
+        Parameter value is a uniform random value (0-1): float
+
+        Returns a tuple of the duration at which the disease ends and RECOVERY or DEATH: tuple
+        """
+        start = self.get_cumulative(duration)
+        position = bisect.bisect_right(self.cumulative, start + value * (1 - start))
+        position = min(position, len(self.cumulative) - 1)
+        return self.durations[position], self.outcomes[position]
+
+
+tables = {}     # container, (disease length, mortality rate) -> OutcomeTable
+
+
+def get_outcome_table(disease_length, mortality_rate):
+    """
+    Returns the outcome table of the given disease length and mortality rate, computing it the first time:
+    OutcomeTable
+    """
+    key = (disease_length, mortality_rate)
+    if key not in tables:
+        tables[key] = OutcomeTable(disease_length, mortality_rate)
+    return tables[key]
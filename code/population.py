@@ -0,0 +1,144 @@
+import random
+import struct
+from array import array
+from multiprocessing import shared_memory
+
+from direction import Direction
+from world_builder import ADULT, ELDERLY, YOUNG, check_parameters, get_world_size
+
+"""
+    An initial population that is generated once and shared by many runs. A PopulationTemplate holds the square,
+    age group and facing of every character of a world, the first number_of_spreaders of them being the spreaders,
+    in the same form as world_builder.create_world and ArrayWorld.from_parameters place them.
+
+    A template can be published in a block of shared memory, after which any process on the machine can attach
+    to it by name. An attached template reads the block in place, so however many runs use the template, its data
+    exists only once; each run copies it into its own world when the world is created
+    (see world_builder.create_world_from_population and ArrayWorld.from_population).
+
+    The block holds a HEADER followed by the squares (int64), the age groups (int8) and the facings (int8, the
+    indices of Direction.VALUES).
+
+    Usage:
+        with PopulationTemplate.generate(100000, 100, seed=1) as population:
+            name = population.publish()
+            ...
+            # in the worker processes
+            with PopulationTemplate.attach(name) as population:
+                world = create_world_from_population("Flu", population, 14, 5, seed)
+"""
+
+MAGIC = b"SIMPOP01"
+HEADER = struct.Struct("<8sQQQ")    # magic, population size, number of spreaders, world size
+
+
+class PopulationTemplate:
+
+    def __init__(self, size, squares, ages, facings, number_of_spreaders):
+        """
+        Creates a template of the given population.
+
+        Parameter size is the width and height of the world: int
+
+        Parameter squares are the squares of the characters, numbered row by row (y * size + x): sequence of int
+
+        Parameter ages are the age groups of the characters (1-3): sequence of int
+
+        Parameter facings are the indices of the directions the characters are facing in Direction.VALUES:
+        sequence of int
+
+        Parameter number_of_spreaders is the number of characters, from the first one on, who start as
+        spreaders: int
+        """
+        self.size = size
+        self.squares = squares
+        self.ages = ages
+        self.facings = facings
+        self.number_of_spreaders = number_of_spreaders
+        self.block = None       # the shared memory block the template is published in or attached to
+        self.view = None        # the read-only view of an attached block
+        self.owner = False      # flag, True if the block was created by this template
+
+    @classmethod
+    def generate(cls, population_size, number_of_spreaders, seed=None):
+        """
+        Places a random population in the same way as world_builder.create_world: with the same seed, the
+        characters get the same squares, ages and facings.
+
+        Returns the new template: PopulationTemplate
+        """
+        check_parameters(population_size, number_of_spreaders, 1, 0)
+        size = get_world_size(population_size)
+        generator = random.Random(seed)
+        squares = array("q", generator.sample(range(size * size), population_size))
+        ages = array("b", generator.choices([YOUNG, ADULT, ELDERLY], k=population_size))
+        facings = array("b", generator.choices(range(len(Direction.VALUES)), k=population_size))
+        return cls(size, squares, ages, facings, number_of_spreaders)
+
+    def get_population_size(self):
+        return len(self.squares)
+
+    def publish(self):
+        """
+        Copies the template in a new block of shared memory, which stays available until the template is closed.
+
+        Returns the name other processes attach to the template with: str
+        """
+        if self.block is not None:
+            return self.block.name
+        data = b"".join(array(type_code, values).tobytes()
+                        for type_code, values in (("q", self.squares), ("b", self.ages), ("b", self.facings)))
+        self.block = shared_memory.SharedMemory(create=True, size=HEADER.size + len(data))
+        self.owner = True
+        HEADER.pack_into(self.block.buf, 0, MAGIC, len(self.squares), self.number_of_spreaders, self.size)
+        self.block.buf[HEADER.size:HEADER.size + len(data)] = data
+        return self.block.name
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to a template published by another process. The template reads the shared memory in place
+        and cannot be changed. It should be closed when it is not needed any more.
+
+        Raises ValueError if the block does not hold a population template.
+
+        Returns the template: PopulationTemplate
+        """
+        block = shared_memory.SharedMemory(name=name)
+        magic, population_size, number_of_spreaders, size = HEADER.unpack_from(block.buf, 0)
+        if magic != MAGIC:
+            block.close()
+            raise ValueError(f"{name} is not a population template")
+
+        view = block.buf.toreadonly()
+        start = HEADER.size
+        squares = view[start:start + 8 * population_size].cast("q")
+        start += 8 * population_size
+        ages = view[start:start + population_size].cast("b")
+        facings = view[start + population_size:start + 2 * population_size].cast("b")
+        template = cls(size, squares, ages, facings, number_of_spreaders)
+        template.block = block
+        template.view = view
+        return template
+
+    def close(self):
+        """
+        Lets go of the shared memory. A published template also removes the block, so it should be closed only
+        after the other processes are done with it.
+        """
+        if self.block is None:
+            return
+        if self.view is not None:
+            for values in (self.squares, self.ages, self.facings, self.view):
+                values.release()
+            self.squares = self.ages = self.facings = self.view = None
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+        self.block = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
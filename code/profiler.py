@@ -0,0 +1,106 @@
+import json
+import time
+
+"""
+    Measures where the time of a simulation goes. A TurnProfiler is given to a world with set_profiler, after
+    which the world reports the wall time and the number of calls of each phase of the character turns:
+
+    movement    the brain moves the body (Brain.move_body)
+    contacts    the characters next to a spreader are found
+    infection   the infection draws of those characters
+    outcome     the spreader recovers, dies or stays infected
+
+    The phases are counted separately for each brain type (Spreader, Susceptible, Recovered), by the brain the
+    character had when its turn started. The totals of the whole run and the totals of every full turn are kept.
+    When no profiler is set, the world does not measure anything.
+"""
+
+PHASES = ["movement", "contacts", "infection", "outcome"]
+
+
+class TurnProfiler:
+
+    def __init__(self):
+        self.clock = time.perf_counter
+        self.totals = {}        # (phase, brain type) -> [seconds, calls]
+        self.turn_totals = {}   # the same for the full turn that is running
+        self.turns = []         # container of the turn totals of each finished full turn
+
+    def add(self, phase, brain_type, seconds):
+        """
+        Records one call of a phase.
+
+        Parameter phase is one of PHASES: str
+
+        Parameter brain_type is the name of the brain class of the character: str
+
+        Parameter seconds is the wall time of the call: float
+        """
+        entry = self.turn_totals.get((phase, brain_type))
+        if entry is None:
+            entry = self.turn_totals[(phase, brain_type)] = [0.0, 0]
+        entry[0] += seconds
+        entry[1] += 1
+
+    def end_turn(self, full_turn_count):
+        """
+        Adds the measurements of the full turn that has just ended to the totals and to the list of turns.
+
+        Parameter full_turn_count is the number of the full turn: int
+        """
+        for key, (seconds, calls) in self.turn_totals.items():
+            entry = self.totals.get(key)
+            if entry is None:
+                entry = self.totals[key] = [0.0, 0]
+            entry[0] += seconds
+            entry[1] += calls
+        self.turns.append((full_turn_count, self.turn_totals))
+        self.turn_totals = {}
+
+    def get_total_seconds(self):
+        """
+        Returns the wall time of all the phases of all the finished full turns: float
+        """
+        return sum(seconds for seconds, calls in self.totals.values())
+
+    def get_phase_seconds(self, phase):
+        """
+        Returns the wall time of the given phase over all brain types and finished full turns: float
+        """
+        return sum(seconds for (name, brain_type), (seconds, calls) in self.totals.items() if name == phase)
+
+    def get_table(self):
+        """
+        Returns the totals as lines of a text table with one row for each phase and brain type: list of str
+        """
+        total = self.get_total_seconds()
+        lines = [f"{'phase':<10} {'brain':<12} {'seconds':>10} {'share':>7} {'calls':>10} {'us/call':>9}"]
+        for (phase, brain_type), (seconds, calls) in sorted(self.totals.items(),
+                                                            key=lambda item: (PHASES.index(item[0][0]),
+                                                                              item[0][1])):
+            share = seconds / total if total > 0 else 0
+            lines.append(f"{phase:<10} {brain_type:<12} {seconds:10.4f} {share:7.1%} {calls:10d} "
+                         f"{seconds / calls * 1e6:9.2f}")
+        lines.append(f"{'total':<23} {total:10.4f}    {len(self.turns)} full turns")
+        return lines
+
+    def to_dict(self):
+        """
+        Returns the totals and the measurements of every full turn in a form that can be saved as JSON: dict
+        """
+        def rows(totals):
+            return [{"phase": phase, "brain": brain_type, "seconds": seconds, "calls": calls}
+                    for (phase, brain_type), (seconds, calls) in totals.items()]
+
+        return {
+            "total_seconds": self.get_total_seconds(),
+            "totals": rows(self.totals),
+            "turns": [{"turn": turn, "phases": rows(totals)} for turn, totals in self.turns],
+        }
+
+    def save_json(self, file_name):
+        """
+        Saves the measurements in the given file as JSON, see to_dict().
+        """
+        with open(file_name, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
@@ -0,0 +1,165 @@
+import ast
+import csv
+import struct
+
+"""
+    Records the epidemic curve of a simulation while it runs. A recorder is given to a world with set_recorder,
+    after which the world hands itself to the recorder at the end of every full turn. Each turn becomes one row
+    of COLUMNS: the size of every compartment in total and by age group, and the number of new infections and
+    deaths during the turn.
+
+    The rows are kept in a buffer of chunk_size rows and written to the file a chunk at a time, so the memory
+    used stays the same however many turns are run. Two file formats are supported:
+
+    csv    a text file with a header row
+    npy    a NumPy array file with one named int64 field per column, written without NumPy and read with
+           numpy.load(file_name)["spreaders_total"] etc.
+
+    Usage:
+        recorder = TimeSeriesRecorder("curve.csv")
+        world.set_recorder(recorder)
+        ...
+        recorder.close()
+"""
+
+COMPARTMENTS = ("spreaders", "susceptible", "recovered", "deceased")
+GROUPS = ("total", "young", "adults", "elderly")
+COLUMNS = (("turn",) + tuple(f"{compartment}_{group}" for compartment in COMPARTMENTS for group in GROUPS)
+           + ("new_infections", "new_deaths"))
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_HEADER_LENGTH = 128 * ((len(COLUMNS) * 32 + 64) // 128 + 1)   # room for the field names and any row count
+
+
+def get_row(world, previous_row):
+    """
+    Returns the row of COLUMNS for the current state of the world: tuple of int
+
+    Parameter previous_row is the row of the previous turn, or None for the first row: tuple of int
+    """
+    counts = (world.get_len_spreaders(), world.get_len_susceptible(), world.get_len_recovered(),
+              world.get_len_deceased())
+    row = [world.get_full_turn_count()]
+    for compartment in counts:
+        row.extend(int(count) for count in compartment)
+
+    # everyone who has ever been infected is now a spreader, recovered or deceased
+    ever_infected = row[1] + row[9] + row[13]
+    deceased = row[13]
+    if previous_row is None:
+        row += [ever_infected, deceased]
+    else:
+        row += [ever_infected - (previous_row[1] + previous_row[9] + previous_row[13]), deceased - previous_row[13]]
+    return tuple(row)
+
+
+def get_npy_header(rows):
+    """
+    Returns the header of a NumPy array file holding the given number of rows of COLUMNS. The header always has
+    the same length, so it can be written again over the old one when more rows have been added: bytes
+    """
+    fields = ", ".join(f"('{column}', '<i8')" for column in COLUMNS)
+    text = f"{{'descr': [{fields}], 'fortran_order': False, 'shape': ({rows},), }}"
+    padding = NPY_HEADER_LENGTH - len(NPY_MAGIC) - 2 - len(text) - 1
+    return (NPY_MAGIC + struct.pack("<H", NPY_HEADER_LENGTH - len(NPY_MAGIC) - 2)
+            + (text + " " * padding + "\n").encode())
+
+
+class TimeSeriesRecorder:
+
+    def __init__(self, file_name, file_format=None, chunk_size=1024):
+        """
+        Opens the given file for recording. Any earlier contents of the file are lost.
+
+        Parameter file_name is the file the rows are written in: str
+
+        Parameter file_format is "csv" or "npy", or None to choose by the ending of the file name: str
+
+        Parameter chunk_size is the number of rows kept in memory before they are written: int
+
+        Raises ValueError if the format is not known.
+        """
+        if file_format is None:
+            file_format = "npy" if file_name.endswith(".npy") else "csv"
+        if file_format not in ("csv", "npy"):
+            raise ValueError(f"Unknown time series format: {file_format}")
+
+        self.file_format = file_format
+        self.chunk_size = chunk_size
+        self.buffer = []            # container of the rows not written yet
+        self.previous_row = None    # most-recent holder
+        self.rows_written = 0
+
+        if file_format == "csv":
+            self.file = open(file_name, "w", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(COLUMNS)
+        else:
+            self.file = open(file_name, "wb")
+            self.file.write(get_npy_header(0))
+            self.row_struct = struct.Struct("<" + "q" * len(COLUMNS))
+
+    def record(self, world):
+        """
+        Adds a row for the current state of the given world. The world calls this at the end of every full turn.
+
+        Parameter world is the world being recorded: SimulationWorld or ArrayWorld
+        """
+        row = get_row(world, self.previous_row)
+        self.previous_row = row
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the buffered rows in the file.
+        """
+        if not self.buffer:
+            return
+        if self.file_format == "csv":
+            self.writer.writerows(self.buffer)
+        else:
+            self.file.write(b"".join(self.row_struct.pack(*row) for row in self.buffer))
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    def close(self):
+        """
+        Writes the remaining rows and closes the file. A NumPy file gets its final row count in the header.
+        """
+        if self.file.closed:
+            return
+        self.flush()
+        if self.file_format == "npy":
+            self.file.seek(0)
+            self.file.write(get_npy_header(self.rows_written))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
+
+
+def read_npy(file_name):
+    """
+    Reads a NumPy array file written by TimeSeriesRecorder without NumPy.
+
+    Returns a dictionary where each column of COLUMNS maps to the list of its values: dict
+    """
+    with open(file_name, "rb") as file:
+        if file.read(len(NPY_MAGIC)) != NPY_MAGIC:
+            raise ValueError(f"{file_name} is not a NumPy array file")
+        header_length = struct.unpack("<H", file.read(2))[0]
+        header = ast.literal_eval(file.read(header_length).decode())
+        columns = [name for name, dtype in header["descr"]]
+        row_struct = struct.Struct("<" + "q" * len(columns))
+        data = file.read(row_struct.size * header["shape"][0])
+
+    values = {column: [] for column in columns}
+    for row in row_struct.iter_unpack(data):
+        for column, value in zip(columns, row):
+            values[column].append(value)
+    return values
@@ -1,29 +1,11 @@
 import math
-import random
 from direction import Direction
 from brain import Brain
 
 
 class Recovered(Brain):
 
-    def __init__(self, body, random_seed):
-        """
-        Creates a brain for a recovered individual.
-        Each Recovered has its own unique Random object (a random number generator). Recovered does not create a
-        new Random number generator every time this method is called.
-
-        See the documentation of random (in https://docs.python.org/3.4/library/random.html).
-        Parameter body is the character whose actions the brain is supposed to control: Character
-        Parameter random_seed is the seed that feeds the random generator that guides the bot: int
-        """
-        super(Recovered, self).__init__(body)
-        self.random = random.Random(random_seed)
-
-    def is_recovered(self):
-        self.recovered = True
-        return self.recovered
-
-    def move_body(self):
+    def move_body(self, body):
         """
         Moves the character. A recovered character selects a random direction and tries to move to the adjacent square in that
         direction. If there is a wall or another character in that square, the character will collide (and does not move). If
@@ -44,14 +26,19 @@ class Recovered(Brain):
 
         See random.choice()
         """
-        if self.body.move(self.get_random_direction()):
-            self.body.spin(self.get_random_direction())
+        if body.move(self.get_random_direction(body)):
+            body.spin(self.get_random_direction(body))
 
-    def get_random_direction(self):
+    def get_random_direction(self, body):
         """
-        Selects a random direction.
+        Selects a random direction for the given character with the random number generator of its world, so
+        the recovered characters take the same random walks whenever the world is seeded the same.
+
+        Parameter body is the recovered character: Character
 
         Returns: random direction: tuple
         """
-        directions = Direction.get_values()
-        return self.random.choice(directions)
+        return body.world.random.choice(Direction.get_values())
+
+
+RECOVERED = Recovered()    # the brain shared by all recovered characters
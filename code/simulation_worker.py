@@ -0,0 +1,188 @@
+import threading
+import time
+
+from PyQt6 import QtCore
+
+from character_graphics_item import get_character_color
+
+
+class SimulationWorker(QtCore.QThread):
+
+    """
+        The class SimulationWorker runs the full turns of a SimulationWorld on a background thread, so that the
+        GUI stays responsive however long a turn takes.
+
+        The time is divided into frames. During each frame the worker runs as many full turns as fit in its share
+        of the frame (or as many as the speed limit allows), and then sleeps for the rest of the frame. Only the
+        worker touches the world while it runs: at the end of each frame it publishes a Snapshot of the characters
+        that have changed and of the counts, and the GUI draws the latest snapshot. The lock is only held to hand
+        over the snapshot, never during a turn, so the GUI does not wait for a slow turn.
+    """
+
+    simulation_ended = QtCore.pyqtSignal()
+
+    def __init__(self, world, frame_interval=1/30, busy_share=0.5):
+        """
+        Parameter world is the world to run: SimulationWorld
+
+        Parameter frame_interval is the length of a frame in seconds: float
+
+        Parameter busy_share is the share of each frame the worker may use for running turns: float
+        """
+        super(SimulationWorker, self).__init__()
+
+        self.world = world
+        self.lock = threading.Lock()        # held while the snapshot is published or taken
+        self.snapshot = None                # most-recent holder, the snapshot the GUI has not taken yet
+        self.frame_interval = frame_interval
+        self.busy_share = busy_share
+        self.turns_per_second = 0           # 0 for as many turns as fit in each frame
+        self.turn_allowance = 0.0           # how many turns the speed limit still allows
+        self.previous_frame_start = None
+        self.playing = False                # flag
+        self.step_requested = False         # flag, see request_step
+        self.work = threading.Event()       # set to wake the thread up when there is something to do
+        self.stopping = False
+
+    def play(self):
+        """
+        Starts running turns, or continues after a pause.
+        """
+        if not self.world.is_end():
+            self.playing = True
+            self.work.set()
+
+    def pause(self):
+        """
+        Stops running turns after the current frame.
+        """
+        self.playing = False
+        self.previous_frame_start = None
+
+    def is_playing(self):
+        return self.playing
+
+    def request_step(self):
+        """
+        Asks the thread to run a single full turn. The turn runs on the thread, and its result is published like
+        the turns of a frame.
+        """
+        self.step_requested = True
+        self.work.set()
+
+    def set_turns_per_second(self, turns_per_second):
+        """
+        Limits the speed of the simulation.
+
+        Parameter turns_per_second is the largest number of full turns run in a second, or 0 for no limit: int
+        """
+        self.turns_per_second = turns_per_second
+        self.turn_allowance = 0.0
+
+    def stop(self):
+        """
+        Ends the thread and waits until it has finished.
+        """
+        self.stopping = True
+        self.work.set()
+        self.wait()
+
+    def publish(self):
+        """
+        Adds the characters that have changed since the previous snapshot, and the current counts, to the snapshot
+        waiting for the GUI. Called on the thread between two full turns.
+        """
+        world = self.world
+        characters = {}
+        for character in world.take_changed_characters():
+            index = character.get_index()
+            characters[character] = (index, world.get_x(index), world.get_y(index), character.get_facing(),
+                                     get_character_color(character))
+        statistics = Snapshot.get_statistics(world)
+
+        with self.lock:
+            if self.snapshot is None:
+                self.snapshot = Snapshot()
+            self.snapshot.characters.update(characters)
+            self.snapshot.statistics = statistics
+
+    def take_snapshot(self):
+        """
+        Returns the snapshot published since the previous call, or None if there is no new one: Snapshot
+        """
+        with self.lock:
+            snapshot = self.snapshot
+            self.snapshot = None
+        return snapshot
+
+    def run_frame(self, frame_start):
+        """
+        Runs the full turns of one frame: as many as fit in the busy share of the frame (but at least one), or as
+        many as the speed limit allows.
+
+        Returns False if the simulation ended during the frame, True otherwise: boolean
+        """
+        budget = self.frame_interval * self.busy_share
+        if self.turns_per_second > 0:
+            elapsed = self.frame_interval
+            if self.previous_frame_start is not None:
+                elapsed = min(frame_start - self.previous_frame_start, 1.0)
+            self.turn_allowance = min(self.turn_allowance + self.turns_per_second * elapsed,
+                                      max(self.turns_per_second * self.frame_interval, 1.0))
+            if self.turn_allowance < 1:
+                return True
+
+        while True:
+            if not self.world.next_full_turn():
+                return False
+            if self.turns_per_second > 0:
+                self.turn_allowance -= 1
+                if self.turn_allowance < 1:
+                    return True
+            if time.perf_counter() - frame_start >= budget:
+                return True
+
+    def run(self):
+        while not self.stopping:
+            if not (self.playing or self.step_requested):
+                self.work.wait(0.1)
+                self.work.clear()
+                continue
+
+            frame_start = time.perf_counter()
+            if self.step_requested:
+                self.step_requested = False
+                running = self.world.next_full_turn()
+            else:
+                running = self.run_frame(frame_start)
+                self.previous_frame_start = frame_start
+            self.publish()
+            if not running:
+                self.playing = False
+                self.simulation_ended.emit()
+
+            if self.playing:
+                # the rest of the frame is left for drawing
+                time.sleep(max(self.frame_interval - (time.perf_counter() - frame_start), 0.001))
+
+
+class Snapshot:
+
+    """
+        The state of a world between two full turns, as far as the GUI draws it: the characters that have changed
+        and the counts. The values are copied, so the snapshot can be drawn while the world takes its next turns.
+    """
+
+    def __init__(self):
+        self.characters = {}    # container, character -> (index, x, y, facing, colour)
+        self.statistics = None  # most-recent holder, see get_statistics
+
+    @staticmethod
+    def get_statistics(world):
+        """
+        Returns the counts the GUI shows, whether the simulation has ended and the summary of the world: dict
+        """
+        return {"age_groups": world.get_len_age_groups(), "spreaders": world.get_len_spreaders(),
+                "susceptible": world.get_len_susceptible(), "recovered": world.get_len_recovered(),
+                "deceased": world.get_len_deceased(), "end": world.is_end(),
+                "summary": world.get_summary() if world.is_end() else None}
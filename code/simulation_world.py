@@ -1,12 +1,20 @@
-from square import Square
-from spreader import Spreader
-from recovered import Recovered
+from square import Square, GridSquare
+from spreader import SPREADER
+from recovered import RECOVERED
+from state import State
+from direction import Direction
+from coordinates import Coordinates
 import random
+import events
+from transmission import TransmissionTable
+from outcomes import RECOVERY, DEATH, get_outcome_table
 #  from user_input import user_input
 
 
 class SimulationWorld:
 
+    OUTSIDE = Square(True)   # the wall square returned for all coordinates outside any world
+
     def __init__(self, width, height):
         """
                 Creates a new simulation world with the specified dimensions.
@@ -17,21 +25,153 @@ class SimulationWorld:
                 Parameter height is the height of the world in squares: int
         """
 
-        self.squares = [None] * width
-        for x in range(self.get_width()):  # stepper
-            self.squares[x] = [None] * height
-            for y in range(self.get_height()):  # stepper
-                self.squares[x][y] = Square()  # fixed value
+        # The squares are stored row by row in two flat arrays: the characters in the squares are in occupants
+        # and the wall squares are marked in walls. The world is surrounded by a border of wall squares, so the
+        # square next to any square of the world is found just by adding the step of the direction to its index
+        # (see get_index and get_neighbour_index), without checking the edges of the world.
+        self.width = width
+        self.height = height
+        self.row_length = width + 2
+        self.occupants = [None] * (self.row_length * (height + 2))
+        self.walls = bytearray(b"\x01" * len(self.occupants))
+        for y in range(height):  # stepper
+            start = self.get_index(0, y)
+            self.walls[start:start + width] = bytes(width)
+        self.steps = {Direction.NORTH: -self.row_length, Direction.EAST: 1,
+                      Direction.SOUTH: self.row_length, Direction.WEST: -1}
+        self.squares = {}   # container, the GridSquare of each index asked for so far, see get_square
 
         self.characters = []  # container
         self.turn = 0         # kinda like stepper (but not quite) index to characters list
+
+        # The active schedule: the characters that still take turns are linked in a ring in the order of their
+        # turn numbers, so that deceased characters can be dropped from it in constant time. Both lists are indexed
+        # by turn number and hold -1 for characters that are not in the schedule.
+        self.next_turn = []         # container
+        self.previous_turn = []     # container
+        self.first_active = -1      # the smallest turn number in the schedule
+        self.active_count = 0
+        self.clear_deceased = False
+        self.scheduled_outcomes = False     # flag, see set_scheduled_outcomes
         self.end = False
         self.name = None
         self.mortality_rate = 0
+        self.full_turn_count = 0
+        self.random = random.Random()   # the random number generator that drives the simulation
+        self.changed_characters = None  # gatherer, see track_changes
+        self.profiler = None            # most-recent holder, see set_profiler
+        self.recorder = None            # most-recent holder, see set_recorder
+        self.event_log = None           # most-recent holder, see set_event_log
+        self.transmission = TransmissionTable()     # most-recent holder, see set_transmission
+        self.set_contact_radius(1.5)
+
+        # counters kept up to date on every state change: [total, young, adults, elderly]
+        self.age_counts = [0, 0, 0, 0]
+        self.state_counts = {}
+        for state in State.get_values():
+            self.state_counts[state] = [0, 0, 0, 0]
 
     def is_end(self):
         return self.end
 
+    def set_seed(self, seed):
+        """
+        Seeds the random number generator of the world so that a simulation can be repeated.
+
+        Parameter seed is the seed of the generator: int
+        """
+        self.random.seed(seed)
+
+    def set_recorder(self, recorder):
+        """
+        Starts or stops recording the counts of every full turn. The current counts are recorded right away as the
+        first row.
+
+        Parameter recorder receives the world at the end of every full turn, or None to stop recording:
+        TimeSeriesRecorder
+        """
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.record(self)
+
+    def set_event_log(self, event_log, log_current=True):
+        """
+        Starts or stops logging the infections, recoveries and deaths.
+
+        Parameter event_log receives the events, or None to stop logging: EventLog
+
+        Parameter log_current tells whether the characters infected right now are logged as infections without
+        an infector. A run resumed from a checkpoint appends to the log of the same run, which already has their
+        infections, so it passes False: boolean
+        """
+        self.event_log = event_log
+        if event_log is not None and log_current:
+            for character in self.characters:
+                if character.state == State.INFECTED:
+                    self.log_event(-1, character, events.INFECTION, self.full_turn_count)
+
+    def log_event(self, infector, character, event_type, turn=None):
+        """
+        Adds an event to the event log, see set_event_log().
+
+        Parameter infector is the turn number of the spreader behind an infection, or -1: int
+
+        Parameter character is the character the event happened to: Character
+
+        Parameter event_type is events.INFECTION, events.RECOVERY or events.DEATH: int
+
+        Parameter turn is the full turn of the event, or None for the full turn that is running: int
+        """
+        if turn is None:
+            turn = self.full_turn_count + 1
+        index = character.get_index()
+        self.event_log.log(turn, infector, character.turn_number,
+                           self.get_y(index) * self.width + self.get_x(index), event_type)
+
+    def set_profiler(self, profiler):
+        """
+        Starts or stops measuring the time of each phase of the character turns.
+
+        Parameter profiler receives the measurements, or None to stop measuring: TurnProfiler
+        """
+        self.profiler = profiler
+
+    def track_changes(self):
+        """
+        Starts recording which characters move, turn or change state, so that a view of the world only needs to
+        redraw those. Until this is called, nothing is recorded.
+
+        See take_changed_characters()
+        """
+        if self.changed_characters is None:
+            self.changed_characters = set()
+
+    def character_changed(self, character):
+        """
+        Records that the given character has moved, turned or changed state, if changes are tracked.
+        """
+        if self.changed_characters is not None:
+            self.changed_characters.add(character)
+
+    def take_changed_characters(self):
+        """
+        Returns the characters that have moved, turned or changed state since the last call and starts
+        recording again from an empty set: set
+
+        See track_changes()
+        """
+        changed = self.changed_characters
+        if changed is None:
+            return set()
+        self.changed_characters = set()
+        return changed
+
+    def get_full_turn_count(self):
+        """
+        Returns the number of full turns taken so far: int
+        """
+        return self.full_turn_count
+
     def set_mortality_rate(self, mortality_rate_in_percents):
         rate = mortality_rate_in_percents / 100
         self.mortality_rate = rate
@@ -39,6 +179,90 @@ class SimulationWorld:
     def get_mortality_rate(self):
         return self.mortality_rate
 
+    def set_contact_radius(self, radius):
+        """
+        Sets the distance within which an infected character can infect other characters and
+        precomputes the offsets (the "stencil") of the squares that lie within that distance.
+
+        Parameter radius is the contact distance in squares, measured between square centres: float
+        """
+        reach = int(radius)
+        self.contact_radius = radius
+        self.contact_offsets = []
+        for dx in range(-reach, reach + 1):  # stepper
+            for dy in range(-reach, reach + 1):  # stepper
+                if 0 < dx * dx + dy * dy <= radius * radius:
+                    self.contact_offsets.append((dx, dy))
+        self.contact_steps = [dy * self.row_length + dx for dx, dy in self.contact_offsets]
+
+    def get_contact_radius(self):
+        return self.contact_radius
+
+    def set_transmission(self, transmission):
+        """
+        Sets the rates at which the spreaders infect their susceptible contacts.
+
+        Parameter transmission is the table of the rates: TransmissionTable
+        """
+        self.transmission = transmission
+
+    def get_transmission(self):
+        return self.transmission
+
+    def set_scheduled_outcomes(self, scheduled):
+        """
+        Chooses how the infections end. By default every spreader draws at the end of each of its turns whether
+        it recovers or dies. With scheduled outcomes, the duration at which the disease ends and whether it ends
+        in recovery or death are drawn once per infection from the same distribution (see outcomes.py), and the
+        spreader only compares its duration with the scheduled one on its later turns. Spreaders that are ill
+        already when the mode is turned on get outcomes drawn for the rest of their disease.
+
+        The outcomes are drawn with the mortality rate of the world at the time, so set_mortality_rate should be
+        called before the first turn.
+
+        Parameter scheduled is True to draw the outcomes once per infection: boolean
+        """
+        self.scheduled_outcomes = scheduled
+
+    def schedule_outcome(self, current):
+        """
+        Draws the outcome of the infection of the given spreader, given that the disease has not ended before its
+        current duration.
+
+        Parameter current is the spreader whose turn it is: Character
+        """
+        table = get_outcome_table(current.get_disease_length(), self.mortality_rate)
+        current.outcome_duration, current.outcome = table.sample(self.random.random(), current.get_duration() - 1)
+
+    def get_contacts(self, character):
+        """
+        Finds the characters that are within the contact radius of the given character. Instead of measuring the
+        distance to every character in the world, only the squares in the precomputed contact stencil around the
+        character are examined.
+
+        Parameter character is the character whose contacts are searched: Character
+        Returns the characters within the contact radius: list
+        """
+        index = character.get_index()
+        occupants = self.occupants
+        contacts = []
+
+        if self.contact_radius < 2:
+            # the whole stencil fits inside the border of walls around the world
+            for step in self.contact_steps:
+                other = occupants[index + step]
+                if other is not None:
+                    contacts.append(other)
+            return contacts
+
+        x = self.get_x(index)
+        y = self.get_y(index)
+        for dx, dy in self.contact_offsets:
+            contact_index = self.get_index(x + dx, y + dy)
+            if contact_index >= 0 and occupants[contact_index] is not None:
+                contacts.append(occupants[contact_index])
+        return contacts
+
     def get_name(self):
         return self.name
 
@@ -46,13 +270,13 @@ class SimulationWorld:
         """
         Returns width of the world in squares: int
         """
-        return len(self.squares)
+        return self.width
 
     def get_height(self):
         """
         Returns the height of the world in squares: int
         """
-        return len(self.squares[0])
+        return self.height
 
     def add_character(self, character, location, facing):
         """
@@ -71,23 +295,324 @@ class SimulationWorld:
 
         See Character.set_world(SimulationWorld, Coordinates, Direction)
         """
+        if not self.contains(location):
+            return False
+
         if character.set_world(self, location, facing):
+            character.turn_number = len(self.characters)
             self.characters.append(character)
-            self.get_square(location).set_character(character)
+            self.occupants[character.get_index()] = character
+            self.add_to_schedule(character)
+            self.count_character(character, character.get_state(), 1)
+            self.age_counts[0] += 1
+            self.age_counts[State.get_age_group(character.get_age())] += 1
             return True
         else:
             return False
 
+    def add_characters(self, characters, indices, facings):
+        """
+        Adds many new characters in the simulation world in one pass. This does the same as calling add_character
+        for each of them, but the squares are given as indices and the characters are placed directly.
+
+        Parameter characters are the characters to be added: list of Character
+
+        Parameter indices are the indices of their squares (see get_index): list of int
+
+        Parameter facings are the directions the characters are facing initially: list of tuples
+
+        Returns False without adding anyone if a square is not free or is given twice, or a character is already
+        located in some world, True otherwise: boolean
+        """
+        # deceased characters do not take up their squares if the squares of the deceased are cleared
+        placed = [index for character, index in zip(characters, indices)
+                  if not (self.clear_deceased and character.get_state() == State.DECEASED)]
+        if len(set(placed)) != len(placed):
+            return False
+        for index in placed:
+            if not self.is_free(index):
+                return False
+        for character in characters:
+            if character.get_world() is not None:
+                return False
+
+        for turn_number, (character, index, facing) in enumerate(zip(characters, indices, facings),
+                                                                 len(self.characters)):
+            character.world = self
+            character.turn_number = turn_number
+            character.index = index
+            character.facing = facing
+            self.characters.append(character)
+            if not (self.clear_deceased and character.get_state() == State.DECEASED):
+                self.occupants[index] = character
+            self.add_to_schedule(character)
+            self.count_character(character, character.get_state(), 1)
+            self.age_counts[0] += 1
+            self.age_counts[State.get_age_group(character.get_age())] += 1
+        return True
+
+    def count_character(self, character, state, change):
+        """
+        Adds the given change to the population counters of the character's state and age group.
+
+        Parameter character is the counted character: Character
+
+        Parameter state is the state the character is counted in: int (see State)
+
+        Parameter change is 1 when a character enters the state and -1 when it leaves it: int
+        """
+        age_group = State.get_age_group(character.get_age())
+        counts = self.state_counts[state]
+        counts[0] += change
+        counts[age_group] += change
+
+    def update_state_counts(self, character, previous_state):
+        """
+        Moves the character from the counters of its previous state to the counters of its current state.
+        Called by the character whenever its state flags change, see Character.state_changed().
+
+        Parameter character is the character whose state changed: Character
+
+        Parameter previous_state is the state of the character before the change: int (see State)
+        """
+        state = character.get_state()
+        if state != previous_state:
+            self.count_character(character, previous_state, -1)
+            self.count_character(character, state, 1)
+            self.character_changed(character)
+            if state == State.DECEASED:
+                self.remove_from_schedule(character)
+
+    def add_to_schedule(self, character):
+        """
+        Adds a newly added character at the end of the active schedule, unless it is deceased.
+        The character must have the largest turn number in the world.
+        """
+        self.next_turn.append(-1)
+        self.previous_turn.append(-1)
+        if character.get_state() == State.DECEASED:
+            return
+
+        turn_number = character.turn_number
+        if self.active_count == 0:
+            # everyone before the character is deceased, so the character is the next to act
+            self.first_active = self.turn = turn_number
+            self.next_turn[turn_number] = self.previous_turn[turn_number] = turn_number
+        else:
+            last = self.previous_turn[self.first_active]
+            self.next_turn[last] = turn_number
+            self.previous_turn[turn_number] = last
+            self.next_turn[turn_number] = self.first_active
+            self.previous_turn[self.first_active] = turn_number
+        self.active_count += 1
+
+    def remove_from_schedule(self, character):
+        """
+        Drops a deceased character from the active schedule, and clears its square if the squares of the deceased
+        are cleared (see set_clear_deceased). The order of the other characters stays the same.
+        """
+        turn_number = character.turn_number
+        following = self.next_turn[turn_number]
+        if following == -1:
+            return
+
+        if self.active_count == 1:
+            self.first_active = -1
+        else:
+            previous = self.previous_turn[turn_number]
+            self.next_turn[previous] = following
+            self.previous_turn[following] = previous
+            if self.turn == turn_number:
+                self.turn = following
+            if self.first_active == turn_number:
+                self.first_active = following
+        self.next_turn[turn_number] = self.previous_turn[turn_number] = -1
+        self.active_count -= 1
+
+        if self.clear_deceased:
+            self.clear_square(character)
+
+    def clear_square(self, character):
+        """
+        Empties the square of the given deceased character, so that others can move into it.
+        """
+        if self.occupants[character.get_index()] is character:
+            self.occupants[character.get_index()] = None
+            self.character_changed(character)
+
+    def set_clear_deceased(self, clear):
+        """
+        Chooses whether deceased characters keep their squares. By default they stay where they died and block
+        the square; when cleared, they are removed from the grid (the squares of the characters deceased so far
+        are cleared right away) and the living can move into their squares.
+
+        Parameter clear is True to clear the squares of the deceased: boolean
+        """
+        self.clear_deceased = clear
+        if clear:
+            for character in self.characters:
+                if character.get_state() == State.DECEASED:
+                    self.clear_square(character)
+
+    def get_active_count(self):
+        """
+        Returns the number of characters in the active schedule, i.e. the characters that are not deceased: int
+        """
+        return self.active_count
+
     def get_square(self, coordinates):
         """
         Parameter coordinates is a location in the world: Coordinates
         Returns the square that is located at the given location. If the given coordinates point outside the world,
         this method returns a square that contains a wall and is not located in any simulation world: Square
+
+        The squares only refer to the square arrays, so each square is created once, when it is first asked for.
+        """
+        index = self.get_index(coordinates.get_x(), coordinates.get_y())
+        if index < 0:
+            return SimulationWorld.OUTSIDE
+        square = self.squares.get(index)
+        if square is None:
+            square = GridSquare(self, index)
+            self.squares[index] = square
+        return square
+
+    def get_index(self, x, y):
+        """
+        Returns the index of the square at the given coordinates in the flat square arrays, or -1 if the
+        coordinates point outside the world: int
+        """
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return (y + 1) * self.row_length + x + 1
+        else:
+            return -1
+
+    def get_x(self, index):
+        """
+        Returns the x coordinate of the square with the given index: int
+        """
+        return index % self.row_length - 1
+
+    def get_y(self, index):
+        """
+        Returns the y coordinate of the square with the given index: int
+        """
+        return index // self.row_length - 1
+
+    def get_coordinates(self, index):
+        """
+        Returns the coordinates of the square with the given index: Coordinates
+        """
+        return Coordinates(index % self.row_length - 1, index // self.row_length - 1)
+
+    def get_neighbour_index(self, index, direction):
+        """
+        Returns the index of the square next to the square with the given index, in the given direction.
+        The neighbours of the squares at the edges of the world are the wall squares around it: int
+        """
+        return index + self.steps[direction]
+
+    def get_character_at(self, index):
+        """
+        Returns the character in the square with the given index, or None if the square is empty or outside
+        the world: Character
+        """
+        if index < 0:
+            return None
+        return self.occupants[index]
+
+    def is_wall_at(self, index):
+        """
+        Returns a boolean value stating whether the square with the given index is a wall. Squares outside the
+        world (index -1) are walls: boolean
+        """
+        return index < 0 or self.walls[index] == 1
+
+    def is_free(self, index):
+        """
+        Returns a boolean value stating whether a character can move into the square with the given index,
+        i.e. whether the square is inside the world, empty and not a wall: boolean
+        """
+        return index >= 0 and self.occupants[index] is None and self.walls[index] == 0
+
+    def add_wall(self, coordinates):
+        """
+        Turns the square at the given coordinates into a wall, if the square is inside the world and empty.
+
+        Parameter coordinates is the location of the wall: Coordinates
+        Returns a boolean value indicating if the operation succeeded: boolean
+        """
+        index = self.get_index(coordinates.get_x(), coordinates.get_y())
+        if index < 0 or self.occupants[index] is not None:
+            return False
+        self.walls[index] = 1
+        return True
+
+    def move_character(self, character, from_index, to_index):
+        """
+        Moves the given character from one square to another in the square arrays. Note! This method is
+        supposed to be used from Character.move, which checks that the target square is free.
+        """
+        self.occupants[from_index] = None
+        self.occupants[to_index] = character
+        if self.changed_characters is not None:
+            self.changed_characters.add(character)
+
+    def get_nearest_characters(self, location, k=1):
+        """
+        Finds the k characters closest to the given location. The squares around the location are examined in
+        expanding square rings, so only the neighbourhood of the location is searched instead of the whole
+        population. A ring at distance r can only contain characters that are at least r squares away, so the
+        search stops as soon as the k nearest characters found so far are closer than the next ring.
+        A character located exactly at the given location is not included.
+
+        Parameter location is the point the distances are measured from: Coordinates
+
+        Parameter k is the number of characters searched: int
+
+        Returns the nearest characters, closest first (fewer than k if the world does not have enough): list
+        """
+        x = location.get_x()
+        y = location.get_y()
+        width = self.get_width()
+        height = self.get_height()
+        max_ring = max(x, width - 1 - x, y, height - 1 - y)
+        found = []  # gatherer of (squared distance, character) pairs
+
+        for ring in range(1, max_ring + 1):  # stepper
+            ring_squares = [(dx, -ring) for dx in range(-ring, ring + 1)]
+            ring_squares += [(dx, ring) for dx in range(-ring, ring + 1)]
+            ring_squares += [(-ring, dy) for dy in range(-ring + 1, ring)]
+            ring_squares += [(ring, dy) for dy in range(-ring + 1, ring)]
+
+            for dx, dy in ring_squares:
+                square_x = x + dx
+                square_y = y + dy
+                if 0 <= square_x < width and 0 <= square_y < height:
+                    character = self.occupants[(square_y + 1) * self.row_length + square_x + 1]
+                    if character is not None:
+                        found.append((dx * dx + dy * dy, character))
+
+            if len(found) >= k:
+                found.sort(key=lambda pair: pair[0])
+                if found[k - 1][0] <= (ring + 1) * (ring + 1):
+                    break
+
+        found.sort(key=lambda pair: pair[0])
+        return [character for distance, character in found[:k]]
+
+    def get_nearest_character(self, location):
         """
-        if self.contains(coordinates):
-            return self.squares[coordinates.get_x()][coordinates.get_y()]
+        Returns the character closest to the given location, or None if there are no other characters in the
+        world: Character
+
+        See get_nearest_characters()
+        """
+        nearest = self.get_nearest_characters(location, 1)
+        if nearest:
+            return nearest[0]
         else:
-            return Square(True)
+            return None
 
     def get_number_of_characters(self):
         """
@@ -114,11 +639,11 @@ class SimulationWorld:
     def get_next_character(self):
         """
         Returns the character to act next in this world's round-robin turn system, or None if there aren't any
-        characters in the world: Character
+        characters in the world that are still alive: Character
 
         See next_character_turn()
         """
-        if self.get_number_of_characters() < 1:
+        if self.active_count < 1:
             return None
         else:
             return self.characters[self.turn]
@@ -134,68 +659,144 @@ class SimulationWorld:
         was reached. That is to say: the character which was added first,
         moves first, followed by the one that was added second, etc.,
         until all characters have moved and the cycle starts over.
-        If there are no characters in the world, the method does nothing.
+        Deceased characters no longer take turns, so they are skipped.
+        If there are no living characters in the world, the method does nothing.
 
         See get_next_character()
         """
         current = self.get_next_character()
-        if current is not None:
-            self.turn = (self.turn + 1) % self.get_number_of_characters()
-            current.take_turn()
-
-        if current.infected:
-            for char in self.get_characters():
-                if 0 < current.calculate_distance(char) <= 1.5:
-                    if char.susceptible and char.get_age() == 1:
-                        if random.random() <= 0.25:    # the infection rate for young people:
-                            char.infect()
-                            new_brain = Spreader(char)
-                            char.set_brain(new_brain)
-                            char.brain.disease_length = current.brain.get_disease_length()
-
-                    elif char.susceptible and char.get_age() == 2:
-                        if random.random() <= 0.5:    # the infection rate for adults:
-                            char.infect()
-                            new_brain = Spreader(char)
-                            char.set_brain(new_brain)
-                            char.brain.disease_length = current.brain.get_disease_length()
-
-                    elif char.susceptible and char.get_age() == 3:
-                        if random.random() <= 0.75:    # the infection rate for elderly people:
-                            char.infect()
-                            new_brain = Spreader(char)
-                            char.set_brain(new_brain)
-                            char.brain.disease_length = current.brain.get_disease_length()
-
-            duration = current.brain.get_duration()
-            average_length = current.brain.get_disease_length()
+        if current is None:
+            return
+
+        self.turn = self.next_turn[self.turn]
+        if self.profiler is not None:
+            self.profile_character_turn(current)
+            return
+
+        current.take_turn()
+        if current.state == State.INFECTED:
+            self.spread_infection(current, self.get_contacts(current))
+            self.end_infection_turn(current)
+
+    def profile_character_turn(self, current):
+        """
+        Does the same as the rest of next_character_turn, but reports the time of each phase to the profiler,
+        under the name of the brain the character had when its turn started ("Deceased" if it had none).
+
+        See set_profiler()
+        """
+        profiler = self.profiler
+        clock = profiler.clock
+        brain_type = type(current.brain).__name__ if current.brain is not None else "Deceased"
+
+        start = clock()
+        current.take_turn()
+        end = clock()
+        profiler.add("movement", brain_type, end - start)
+
+        if current.state == State.INFECTED:
+            start = end
+            contacts = self.get_contacts(current)
+            end = clock()
+            profiler.add("contacts", brain_type, end - start)
+
+            start = end
+            self.spread_infection(current, contacts)
+            end = clock()
+            profiler.add("infection", brain_type, end - start)
+
+            start = end
+            self.end_infection_turn(current)
+            profiler.add("outcome", brain_type, clock() - start)
+
+    def spread_infection(self, current, contacts):
+        """
+        Lets the given spreader try to infect the susceptible characters among its contacts, with the rates of
+        the world's transmission table (see set_transmission).
+
+        Parameter current is the spreader whose turn it is: Character
+
+        Parameter contacts are the characters near it, see get_contacts(): list of Character
+        """
+        rates = self.transmission.rates
+        contact_factors = self.transmission.contact_factors if self.transmission.has_contact_factors() else None
+        for char in contacts:
+            if char.state == State.SUSCEPTIBLE and char.age in rates:
+                rate = rates[char.age]
+                if contact_factors is not None:
+                    squared_distance = ((self.get_x(char.index) - self.get_x(current.index)) ** 2
+                                        + (self.get_y(char.index) - self.get_y(current.index)) ** 2)
+                    rate *= contact_factors.get(squared_distance, 1)
+                if self.random.random() <= rate:
+                    self.infect_contact(current, char)
+
+    def infect_contact(self, current, char):
+        """
+        Infects the given character, who gets the disease length of the spreader who infected it.
+
+        Parameter current is the spreader whose turn it is: Character
+
+        Parameter char is the susceptible character it infects: Character
+        """
+        char.infect()
+        char.set_brain(SPREADER)
+        char.disease_length = current.get_disease_length()
+        if self.event_log is not None:
+            self.log_event(current.turn_number, char, events.INFECTION)
+
+    def end_infection_turn(self, current):
+        """
+        Decides whether the given spreader recovers, dies or stays infected at the end of its turn.
+
+        Parameter current is the spreader whose turn it is: Character
+        """
+        if self.scheduled_outcomes:
+            if current.outcome == 0:
+                self.schedule_outcome(current)
+            if current.duration < current.outcome_duration:
+                return
+            outcome = current.outcome
+        else:
+            duration = current.get_duration()
+            average_length = current.get_disease_length()
 
             # the approximation for the coefficient that scales the probability of staying infected
             coefficient = (1 - 0.5 ** (1/(average_length+1))) / 0.5
-            if random.random() < (1-self.mortality_rate)*coefficient*(duration/average_length):  # the given infection rate:
-                current.cure()
-                new_brain = Recovered(current, 1)
-                current.set_brain(new_brain)
+            if self.random.random() < (1-self.mortality_rate)*coefficient*(duration/average_length):  # the given infection rate:
+                outcome = RECOVERY
+            elif self.random.random() < self.mortality_rate*coefficient*(duration/average_length):
+                outcome = DEATH
+            else:
+                return
 
-            elif random.random() < self.mortality_rate*coefficient*(duration/average_length):
-                current.eliminate()
+        if outcome == RECOVERY:
+            current.cure()
+            current.set_brain(RECOVERED)
+            if self.event_log is not None:
+                self.log_event(-1, current, events.RECOVERY)
+        else:
+            current.eliminate()
+            if self.event_log is not None:
+                self.log_event(-1, current, events.DEATH)
 
     def next_full_turn(self):
         """
         Lets each character take its next turn. That is, calls the next_character_turn
-        a number of times equal to the number of characters in the world.
+        a number of times equal to the number of living characters in the world.
+        A character can only die during its own turn, so everyone alive at the start takes exactly one turn.
         """
-        counter = 0
-        for char in self.get_characters():
-            if char.infected:
-                counter = 1
-        if counter == 0:
+        if self.state_counts[State.INFECTED][0] == 0:
             self.end = True
             return False
 
-        for count in range(self.get_number_of_characters()):      # stepper
+        for count in range(self.active_count):      # stepper
             self.next_character_turn()
 
+        self.full_turn_count += 1
+        if self.profiler is not None:
+            self.profiler.end_turn(self.full_turn_count)
+        if self.recorder is not None:
+            self.recorder.record(self)
         return True
 
     def contains(self, coordinates):
@@ -214,106 +815,64 @@ class SimulationWorld:
         """
         return self.characters[:]
 
-    def get_len_age_groups(self):
+    def get_summary(self):
         """
-        returns the sizes of each age group
+        Returns the summary of the simulation, as shown at the end of a run. A run stopped before the end (for
+        example by a turn limit) is summed up as far as it got, and its current spreaders are counted as
+        infected: list of strings
         """
-        young = 0
-        adults = 0
-        elderly = 0
+        young, adults, elderly = self.get_len_age_groups()
+        number_of_spreaders = self.get_len_spreaders()[0]
+        number_of_susceptible = self.get_len_susceptible()[0]
+        number_of_recovered, rec_young, rec_adults, rec_elderly = self.get_len_recovered()
+        number_of_deceased, dec_young, dec_adults, dec_elderly = self.get_len_deceased()
+        total = number_of_deceased + number_of_susceptible + number_of_recovered + number_of_spreaders
+        number_of_infected = number_of_deceased + number_of_recovered + number_of_spreaders
+        share = max(number_of_infected, 1)
 
-        for character in self.get_characters():
-            if character.age == 1:
-                young += 1
-            elif character.age == 2:
-                adults += 1
-            else:
-                elderly += 1
+        if self.is_end():
+            status = [f"The simulation is over. There are no more infected people in the population."]
+        else:
+            status = [f"The simulation was stopped after {self.get_full_turn_count()} full turns.",
+                      f"{number_of_spreaders} people are still infected."]
+
+        return [
+            f"Age group distribution:",
+            f"{young} young people, {adults} adults, {elderly} elderly people\n",
+            *status,
+            f"Out of {total} people, {number_of_infected} got infected.\n",
+            f"{round((number_of_recovered/share)*100)}% of the infected got recovered,",
+            f"{rec_young} of them young, {rec_adults} adults and {rec_elderly} elderly people.\n",
+            f"{round((number_of_deceased/share)*100)}% of the infected got deceased,",
+            f"{dec_young} of them young, {dec_adults} adults and {dec_elderly} elderly people.\n"
+            ]
 
-        return young, adults, elderly
+    def get_len_age_groups(self):
+        """
+        returns the sizes of each age group
+        """
+        return self.age_counts[1], self.age_counts[2], self.age_counts[3]
 
     def get_len_spreaders(self):
         """
         returns the current number of spreaders in the population
         """
-        count = 0
-        young = 0
-        adults = 0
-        elderly = 0
-
-        for character in self.get_characters():
-            if character.infected:
-                count += 1
-                if character.get_age() == 1:
-                    young += 1
-                elif character.get_age() == 2:
-                    adults += 1
-                else:
-                    elderly += 1
-
-        return count, young, adults, elderly
+        return tuple(self.state_counts[State.INFECTED])
 
     def get_len_susceptible(self):
         """
         returns the current number of susceptible people in the population
         """
-        count = 0
-        young = 0
-        adults = 0
-        elderly = 0
-
-        for character in self.get_characters():
-            if character.susceptible:
-                count += 1
-                if character.get_age() == 1:
-                    young += 1
-                elif character.get_age() == 2:
-                    adults += 1
-                else:
-                    elderly += 1
-
-        return count, young, adults, elderly
+        return tuple(self.state_counts[State.SUSCEPTIBLE])
 
     def get_len_recovered(self):
         """
         returns the current number of recovered in the population
         """
-        count = 0
-        young = 0
-        adults = 0
-        elderly = 0
-
-        for character in self.get_characters():
-            if character.recovered:
-                count += 1
-                if character.get_age() == 1:
-                    young += 1
-                elif character.get_age() == 2:
-                    adults += 1
-                else:
-                    elderly += 1
-
-        return count, young, adults, elderly
+        return tuple(self.state_counts[State.RECOVERED])
 
     def get_len_deceased(self):
         """
         returns the current number of deceased in the population
         """
-        count = 0
-        young = 0
-        adults = 0
-        elderly = 0
-
-        for character in self.get_characters():
-            if character.eliminated:
-                count += 1
-                if character.get_age() == 1:
-                    young += 1
-                elif character.get_age() == 2:
-                    adults += 1
-                else:
-                    elderly += 1
-
-        return count, young, adults, elderly
-
-
+        return tuple(self.state_counts[State.DECEASED])
@@ -33,12 +33,12 @@ class Square:
     def set_character(self, character):
         """
         Marks the square as containing a character, if possible.
-        If the square was not empty, the method fails to do anything.
+        If the square was not empty or is a wall, the method fails to do anything.
 
         Parameter character is the char to be placed in this square: Character
         Returns a boolean value indicating if the operation succeeded: boolean
         """
-        if self.is_empty():
+        if self.is_empty() and not self.is_square_wall():
             self.character = character
             return True
         else:
@@ -52,3 +52,41 @@ class Square:
         removed_character = self.get_character()
         self.character = None
         return removed_character
+
+
+class GridSquare(Square):
+    """
+    The class GridSquare represents a square of a simulation world grid. The world keeps the contents of all
+    its squares in flat arrays (see SimulationWorld), and a GridSquare only refers to one position in them,
+    so it can be created when needed and changes made through it are seen by the world.
+    """
+
+    def __init__(self, world, index):
+        """
+        Parameter world is the world that the square belongs to: SimulationWorld
+
+        Parameter index is the position of the square in the world's arrays: int
+        """
+        self.world = world      # fixed value
+        self.index = index      # fixed value
+
+    def get_character(self):
+        return self.world.occupants[self.index]
+
+    def is_empty(self):
+        return self.world.occupants[self.index] is None
+
+    def is_square_wall(self):
+        return self.world.walls[self.index] == 1
+
+    def set_character(self, character):
+        if self.is_empty() and not self.is_square_wall():
+            self.world.occupants[self.index] = character
+            return True
+        else:
+            return False
+
+    def remove_character(self):
+        removed_character = self.get_character()
+        self.world.occupants[self.index] = None
+        return removed_character
@@ -0,0 +1,30 @@
+class State:
+
+    """
+    The class State lists the disease states a character can be in. Every character is in exactly
+    one of these states at a time, see Character.get_state().
+    """
+
+    SUSCEPTIBLE = 0
+    INFECTED = 1
+    RECOVERED = 2
+    DECEASED = 3
+
+    @staticmethod
+    def get_values():
+        """
+        Returns: list of all the states in the order the disease progresses
+        """
+        return [State.SUSCEPTIBLE, State.INFECTED, State.RECOVERED, State.DECEASED]
+
+    @staticmethod
+    def get_age_group(age):
+        """
+        Returns the age group the given age is counted in: young (1), adults (2) or elderly (3).
+        Characters without a known age are counted as elderly, as in the population statistics.
+
+        Returns: 1, 2 or 3
+        """
+        if age == 1 or age == 2:
+            return age
+        return 3
@@ -0,0 +1,273 @@
+import argparse
+import csv
+import glob
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ensemble import derive_seed, run_replicate
+
+"""
+    Runs a grid of scenarios, each with a number of replicates, and keeps the results in a local SQLite store.
+    Every run is identified by its parameters, its seed and the version of the simulation code, so a sweep only
+    computes the runs that are not in the store yet: running the same sweep again, or a larger sweep that
+    contains it, or a sweep that was interrupted, only computes what is missing.
+
+    The version of the code is a hash of the source files of the simulation (every .py file here except the ones
+    in TOOL_FILES), so changing the simulation makes the old results count as missing.
+
+    The replicates of every scenario use the same seeds, derived from the base seed as in ensemble.py.
+
+    Usage: python sweep.py --population 1000 2000 --spreaders 10 --duration 7 14 --mortality 5 20 --replicates 10
+           --store sweep.sqlite --output results.csv
+"""
+
+PARAMETERS = ("population_size", "number_of_spreaders", "duration", "mortality_rate")
+
+# the files that do not change the results of a simulation
+TOOL_FILES = {"benchmark.py", "character_graphics_item.py", "ensemble.py", "gui.py", "main.py",
+              "simulation_worker.py", "sweep.py", "test.py", "user_input.py", "world_raster_item.py"}
+
+# the columns of a result row
+COLUMNS = (PARAMETERS + ("engine", "max_turns", "replicate", "seed", "turns", "spreaders", "susceptible",
+                         "recovered", "deceased", "peak_spreaders", "peak_turn"))
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        code_version TEXT NOT NULL,
+        population_size INTEGER NOT NULL,
+        number_of_spreaders INTEGER NOT NULL,
+        duration INTEGER NOT NULL,
+        mortality_rate INTEGER NOT NULL,
+        engine TEXT NOT NULL,
+        max_turns INTEGER,
+        replicate INTEGER NOT NULL,
+        seed TEXT NOT NULL,
+        turns INTEGER NOT NULL,
+        spreaders INTEGER NOT NULL,
+        susceptible INTEGER NOT NULL,
+        recovered INTEGER NOT NULL,
+        deceased INTEGER NOT NULL,
+        peak_spreaders INTEGER NOT NULL,
+        peak_turn INTEGER NOT NULL,
+        counts TEXT NOT NULL
+    )
+"""
+
+
+def get_code_version(directory=None):
+    """
+    Returns a hash of the source files of the simulation: str
+
+    Parameter directory is the directory of the source files, or None for the directory of this file: str
+    """
+    if directory is None:
+        directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for file_name in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        if os.path.basename(file_name) in TOOL_FILES:
+            continue
+        digest.update(os.path.basename(file_name).encode())
+        with open(file_name, "rb") as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()[:16]
+
+
+def expand_grid(grid):
+    """
+    Returns every combination of the values of the grid as a scenario (see ensemble.py): list of dict
+
+    Parameter grid maps each of PARAMETERS to the list of its values: dict
+    """
+    values = [grid[parameter] for parameter in PARAMETERS]
+    return [dict(zip(PARAMETERS, combination)) for combination in itertools.product(*values)]
+
+
+def get_key(scenario, seed, engine, max_turns, code_version):
+    """
+    Returns the key a run is stored under: a hash of everything that determines its result: str
+    """
+    identity = {"scenario": {parameter: scenario[parameter] for parameter in PARAMETERS}, "seed": seed,
+                "engine": engine, "max_turns": max_turns, "code_version": code_version}
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode()).hexdigest()
+
+
+def get_row(scenario, engine, max_turns, replicate, seed, counts):
+    """
+    Summarises the counts of one run (see batch.run_world()) as a result row of COLUMNS: dict
+    """
+    peak_turn, peak_spreaders = max(((row[0], row[1]) for row in counts), key=lambda item: item[1])
+    turn, spreaders, susceptible, recovered, deceased = counts[-1]
+    row = {parameter: scenario[parameter] for parameter in PARAMETERS}
+    row.update({"engine": engine, "max_turns": max_turns, "replicate": replicate, "seed": seed, "turns": turn,
+                "spreaders": spreaders, "susceptible": susceptible, "recovered": recovered, "deceased": deceased,
+                "peak_spreaders": peak_spreaders, "peak_turn": peak_turn})
+    return row
+
+
+class ResultStore:
+
+    def __init__(self, file_name):
+        """
+        Opens the store in the given SQLite file, creating it if needed.
+        """
+        self.connection = sqlite3.connect(file_name)
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def get_keys(self, keys):
+        """
+        Returns the ones of the given keys that are in the store: set of str
+        """
+        found = set()
+        keys = list(keys)
+        for start in range(0, len(keys), 500):  # stepper, in batches below the SQLite parameter limit
+            batch = keys[start:start + 500]
+            query = f"SELECT key FROM results WHERE key IN ({', '.join('?' * len(batch))})"
+            found.update(key for (key,) in self.connection.execute(query, batch))
+        return found
+
+    def add(self, key, code_version, row, counts):
+        """
+        Stores the result of one run. The result is committed right away, so it is kept even if the sweep fails
+        later.
+        """
+        names = ("key", "code_version") + COLUMNS + ("counts",)
+        values = [key, code_version] + [row[column] for column in COLUMNS] + [json.dumps(counts)]
+        values[2 + COLUMNS.index("seed")] = str(row["seed"])   # the seeds do not fit in SQLite integers
+        self.connection.execute(f"INSERT OR REPLACE INTO results ({', '.join(names)}) "
+                                f"VALUES ({', '.join('?' * len(names))})", values)
+        self.connection.commit()
+
+    def get_rows(self, keys):
+        """
+        Returns the result rows stored under the given keys, in the order of the keys: list of dict
+        """
+        rows = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):  # stepper
+            batch = keys[start:start + 500]
+            query = (f"SELECT key, {', '.join(COLUMNS)} FROM results "
+                     f"WHERE key IN ({', '.join('?' * len(batch))})")
+            for values in self.connection.execute(query, batch):
+                row = dict(zip(COLUMNS, values[1:]))
+                row["seed"] = int(row["seed"])
+                rows[values[0]] = row
+        return [rows[key] for key in keys if key in rows]
+
+    def get_counts(self, key):
+        """
+        Returns the counts of each turn of the run stored under the given key, or None: list of lists
+        """
+        result = self.connection.execute("SELECT counts FROM results WHERE key = ?", (key,)).fetchone()
+        return None if result is None else json.loads(result[0])
+
+    def close(self):
+        self.connection.close()
+
+
+def plan_sweep(grid, replicates, base_seed=0, max_turns=None, engine="object", code_version=None):
+    """
+    Lists the runs of a sweep.
+
+    Returns a list of tuples (key, scenario, replicate, seed) in the order of the scenarios and replicates: list
+    """
+    if code_version is None:
+        code_version = get_code_version()
+    jobs = []
+    for scenario in expand_grid(grid):
+        for replicate in range(replicates):  # stepper
+            seed = derive_seed(base_seed, replicate)
+            jobs.append((get_key(scenario, seed, engine, max_turns, code_version), scenario, replicate, seed))
+    return jobs
+
+
+def run_sweep(grid, replicates, store_file, base_seed=0, workers=None, max_turns=None, engine="object",
+              report=None):
+    """
+    Runs the runs of a sweep that are not in the store yet on a process pool, stores their results as soon as
+    they finish and returns the results of the whole sweep. A run that fails is reported and left missing, so
+    that running the sweep again tries it again.
+
+    Parameter grid maps each of PARAMETERS to the list of its values: dict
+
+    Parameter replicates is the number of replicates of each scenario: int
+
+    Parameter store_file is the SQLite file of the result store: str
+
+    Parameter base_seed, workers, max_turns and engine are as in ensemble.iter_ensemble()
+
+    Parameter report is called with a message about every finished or failed run, or None: function
+
+    Returns: A tuple containing the result rows (dicts of COLUMNS) of the runs in the store, in the order of the
+    scenarios and replicates, and the number of runs computed now.
+    """
+    code_version = get_code_version()
+    jobs = plan_sweep(grid, replicates, base_seed, max_turns, engine, code_version)
+    store = ResultStore(store_file)
+    try:
+        stored = store.get_keys(key for key, scenario, replicate, seed in jobs)
+        missing = [job for job in jobs if job[0] not in stored]
+        computed = 0
+
+        if missing:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(run_replicate, scenario, seed, max_turns, engine):
+                           (key, scenario, replicate, seed) for key, scenario, replicate, seed in missing}
+                for future in as_completed(futures):
+                    key, scenario, replicate, seed = futures[future]
+                    try:
+                        counts = future.result()
+                    except Exception as error:
+                        if report is not None:
+                            report(f"FAILED {scenario} replicate {replicate}: {error}")
+                        continue
+                    store.add(key, code_version, get_row(scenario, engine, max_turns, replicate, seed, counts),
+                              [list(row) for row in counts])
+                    computed += 1
+                    if report is not None:
+                        report(f"{computed}/{len(missing)} {scenario} replicate {replicate}")
+
+        return store.get_rows(key for key, scenario, replicate, seed in jobs), computed
+    finally:
+        store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a grid of scenarios and caches the results.")
+    parser.add_argument("--population", type=int, nargs="+", required=True, help="the sizes of the population")
+    parser.add_argument("--spreaders", type=int, nargs="+", required=True, help="the numbers of spreaders")
+    parser.add_argument("--duration", type=int, nargs="+", required=True, help="the durations of the disease")
+    parser.add_argument("--mortality", type=int, nargs="+", required=True, help="the mortality rates (%%)")
+    parser.add_argument("--replicates", type=int, default=10, help="the number of replicates of each scenario")
+    parser.add_argument("--seed", type=int, default=0, help="the seed the replicate seeds are derived from")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("--max-turns", type=int, default=None, help="stop each run after this many turns")
+    parser.add_argument("--engine", choices=["object", "array"], default="object",
+                        help="the simulation engine, array needs NumPy")
+    parser.add_argument("--store", default="sweep.sqlite", help="the SQLite file the results are kept in")
+    parser.add_argument("--output", default=None, help="write the results in this CSV file instead of the output")
+    arguments = parser.parse_args()
+
+    grid = {"population_size": arguments.population, "number_of_spreaders": arguments.spreaders,
+            "duration": arguments.duration, "mortality_rate": arguments.mortality}
+    rows, computed = run_sweep(grid, arguments.replicates, arguments.store, arguments.seed, arguments.workers,
+                               arguments.max_turns, arguments.engine,
+                               lambda message: print(message, file=sys.stderr, flush=True))
+    print(f"{computed} runs computed, {len(rows) - computed} found in {arguments.store}", file=sys.stderr)
+
+    output = open(arguments.output, "w", newline="") if arguments.output else sys.stdout
+    writer = csv.DictWriter(output, COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    if output is not sys.stdout:
+        output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,40 @@
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import sys
+import tempfile
 import unittest
+import unittest.mock
 
 from simulation_world import SimulationWorld
 from character import Character
 from coordinates import Coordinates
 from direction import Direction
-from spreader import Spreader
+from state import State
+from spreader import SPREADER
+from susceptible import SUSCEPTIBLE
+from recovered import RECOVERED
+from batch import main as batch_main, run_simulation, run_world, COLUMNS
+from checkpoint import load_world, save_world
+from sweep import ResultStore, get_code_version, plan_sweep, run_sweep
+from events import DEATH, INFECTION, RECOVERY, EventLog, EventReader
+from world_builder import create_world, create_world_from_population
+from population import PopulationTemplate
+from ensemble import aggregate_curves, derive_seed, run_ensemble, run_replicate
+from benchmark import benchmark, compare
+from profiler import TurnProfiler
+from recorder import TimeSeriesRecorder, read_npy
+from transmission import TransmissionTable, parse_table
+from outcomes import RECOVERY as RECOVERS, DEATH as DIES, get_outcome_table
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+HAS_QT = importlib.util.find_spec("PyQt6") is not None   # not imported here, the batch runs must not need it
 
 
 class Test(unittest.TestCase):
@@ -14,15 +44,15 @@ class Test(unittest.TestCase):
 
         first_location = Coordinates(4, 3)
         first_body = Character()
-        first_brain = Spreader(first_body)
-        first_body.set_brain(first_brain)
+        first_body.infect()
+        first_body.set_brain(SPREADER)
         self.test_world.add_character(first_body, first_location, Direction.EAST)
         self.first_body = first_body
 
         new_location = Coordinates(4, 4)
         new_body = Character()
-        new_brain = Spreader(new_body)
-        new_body.set_brain(new_brain)
+        new_body.infect()
+        new_body.set_brain(SPREADER)
         self.test_world.add_character(new_body, new_location, Direction.WEST)
         self.new_body = new_body
 
@@ -40,5 +70,755 @@ class Test(unittest.TestCase):
         self.assertEqual([self.first_body, self.new_body], self.test_world.get_characters())
 
 
+class TestContacts(unittest.TestCase):
+
+    def setUp(self):
+        self.test_world = SimulationWorld(5, 5)
+        self.spreader = Character()
+        self.spreader.infect()
+        self.spreader.set_brain(SPREADER)
+        self.test_world.add_character(self.spreader, Coordinates(2, 2), Direction.NORTH)
+
+        self.others = []
+        for x, y in [(1, 1), (2, 3), (4, 2), (0, 0)]:
+            body = Character()
+            body.set_brain(SUSCEPTIBLE)
+            self.test_world.add_character(body, Coordinates(x, y), Direction.NORTH)
+            self.others.append(body)
+
+    def test_contacts_within_radius(self):
+
+        self.assertEqual({self.others[0], self.others[1]}, set(self.test_world.get_contacts(self.spreader)),
+                         "only the characters within 1.5 squares should be contacts")
+
+    def test_contact_radius_stencil(self):
+
+        self.assertEqual(8, len(self.test_world.contact_offsets), "the default stencil is the 8 surrounding squares")
+        self.test_world.set_contact_radius(2)
+        self.assertEqual(12, len(self.test_world.contact_offsets))
+        self.assertIn(self.others[2], self.test_world.get_contacts(self.spreader))
+
+
+class TestSharedBrains(unittest.TestCase):
+
+    def test_recovered_characters_draw_from_the_world(self):
+
+        world = SimulationWorld(9, 9)
+        world.set_seed(4)
+        first = Character()
+        second = Character()
+        for body, x in ((first, 2), (second, 6)):
+            body.set_brain(RECOVERED)
+            world.add_character(body, Coordinates(x, 4), Direction.NORTH)
+        directions = [RECOVERED.get_random_direction(body) for body in (first, second, first, second)]
+
+        generator = random.Random(4)
+        self.assertEqual([generator.choice(Direction.get_values()) for count in range(4)], directions)
+
+    def test_infection_only_changes_the_brain(self):
+
+        world, size = create_world("Flu", 200, 5, 6, 10, seed=3)
+        run_world(world, 10)
+        brains = {character.get_brain() for character in world.get_characters()}
+        self.assertTrue(brains <= {None, SUSCEPTIBLE, SPREADER, RECOVERED})
+        for character in world.get_characters():
+            if character.is_infected():
+                self.assertEqual(6, character.get_disease_length())
+
+
+class TestCompactCharacter(unittest.TestCase):
+
+    def test_flags_follow_the_state(self):
+
+        body = Character()
+        self.assertFalse(hasattr(body, "__dict__"))
+        self.assertTrue(body.is_susceptible())
+        body.infect()
+        self.assertEqual((False, True, False), (body.susceptible, body.infected, body.recovered))
+        body.cure()
+        self.assertEqual(State.RECOVERED, body.get_state())
+        body.eliminate()
+        body.infect()
+        self.assertEqual((State.DECEASED, True, False), (body.get_state(), body.eliminated, body.infected))
+
+
+class TestTransmission(unittest.TestCase):
+
+    def setUp(self):
+        # a certain infection for side by side contacts and none for diagonal ones
+        self.transmission = TransmissionTable({1: 1.0}, {2: 0})
+        self.neighbours = [(x, y) for x in range(1, 4) for y in range(1, 4) if (x, y) != (2, 2)]
+
+    def test_rates_by_contact_type(self):
+
+        world = SimulationWorld(5, 5)
+        world.set_transmission(self.transmission)
+        spreader = Character()
+        spreader.infect()
+        spreader.set_brain(SPREADER)
+        world.add_character(spreader, Coordinates(2, 2), Direction.NORTH)
+        for x, y in self.neighbours:
+            body = Character()
+            body.age = 1
+            body.set_brain(SUSCEPTIBLE)
+            world.add_character(body, Coordinates(x, y), Direction.NORTH)
+
+        world.spread_infection(spreader, world.get_contacts(spreader))
+        self.assertEqual({(1, 2), (2, 1), (2, 3), (3, 2)},
+                         {(character.get_location().get_x(), character.get_location().get_y())
+                          for character in world.get_characters()[1:] if character.is_infected()})
+
+    @unittest.skipIf(numpy is None, "the array engine needs NumPy")
+    def test_array_engine_uses_the_same_table(self):
+
+        from array_world import ArrayWorld
+        world = ArrayWorld(5, 5, seed=1)
+        world.set_transmission(self.transmission)
+        x, y = zip(*([(2, 2)] + self.neighbours))
+        world.add_characters(x, y, [0] * 9, [1] * 9, [State.INFECTED] + [State.SUSCEPTIBLE] * 8)
+
+        infected = world.find_new_infections(numpy.array([0]))
+        x, y = world.get_coordinates(world.positions[infected])
+        self.assertEqual([(1, 2), (2, 1), (2, 3), (3, 2)], sorted(zip(x.tolist(), y.tolist())))
+
+    def test_table(self):
+
+        self.assertEqual([0.0, 0.25, 0.5, 0.75], TransmissionTable().get_rate_list())
+        self.assertEqual({1: 0.2, 4: 0.9}, parse_table("1=0.2, 4=0.9"))
+        self.assertEqual(0.45, TransmissionTable({4: 0.9}, {2: 0.5}).get_rate(4, 2))
+        self.assertRaises(ValueError, TransmissionTable, {1: 0.8}, {1: 1.5})
+        for age in (-1, 128, 200, 1.5):
+            self.assertRaises(ValueError, TransmissionTable, {age: 0.5})
+
+
+class TestOutcomes(unittest.TestCase):
+
+    def test_table_matches_the_draws_of_each_turn(self):
+
+        # draw the outcomes turn by turn like SimulationWorld.end_infection_turn and from the table
+        generator = random.Random(3)
+        coefficient = (1 - 0.5 ** (1 / 9)) / 0.5
+        drawn = []
+        for count in range(4000):  # stepper
+            duration = 0
+            outcome = None
+            while outcome is None:
+                duration += 1
+                if generator.random() < 0.7 * coefficient * duration / 8:
+                    outcome = RECOVERS
+                elif generator.random() < 0.3 * coefficient * duration / 8:
+                    outcome = DIES
+            drawn.append((duration, outcome))
+        table = get_outcome_table(8, 0.3)
+        sampled = [table.sample(generator.random()) for count in range(4000)]
+
+        for outcomes in (drawn, sampled):
+            self.assertAlmostEqual(9.03, sum(duration for duration, outcome in outcomes) / 4000, delta=0.3)
+            self.assertAlmostEqual(0.274, sum(outcome == DIES for duration, outcome in outcomes) / 4000, delta=0.03)
+        self.assertEqual(1.0, table.cumulative[-1])
+        self.assertTrue(all(table.sample(generator.random(), 5)[0] > 5 for count in range(100)))
+        self.assertEqual({RECOVERS}, set(get_outcome_table(8, 0).outcomes))
+
+    def test_scheduled_outcomes_end_the_epidemic(self):
+
+        world, size = create_world("Flu", 300, 5, 8, 30, seed=4)
+        world.set_scheduled_outcomes(True)
+        run_world(world)
+        self.assertEqual(0, world.get_len_spreaders()[0])
+        self.assertEqual(300, world.get_len_susceptible()[0] + world.get_len_recovered()[0]
+                         + world.get_len_deceased()[0])
+        self.assertGreater(world.get_len_deceased()[0], 0)
+
+    @unittest.skipIf(numpy is None, "the array engine needs NumPy")
+    def test_array_engine_applies_the_calendar(self):
+
+        from array_world import ArrayWorld
+        world, size = ArrayWorld.from_parameters("Flu", 300, 5, 8, 30, seed=4)
+        world.set_scheduled_outcomes(True)
+        due_turns = {turn: sum(len(characters) for characters, outcomes in entries)
+                     for turn, entries in world.calendar.items()}
+        self.assertEqual(5, sum(due_turns.values()))
+
+        world.next_full_turn()
+        self.assertEqual(5 - due_turns.get(1, 0), (world.states[:5] == State.INFECTED).sum())
+        run_world(world)
+        self.assertEqual({}, world.calendar)
+        self.assertEqual(0, world.get_len_spreaders()[0])
+        self.assertEqual(300, world.get_len_susceptible()[0] + world.get_len_recovered()[0]
+                         + world.get_len_deceased()[0])
+
+
+class TestGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.test_world = SimulationWorld(4, 3)
+        self.body = Character()
+        self.body.set_brain(SUSCEPTIBLE)
+        self.test_world.add_character(self.body, Coordinates(1, 2), Direction.EAST)
+
+    def test_outside_square_is_shared_wall(self):
+
+        outside = self.test_world.get_square(Coordinates(4, 0))
+        self.assertIs(outside, self.test_world.get_square(Coordinates(-1, 5)))
+        self.assertIs(self.test_world.get_square(Coordinates(1, 2)), self.test_world.get_square(Coordinates(1, 2)))
+        self.assertTrue(outside.is_square_wall())
+        self.assertFalse(outside.set_character(self.body))
+        self.assertTrue(outside.is_empty())
+
+    def test_flat_arrays(self):
+
+        index = self.test_world.get_index(1, 2)
+        self.assertEqual(-1, self.test_world.get_index(0, 3))
+        self.assertEqual(index, self.body.get_index())
+        self.assertIs(self.body, self.test_world.get_character_at(index))
+        self.assertEqual(Coordinates(1, 2), self.test_world.get_coordinates(index))
+        self.assertIs(self.body, self.test_world.get_square(Coordinates(1, 2)).get_character())
+        self.assertFalse(self.test_world.add_character(Character(), Coordinates(5, 5), Direction.EAST))
+
+    def test_neighbour_index(self):
+
+        index = self.test_world.get_index(1, 2)
+        self.assertEqual(self.test_world.get_index(1, 1), self.test_world.get_neighbour_index(index, Direction.NORTH))
+        self.assertEqual(self.test_world.get_index(0, 2), self.test_world.get_neighbour_index(index, Direction.WEST))
+        below = self.test_world.get_neighbour_index(index, Direction.SOUTH)
+        self.assertTrue(self.test_world.is_wall_at(below), "the squares around the world are walls")
+        self.assertFalse(self.test_world.is_free(below))
+        self.assertFalse(self.body.move(Direction.SOUTH))
+
+    def test_walls_block_movement(self):
+
+        self.assertTrue(self.test_world.add_wall(Coordinates(2, 2)))
+        self.assertTrue(self.test_world.get_square(Coordinates(2, 2)).is_square_wall())
+        self.assertFalse(self.body.move(Direction.EAST))
+        self.assertTrue(self.body.move(Direction.NORTH))
+        self.assertEqual('(1, 1)', str(self.body.get_location()))
+        self.assertTrue(self.test_world.get_square(Coordinates(1, 2)).is_empty())
+
+
+class TestChangeTracking(unittest.TestCase):
+
+    def setUp(self):
+        self.test_world = SimulationWorld(5, 5)
+        self.bodies = []
+        for x in range(3):
+            body = Character()
+            body.set_brain(SUSCEPTIBLE)
+            self.test_world.add_character(body, Coordinates(x, 0), Direction.SOUTH)
+            self.bodies.append(body)
+
+    def test_nothing_recorded_by_default(self):
+
+        self.bodies[0].move(Direction.SOUTH)
+        self.assertEqual(set(), self.test_world.take_changed_characters())
+
+    def test_changed_characters(self):
+
+        self.test_world.track_changes()
+        self.bodies[0].move(Direction.SOUTH)
+        self.bodies[1].spin(Direction.EAST)
+        self.bodies[2].spin(Direction.SOUTH)
+        self.assertEqual({self.bodies[0], self.bodies[1]}, self.test_world.take_changed_characters())
+        self.assertEqual(set(), self.test_world.take_changed_characters())
+        self.bodies[2].infect()
+        self.assertEqual({self.bodies[2]}, self.test_world.take_changed_characters())
+
+
+class TestActiveSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_world = SimulationWorld(5, 5)
+        self.bodies = []
+        for x in range(4):
+            body = Character()
+            body.set_brain(SUSCEPTIBLE)
+            self.test_world.add_character(body, Coordinates(x, 0), Direction.SOUTH)
+            self.bodies.append(body)
+
+    def get_turn_order(self, turns):
+        order = []
+        for count in range(turns):  # stepper
+            order.append(self.test_world.get_next_character().turn_number)
+            self.test_world.next_character_turn()
+        return order
+
+    def test_deceased_are_skipped(self):
+
+        self.test_world.next_character_turn()
+        self.bodies[1].eliminate()
+        self.bodies[3].eliminate()
+        self.assertEqual(2, self.test_world.get_active_count())
+        self.assertEqual([2, 0, 2, 0], self.get_turn_order(4))
+
+        late_body = Character()
+        late_body.set_brain(SUSCEPTIBLE)
+        self.test_world.add_character(late_body, Coordinates(4, 4), Direction.NORTH)
+        self.assertEqual([2, 4, 0, 2], self.get_turn_order(4))
+
+        for body in self.bodies + [late_body]:
+            body.eliminate()
+        self.assertEqual(0, self.test_world.get_active_count())
+        self.assertIsNone(self.test_world.get_next_character())
+        self.assertFalse(self.test_world.is_free(self.bodies[1].get_index()), "the deceased keep their squares")
+
+    def test_clear_deceased(self):
+
+        self.bodies[0].eliminate()
+        self.test_world.set_clear_deceased(True)
+        self.assertTrue(self.test_world.is_free(self.bodies[0].get_index()))
+        self.bodies[1].eliminate()
+        self.assertIsNone(self.test_world.get_character_at(self.bodies[1].get_index()))
+        self.assertEqual([2, 3, 2], self.get_turn_order(3))
+
+
+class TestPopulationBuilder(unittest.TestCase):
+
+    def test_everyone_gets_own_square(self):
+
+        world, size = create_world("flu", 400, 7, 10, 5, seed=8)
+        self.assertEqual(400, world.get_number_of_characters())
+        self.assertEqual(400, len({char.get_index() for char in world.get_characters()}))
+        self.assertEqual(400, sum(1 for occupant in world.occupants if occupant is not None))
+        self.assertEqual(7, world.get_len_spreaders()[0])
+        self.assertEqual(400, sum(world.get_len_age_groups()))
+
+    def test_add_characters_rejects_taken_squares(self):
+
+        world = SimulationWorld(3, 3)
+        bodies = [Character(), Character()]
+        self.assertFalse(world.add_characters(bodies, [world.get_index(0, 0)] * 2, [Direction.NORTH] * 2))
+        self.assertFalse(world.add_characters(bodies, [world.get_index(0, 0), -1], [Direction.NORTH] * 2))
+        self.assertEqual(0, world.get_number_of_characters())
+        self.assertTrue(world.add_characters(bodies, [world.get_index(0, 0), world.get_index(2, 1)],
+                                             [Direction.NORTH, Direction.EAST]))
+        self.assertEqual('(2, 1)', str(bodies[1].get_location()))
+        self.assertEqual(Direction.EAST, bodies[1].get_facing())
+
+
+class TestNearestNeighbour(unittest.TestCase):
+
+    def setUp(self):
+        self.test_world = SimulationWorld(20, 15)
+        generator = random.Random(3)
+        locations = generator.sample([(x, y) for x in range(20) for y in range(15)], 40)
+        for x, y in locations:
+            body = Character()
+            body.set_brain(SUSCEPTIBLE)
+            self.test_world.add_character(body, Coordinates(x, y), Direction.NORTH)
+
+    def test_nearest_matches_full_scan(self):
+
+        for character in self.test_world.get_characters():
+            distances = sorted(character.calculate_distance(other) for other in self.test_world.get_characters()
+                               if other is not character)
+            nearest = self.test_world.get_nearest_characters(character.get_location(), 3)
+            self.assertEqual(distances[:3], [character.calculate_distance(other) for other in nearest])
+
+    def test_nearest_in_empty_world(self):
+
+        self.assertIsNone(SimulationWorld(4, 4).get_nearest_character(Coordinates(1, 1)))
+
+
+class TestStateCounters(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(7)
+        self.test_world = SimulationWorld(12, 12)
+        self.test_world.set_mortality_rate(30)
+        generator = random.Random(7)
+        locations = generator.sample([(x, y) for x in range(12) for y in range(12)], 50)
+        for number, (x, y) in enumerate(locations):
+            body = Character()
+            body.age = number % 3 + 1
+            if number < 5:
+                body.infect()
+                body.set_brain(SPREADER)
+                body.disease_length = 4
+            else:
+                body.set_brain(SUSCEPTIBLE)
+            self.test_world.add_character(body, Coordinates(x, y), Direction.NORTH)
+
+    def scan(self, flag):
+        characters = [char for char in self.test_world.get_characters() if getattr(char, flag)]
+        return (len(characters), sum(1 for char in characters if char.age == 1),
+                sum(1 for char in characters if char.age == 2), sum(1 for char in characters if char.age == 3))
+
+    def test_counters_match_population(self):
+
+        self.assertEqual((17, 17, 16), self.test_world.get_len_age_groups())
+        while self.test_world.next_full_turn():
+            self.assertEqual(self.scan('infected'), self.test_world.get_len_spreaders())
+            self.assertEqual(self.scan('susceptible'), self.test_world.get_len_susceptible())
+            self.assertEqual(self.scan('recovered'), self.test_world.get_len_recovered())
+            self.assertEqual(self.scan('eliminated'), self.test_world.get_len_deceased())
+        self.assertTrue(self.test_world.is_end())
+        self.assertEqual(0, self.test_world.get_len_spreaders()[0])
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_seeded_runs_repeat(self):
+
+        world, counts = run_simulation(200, 4, 6, 10, seed=11)
+        other_world, other_counts = run_simulation(200, 4, 6, 10, seed=11)
+        self.assertTrue(world.is_end())
+        self.assertEqual(counts, other_counts)
+        self.assertEqual(len(COLUMNS), len(counts[0]))
+        self.assertEqual((0, 4, 196, 0, 0), counts[0])
+        self.assertEqual(200, sum(counts[-1][1:]))
+        self.assertNotIn("PyQt6", sys.modules)
+
+    def test_max_turns(self):
+
+        world, counts = run_simulation(100, 10, 50, 0, seed=2, max_turns=3)
+        self.assertEqual(3, world.get_full_turn_count())
+        self.assertEqual([0, 1, 2, 3], [row[0] for row in counts])
+
+        spreaders, susceptible = world.get_len_spreaders()[0], world.get_len_susceptible()[0]
+        summary = world.get_summary()
+        self.assertIn("The simulation was stopped after 3 full turns.", summary)
+        self.assertIn(f"Out of 100 people, {100 - susceptible} got infected.\n", summary)
+        self.assertTrue(spreaders > 0)
+
+    def test_invalid_parameters(self):
+
+        self.assertRaises(ValueError, run_simulation, 5, 6, 10, 10)
+
+
+@unittest.skipIf(numpy is None, "the array engine needs NumPy")
+class TestArrayWorld(unittest.TestCase):
+
+    def test_population_is_kept(self):
+
+        world, counts = run_simulation(300, 5, 8, 20, seed=4, engine="array")
+        self.assertTrue(world.is_end())
+        self.assertEqual((0, 5, 295, 0, 0), counts[0])
+        for row in counts:
+            self.assertEqual(300, sum(row[1:]))
+
+        occupied = numpy.flatnonzero(world.occupants >= 0)
+        self.assertEqual(300, len(occupied))
+        self.assertTrue((world.occupants[world.positions] == numpy.arange(300)).all())
+
+    def test_seeded_runs_repeat(self):
+
+        self.assertEqual(run_simulation(200, 4, 6, 10, seed=5, engine="array")[1],
+                         run_simulation(200, 4, 6, 10, seed=5, engine="array")[1])
+
+    def test_spreader_escapes_neighbour(self):
+
+        from array_world import ArrayWorld
+        world = ArrayWorld(5, 5, seed=1)
+        world.disease_length = 1000
+        world.add_characters([2, 3], [2, 2], [0, 0], [1, 1], [State.INFECTED, State.RECOVERED])
+        world.infection_rates[:] = 0
+        world.move_characters()
+        self.assertEqual((1, 2), tuple(int(value) for value in world.get_coordinates(world.positions[0])))
+        self.assertEqual(3, world.facings[0], "the spreader should move west, away from its neighbour")
+
+
+@unittest.skipIf(numpy is None, "the tiled engine needs NumPy")
+class TestTiledWorld(unittest.TestCase):
+
+    def test_characters_cross_tiles(self):
+
+        from tiled_world import TiledWorld
+        world, size = TiledWorld.from_parameters("Disease", 1000, 20, 8, 10, seed=3, workers=3)
+        with world:
+            self.assertEqual(3, world.get_number_of_workers())
+            start = world.positions.copy()
+            for turn in range(10):  # stepper
+                self.assertTrue(world.next_full_turn())
+                self.assertEqual(1000, world.state_counts[:, 0].sum())
+                self.assertTrue((world.occupants[world.positions] == numpy.arange(1000)).all())
+                self.assertEqual(1000, (world.occupants >= 0).sum())
+
+            first_rows = [first_row for first_row, end_row in world.tiles[1:]]
+            start_tiles = numpy.searchsorted(first_rows, world.get_coordinates(start)[1], side="right")
+            end_tiles = numpy.searchsorted(first_rows, world.get_coordinates(world.positions)[1], side="right")
+            self.assertTrue((start_tiles != end_tiles).any(), "some characters should have changed tiles")
+
+    def test_epidemic_matches_array_engine(self):
+
+        tiled = [run_simulation(300, 5, 8, 20, seed=seed, engine="tiled", workers=2)[1] for seed in range(4)]
+        array = [run_simulation(300, 5, 8, 20, seed=seed, engine="array")[1] for seed in range(4)]
+        self.assertEqual(tiled[0], run_simulation(300, 5, 8, 20, seed=0, engine="tiled", workers=2)[1])
+        for counts in tiled:
+            self.assertEqual((0, 5, 295, 0, 0), counts[0])
+            self.assertEqual(0, counts[-1][1])
+            for row in counts:
+                self.assertEqual(300, sum(row[1:]))
+
+        # the runs are random, but about as many should get infected with both engines
+        tiled_infected = sum(300 - counts[-1][2] for counts in tiled)
+        array_infected = sum(300 - counts[-1][2] for counts in array)
+        self.assertLess(abs(tiled_infected - array_infected), 0.3 * array_infected)
+
+
+class TestEnsemble(unittest.TestCase):
+
+    def test_replicates_use_derived_seeds(self):
+
+        scenario = {"population_size": 80, "number_of_spreaders": 3, "duration": 5, "mortality_rate": 10}
+        results, curves = run_ensemble(scenario, 3, base_seed=9, workers=2)
+        self.assertEqual([0, 1, 2], [replicate for replicate, seed, counts in results])
+        self.assertEqual(3, len({seed for replicate, seed, counts in results}))
+        self.assertEqual(derive_seed(9, 1), results[1][1])
+        self.assertEqual(run_replicate(scenario, results[1][1]), results[1][2])
+        self.assertEqual(max(len(counts) for replicate, seed, counts in results), len(curves["spreaders"]["mean"]))
+
+    def test_aggregate_curves(self):
+
+        results = [(0, 1, [(0, 2, 8, 0, 0), (1, 0, 8, 2, 0)]),
+                   (1, 2, [(0, 2, 8, 0, 0), (1, 2, 6, 2, 0), (2, 0, 6, 3, 1)])]
+        curves = aggregate_curves(results, quantiles=(0.5,))
+        self.assertEqual([2, 1, 0], curves["spreaders"]["mean"])
+        self.assertEqual([8, 7, 7], curves["susceptible"][0.5])
+        self.assertEqual([0, 0, 0.5], curves["deceased"]["mean"])
+        self.assertEqual({"mean": [], 0.5: []}, aggregate_curves([], quantiles=(0.5,))["spreaders"])
+
+    def test_shared_population(self):
+
+        scenario = {"population_size": 80, "number_of_spreaders": 3, "duration": 5, "mortality_rate": 10}
+        results, curves = run_ensemble(scenario, 3, base_seed=9, workers=2, shared_population=True)
+        self.assertEqual([0, 1, 2], [replicate for replicate, seed, counts in results])
+        with PopulationTemplate.generate(80, 3, derive_seed(9, "population")) as population:
+            name = population.publish()
+            self.assertEqual(results[1][2], run_replicate(scenario, results[1][1], population_name=name))
+
+
+class TestPopulation(unittest.TestCase):
+
+    def test_template_matches_created_world(self):
+
+        world, size = create_world("Disease", 200, 4, 6, 10, seed=8)
+        with PopulationTemplate.generate(200, 4, seed=8) as population:
+            self.assertEqual(size, population.size)
+            self.assertEqual([character.get_index() for character in world.get_characters()],
+                             [world.get_index(square % size, square // size) for square in population.squares])
+            self.assertEqual([character.get_age() for character in world.get_characters()], list(population.ages))
+
+    def test_published_template_is_read_only(self):
+
+        with PopulationTemplate.generate(200, 4, seed=8) as population:
+            with PopulationTemplate.attach(population.publish()) as attached:
+                self.assertEqual(list(population.squares), list(attached.squares))
+                self.assertEqual(4, attached.number_of_spreaders)
+                with self.assertRaises(TypeError):
+                    attached.ages[0] = 2
+
+                world, size = create_world_from_population("Disease", attached, 6, 10, seed=1)
+                self.assertEqual((4, 196), (world.get_len_spreaders()[0], world.get_len_susceptible()[0]))
+                if numpy is not None:
+                    from array_world import ArrayWorld
+                    array_world, size = ArrayWorld.from_population("Disease", attached, 6, 10, seed=1)
+                    self.assertEqual(list(population.facings), array_world.facings.tolist())
+                    self.assertEqual(world.get_len_spreaders(), array_world.get_len_spreaders())
+
+                with self.assertRaises(ValueError):
+                    run_simulation(201, 4, 6, 10, seed=1, population=attached)
+
+
+@unittest.skipIf(not HAS_QT, "the GUI needs PyQt6")
+class TestSimulationWorker(unittest.TestCase):
+
+    def test_snapshot_holds_the_changes_of_the_turns(self):
+
+        from simulation_worker import SimulationWorker
+        world, size = create_world("Flu", 100, 3, 6, 10, seed=2)
+        world.track_changes()
+        worker = SimulationWorker(world)
+        self.assertIsNone(worker.take_snapshot())
+
+        for count in range(2):  # stepper
+            world.next_full_turn()
+            worker.publish()
+        snapshot = worker.take_snapshot()
+        self.assertIsNone(worker.take_snapshot())
+        self.assertGreater(len(snapshot.characters), 0)
+        for character, (index, x, y, facing, color) in snapshot.characters.items():
+            self.assertEqual((index, x, y, facing), (character.get_index(), world.get_x(index), world.get_y(index),
+                                                     character.get_facing()))
+        self.assertEqual(world.get_len_spreaders(), snapshot.statistics["spreaders"])
+        self.assertFalse(snapshot.statistics["end"])
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_compare_with_baseline(self):
+
+        result = benchmark("object", 30, turns=2, max_turns=5, repeats=1)
+        self.assertLessEqual(result["end_to_end_turns"], 5)
+        self.assertGreater(result["bytes_per_agent"], 0)
+        baseline = {"results": [result]}
+        self.assertEqual([], compare({"results": [result]}, baseline))
+
+        slower = dict(result, turns_per_second=result["turns_per_second"] / 2, end_to_end_seconds=5.0,
+                      peak_memory_bytes=result["peak_memory_bytes"] * 1.1)
+        regressions = compare({"results": [slower]}, baseline)
+        self.assertEqual(["turns_per_second", "end_to_end_seconds"], [metric for e, p, metric, o, n in regressions])
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_profiling_does_not_change_the_run(self):
+
+        profiler = TurnProfiler()
+        world, counts = run_simulation(300, 5, 8, 10, seed=4)
+        profiled_world, profiled_counts = run_simulation(300, 5, 8, 10, seed=4, profiler=profiler)
+        self.assertEqual(counts, profiled_counts)
+
+        self.assertEqual(len(counts) - 1, len(profiler.turns))
+        # everyone alive at the start of a full turn moves once during it
+        self.assertEqual(sum(300 - row[4] for row in counts[:-1]),
+                         sum(calls for (phase, brain), (seconds, calls) in profiler.totals.items()
+                             if phase == "movement"))
+        self.assertEqual(profiler.totals[("contacts", "Spreader")][1], profiler.totals[("outcome", "Spreader")][1])
+        self.assertNotIn(("infection", "Susceptible"), profiler.totals)
+        self.assertEqual(len(profiler.totals) + 2, len(profiler.get_table()))
+        self.assertEqual(len(profiler.turns), len(profiler.to_dict()["turns"]))
+
+
+class TestRecorder(unittest.TestCase):
+
+    def test_csv_and_npy_files_hold_every_turn(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            csv_file = os.path.join(directory, "curve.csv")
+            npy_file = os.path.join(directory, "curve.npy")
+            with TimeSeriesRecorder(csv_file, chunk_size=4) as recorder:
+                world, counts = run_simulation(300, 5, 8, 10, seed=4, recorder=recorder)
+            with TimeSeriesRecorder(npy_file, chunk_size=4) as recorder:
+                run_simulation(300, 5, 8, 10, seed=4, recorder=recorder)
+
+            with open(csv_file) as file:
+                lines = file.read().splitlines()
+            curve = read_npy(npy_file)
+
+        self.assertEqual(len(counts) + 1, len(lines))
+        self.assertEqual([row[0] for row in counts], curve["turn"])
+        self.assertEqual([row[1] for row in counts], curve["spreaders_total"])
+        self.assertEqual([row[4] for row in counts], curve["deceased_total"])
+        self.assertEqual(",".join(str(curve[column][-1]) for column in curve), lines[-1])
+        self.assertEqual(5, curve["new_infections"][0])
+        self.assertEqual(300 - counts[-1][2], sum(curve["new_infections"]))
+        self.assertEqual(counts[-1][4], sum(curve["new_deaths"]))
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_restored_world_continues_the_same_run(self):
+
+        world, size = create_world("Flu", 400, 6, 9, 20, seed=5)
+        world.set_transmission(TransmissionTable({1: 0.3, 2: 0.5, 3: 0.9}, {2: 0.5}))
+        for x in range(size):  # stepper
+            if world.is_free(world.get_index(x, 0)):
+                world.add_wall(Coordinates(x, 0))
+                break
+        for count in range(15):  # stepper
+            world.next_full_turn()
+        world.set_scheduled_outcomes(True)
+        for count in range(7):  # stepper
+            world.next_character_turn()
+
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "world.checkpoint")
+            save_world(world, file_name)
+            restored = load_world(file_name)
+
+            with open(file_name, "r+b") as file:
+                file.write(b"NOTACKPT")
+            self.assertRaises(ValueError, load_world, file_name)
+
+        self.assertEqual(world.walls, restored.walls)
+        self.assertEqual({2: 0.5}, restored.get_transmission().contact_factors)
+        self.assertEqual(world.get_summary(), restored.get_summary())
+        self.assertEqual(world.get_next_character().get_index(), restored.get_next_character().get_index())
+        self.assertEqual(run_world(world), run_world(restored))
+        self.assertEqual(world.get_summary(), restored.get_summary())
+
+
+class TestEventLog(unittest.TestCase):
+
+    def test_log_holds_every_infection_recovery_and_death(self):
+
+        world, size = create_world("Flu", 300, 4, 8, 20, seed=2)
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "events.log")
+            with EventLog(file_name, chunk_size=16) as event_log:
+                world.set_event_log(event_log)
+                run_world(world)
+
+            with EventReader(file_name) as reader:
+                self.assertEqual(300 - world.get_len_susceptible()[0], reader.count_events(INFECTION))
+                self.assertEqual(world.get_len_recovered()[0], reader.count_events(RECOVERY))
+                self.assertEqual(world.get_len_deceased()[0], reader.count_events(DEATH))
+                self.assertEqual(sorted(reader.get_column("turn")), list(reader.get_column("turn")))
+
+                roots = [event for event in reader.iter_events(INFECTION) if event[1] == -1]
+                self.assertEqual([0, 1, 2, 3], [infectee for turn, infector, infectee, location, kind in roots])
+
+                infection_turns = reader.get_infection_turns()
+                for turn, infector, infectee, location, kind in reader.iter_events(INFECTION, first_turn=1):
+                    self.assertTrue(0 <= infection_turns[infector] <= turn)
+                self.assertTrue(all(interval >= 0 for interval in reader.get_generation_intervals()))
+
+                turn, infector, infectee, location, kind = reader[len(reader) - 1]
+                character = world.get_character(infectee)
+                self.assertEqual(character.get_index(), world.get_index(location % size, location // size))
+                first, end = reader.get_turn_range(turn, turn)
+                self.assertEqual(turn, reader[first][0])
+                self.assertEqual(len(reader), end)
+
+    def test_resumed_run_appends_to_the_same_log(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint_file = os.path.join(directory, "run.checkpoint")
+            file_name = os.path.join(directory, "events.log")
+            arguments = ["batch.py", "--population", "300", "--spreaders", "4", "--duration", "8", "--mortality",
+                         "20", "--seed", "2", "--events", file_name, "--checkpoint", checkpoint_file]
+            with unittest.mock.patch("sys.argv", arguments + ["--max-turns", "6"]), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                batch_main()
+            with unittest.mock.patch("sys.argv", ["batch.py", "--resume", checkpoint_file, "--events", file_name,
+                                                 "--checkpoint", checkpoint_file]), \
+                    contextlib.redirect_stdout(io.StringIO()):
+                batch_main()
+
+            world = load_world(checkpoint_file)
+            with EventReader(file_name) as reader:
+                infectees = [event[2] for event in reader.iter_events(INFECTION)]
+                self.assertEqual(len(set(infectees)), len(infectees))
+                self.assertEqual(300 - world.get_len_susceptible()[0], len(infectees))
+                self.assertTrue(all(interval >= 0 for interval in reader.get_generation_intervals()))
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_only_missing_runs_are_computed(self):
+
+        grid = {"population_size": [60], "number_of_spreaders": [2], "duration": [4, 6], "mortality_rate": [10]}
+        with tempfile.TemporaryDirectory() as directory:
+            store_file = os.path.join(directory, "sweep.sqlite")
+            rows, computed = run_sweep(grid, 2, store_file, base_seed=3, workers=2)
+            self.assertEqual(4, computed)
+            self.assertEqual([(4, 0), (4, 1), (6, 0), (6, 1)], [(row["duration"], row["replicate"]) for row in rows])
+            scenario = {"population_size": 60, "number_of_spreaders": 2, "duration": 6, "mortality_rate": 10}
+            self.assertEqual(run_replicate(scenario, rows[3]["seed"])[-1][1:],
+                             (rows[3]["spreaders"], rows[3]["susceptible"], rows[3]["recovered"], rows[3]["deceased"]))
+
+            self.assertEqual((rows, 0), run_sweep(grid, 2, store_file, base_seed=3, workers=2))
+
+            # a run lost in an interrupted sweep is the only one computed again
+            key = plan_sweep(grid, 2, base_seed=3)[1][0]
+            store = ResultStore(store_file)
+            store.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            store.connection.commit()
+            store.close()
+            self.assertEqual((rows, 1), run_sweep(grid, 2, store_file, base_seed=3, workers=2))
+
+        self.assertNotEqual(plan_sweep(grid, 1, code_version="a")[0][0], plan_sweep(grid, 1, code_version="b")[0][0])
+        self.assertEqual(16, len(get_code_version()))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
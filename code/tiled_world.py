@@ -0,0 +1,350 @@
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from array_world import ArrayWorld, get_rate_array
+from state import State
+
+"""
+    Runs an ArrayWorld on several processes at once, for worlds too large for one core. The grid is split into
+    horizontal tiles of whole rows and each tile is owned by a worker process, which moves, infects and cures
+    the characters standing in its rows. The grid and the characters are kept in shared memory, so a worker can
+    look into the rows next to its tile (its halo) without copying them.
+
+    A full turn has these phases, with every worker waiting for the others between them:
+
+    1. The workers of the even tiles move their characters, then the workers of the odd tiles move theirs. A
+       tile is always taller than the search radius of the spreaders, so two tiles that move at the same time
+       never touch the same rows, and the characters crossing the edge of a tile are handled like any other move.
+    2. The characters that moved out of a tile are handed over to the worker of the tile they moved into
+       through a mailbox. At most one row of characters can cross an edge in a turn.
+    3. Each worker draws the infections of the susceptible characters in its tile, caused by its own spreaders
+       and the spreaders in the rows of the neighbouring tiles next to it.
+    4. Each worker draws the recoveries and deaths of its spreaders and updates the states of its characters.
+
+    Every worker has a random number generator of its own, so the results depend on the number of workers: a
+    run repeats with the same seed and number of workers, and it follows the same rules as ArrayWorld, so it is
+    statistically equivalent to it, but it is not the same run as the ArrayWorld with that seed.
+
+    Usage:
+        world = TiledWorld.from_parameters("Flu", 10000000, 1000, 14, 5, seed=1, workers=8)
+        while world.next_full_turn():
+            ...
+        world.close()
+"""
+
+# the arrays kept in shared memory
+SHARED_ARRAYS = ("occupants", "claims", "positions", "facings", "ages", "states", "durations", "disease_lengths")
+
+
+def share_array(values):
+    """
+    Copies the given array in a new block of shared memory.
+
+    Returns: A tuple containing the shared memory block and the copy of the array in it.
+    """
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    copy = np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)
+    copy[:] = values
+    return block, copy
+
+
+class TileWorker(ArrayWorld):
+
+    """
+        The part of a TiledWorld that runs in a worker process. It is an ArrayWorld whose arrays are views of the
+        shared memory of the whole world, and which only moves, infects and cures the characters of its own tile.
+    """
+
+    def __init__(self, layout, tile, seed_sequence):
+        """
+        Parameter layout describes the shared world, see TiledWorld.get_layout(): dict
+
+        Parameter tile is the number of the worker's tile: int
+
+        Parameter seed_sequence seeds the worker's random number generator: numpy.random.SeedSequence
+        """
+        self.blocks = []    # container of the shared memory blocks, kept open while the worker runs
+        self.array_names = list(layout["arrays"])
+        for name, (block_name, shape, dtype) in layout["arrays"].items():
+            block = shared_memory.SharedMemory(name=block_name)
+            self.blocks.append(block)
+            setattr(self, name, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+
+        self.width = layout["width"]
+        self.height = layout["height"]
+        self.border = layout["border"]
+        self.row_length = layout["row_length"]
+        self.steps = np.array(layout["steps"])
+        self.transmission = layout["transmission"]
+        self.infection_rates = get_rate_array(self.transmission)
+        self.mortality_rate = layout["mortality_rate"]
+        self.disease_length = layout["disease_length"]
+        self.random = np.random.default_rng(seed_sequence)
+        self.set_contact_radius(layout["contact_radius"])
+        self.set_search_radius(layout["search_radius"])
+
+        self.tile = tile
+        self.tiles = len(layout["tiles"])
+        self.first_row, self.end_row = layout["tiles"][tile]
+        self.first_square = self.get_square_number(0, self.first_row)
+        self.end_square = self.get_square_number(0, self.end_row)
+        self.owned = np.flatnonzero((self.positions >= self.first_square) & (self.positions < self.end_square))
+
+    def hand_over(self):
+        """
+        Puts the characters that have moved out of the tile in the mailboxes of the tiles above and below it.
+        Row 2 * tile of the mailbox is read by the tile above, row 2 * tile + 1 by the tile below; the first element
+        of a row is the number of characters in it.
+        """
+        positions = self.positions[self.owned]
+        leaving_up = positions < self.first_square
+        leaving_down = positions >= self.end_square
+        for row, leaving in ((2 * self.tile, leaving_up), (2 * self.tile + 1, leaving_down)):
+            characters = self.owned[leaving]
+            self.mail[row, 0] = len(characters)
+            self.mail[row, 1:len(characters) + 1] = characters
+        self.owned = self.owned[~(leaving_up | leaving_down)]
+
+    def take_over(self):
+        """
+        Adds the characters that have moved in from the tiles above and below to the characters of the tile.
+        """
+        arrivals = [self.owned]
+        if self.tile > 0:
+            row = 2 * (self.tile - 1) + 1
+            arrivals.append(self.mail[row, 1:self.mail[row, 0] + 1])
+        if self.tile < self.tiles - 1:
+            row = 2 * (self.tile + 1)
+            arrivals.append(self.mail[row, 1:self.mail[row, 0] + 1])
+        self.owned = np.concatenate(arrivals)
+
+    def find_halo_spreaders(self):
+        """
+        Returns the spreaders of the other tiles that are close enough to infect characters of this tile: array
+        of int
+        """
+        halo = self.border * self.row_length
+        neighbours = np.concatenate([self.occupants[max(self.first_square - halo, 0):self.first_square],
+                                     self.occupants[self.end_square:self.end_square + halo]])
+        neighbours = neighbours[neighbours >= 0]
+        return neighbours[self.states[neighbours] == State.INFECTED]
+
+    def run_turn(self, barrier):
+        """
+        Runs the worker's part of one full turn.
+
+        Returns the counts of the characters of the tile by state and age group, see ArrayWorld.update_counts():
+        array of int
+        """
+        for parity in (0, 1):
+            if self.tile % 2 == parity:
+                self.move_characters(self.owned)
+                self.hand_over()
+            barrier.wait()
+        self.take_over()
+
+        # from here on a worker only changes the characters it owns
+        infected = self.owned[self.states[self.owned] == State.INFECTED]
+        self.durations[infected] += 1
+        new_infections = self.find_new_infections(np.concatenate([infected, self.find_halo_spreaders()]))
+        positions = self.positions[new_infections]
+        new_infections = new_infections[(positions >= self.first_square) & (positions < self.end_square)]
+        barrier.wait()  # everyone has seen the spreaders of the start of the turn
+
+        self.resolve_outcomes(infected)
+        self.states[new_infections] = State.INFECTED
+        self.durations[new_infections] = 0
+        self.disease_lengths[new_infections] = self.disease_length
+
+        ages = self.ages[self.owned]
+        age_groups = np.where((ages == 1) | (ages == 2), ages, 3)
+        counts = np.bincount(self.states[self.owned].astype(np.int64) * 4 + age_groups, minlength=16).reshape(4, 4)
+        counts[:, 0] = counts[:, 1:].sum(axis=1)
+        return counts
+
+    def close(self):
+        for name in self.array_names:
+            setattr(self, name, None)
+        for block in self.blocks:
+            block.close()
+
+
+def run_tile(layout, tile, seed_sequence, barrier, connection):
+    """
+    The main function of a worker process: runs a full turn of its tile every time it is asked to, and sends
+    back the counts of the tile, until it is told to stop.
+    """
+    worker = TileWorker(layout, tile, seed_sequence)
+    barrier.wait()  # every worker has found its characters before anyone moves them
+    try:
+        while connection.recv() == "turn":
+            connection.send(worker.run_turn(barrier))
+    finally:
+        worker.close()
+        connection.close()
+
+
+class TiledWorld(ArrayWorld):
+
+    def __init__(self, world, workers=None, seed=None):
+        """
+        Creates a world that runs the given world on several processes. The given world should not be used any
+        more after this.
+
+        Parameter world is the world to run: ArrayWorld
+
+        Parameter workers is the number of worker processes, or None for one per processor. There are fewer
+        workers if the world is not tall enough for that many tiles: int
+
+        Parameter seed seeds the random number generators of the workers, or None for a random seed: int
+
+        Raises ValueError if the world has scheduled outcomes.
+        """
+        if world.calendar is not None:
+            raise ValueError("The tiled engine does not support scheduled outcomes.")
+        self.__dict__.update(world.__dict__)
+        if workers is None:
+            workers = multiprocessing.cpu_count()
+        tile_height = self.border + 1   # a tile must be taller than the search radius
+        workers = max(1, min(workers, self.height // tile_height))
+
+        self.tiles = []     # container of the (first row, end row) of each tile
+        for tile in range(workers):  # stepper
+            self.tiles.append((self.height * tile // workers, self.height * (tile + 1) // workers))
+
+        # shared memory: the world's arrays and the mailboxes of the tiles
+        self.blocks = {}
+        for name in SHARED_ARRAYS:
+            self.blocks[name], shared = share_array(getattr(self, name))
+            setattr(self, name, shared)
+        self.blocks["mail"], self.mail = share_array(np.zeros((2 * workers, self.width + 1), dtype=np.int64))
+
+        barrier = multiprocessing.Barrier(workers)
+        seed_sequences = np.random.SeedSequence(seed).spawn(workers)
+        self.connections = []
+        self.processes = []
+        for tile in range(workers):  # stepper
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=run_tile, daemon=True,
+                                              args=(self.get_layout(), tile, seed_sequences[tile], barrier,
+                                                    worker_connection))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    @classmethod
+    def from_parameters(cls, name, population_size, number_of_spreaders, duration, mortality_rate, seed=None,
+                        workers=None):
+        """
+        Creates a world with a randomly placed population in the same way as ArrayWorld.from_parameters and
+        starts its workers.
+
+        Returns: A tuple containing the simulation world object and the size of the world grid.
+        """
+        world, size = ArrayWorld.from_parameters(name, population_size, number_of_spreaders, duration,
+                                                 mortality_rate, seed)
+        return cls(world, workers, seed), size
+
+    def get_layout(self):
+        """
+        Returns what a worker needs to know to attach to the shared memory of the world: dict
+        """
+        arrays = {name: (self.blocks[name].name, getattr(self, name).shape, getattr(self, name).dtype.str)
+                  for name in SHARED_ARRAYS + ("mail",)}
+        return {"arrays": arrays, "width": self.width, "height": self.height, "border": self.border,
+                "row_length": self.row_length, "steps": self.steps.tolist(),
+                "transmission": self.transmission, "mortality_rate": self.mortality_rate,
+                "disease_length": self.disease_length, "contact_radius": self.contact_radius,
+                "search_radius": self.search_radius, "tiles": self.tiles}
+
+    def get_number_of_workers(self):
+        return len(self.tiles)
+
+    def set_transmission(self, transmission):
+        """
+        The infection rates are given to the workers when they start, so they cannot be changed afterwards: set
+        them in the ArrayWorld the tiled world is created from instead.
+
+        Raises ValueError.
+        """
+        raise ValueError("The infection rates of a tiled world cannot be changed after its workers have started.")
+
+    def set_scheduled_outcomes(self, scheduled):
+        """
+        Scheduled outcomes are not supported, since the spreaders move between the workers.
+
+        Raises ValueError if scheduled outcomes are chosen.
+        """
+        if scheduled:
+            raise ValueError("The tiled engine does not support scheduled outcomes.")
+
+    def set_profiler(self, profiler):
+        """
+        Profiling is not supported, since the phases run in the worker processes.
+
+        Raises ValueError if a profiler is given.
+        """
+        if profiler is not None:
+            raise ValueError("The tiled engine cannot be profiled.")
+        self.profiler = None
+
+    def next_full_turn(self):
+        """
+        Lets every character take its next turn, see ArrayWorld.next_full_turn(). The workers are stopped when
+        the simulation ends.
+
+        Returns False if there were no infected characters left (the simulation has ended), True otherwise: boolean
+        """
+        if self.state_counts[State.INFECTED, 0] == 0 or not self.processes:
+            self.end = True
+            self.close()
+            return False
+
+        try:
+            for connection in self.connections:
+                connection.send("turn")
+            self.state_counts = sum(connection.recv() for connection in self.connections)
+        except (EOFError, OSError):
+            self.close()
+            raise RuntimeError("A worker process of the tiled world has stopped.")
+
+        self.full_turn_count += 1
+        if self.recorder is not None:
+            self.recorder.record(self)
+        return True
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory. The statistics of the world can still be read afterwards,
+        and so can its arrays, which are copied out of the shared memory first.
+        """
+        if not self.processes:
+            return
+        for connection in self.connections:
+            try:
+                connection.send("stop")
+            except OSError:
+                pass
+            connection.close()
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        self.connections = []
+
+        for name in SHARED_ARRAYS + ("mail",):
+            setattr(self, name, getattr(self, name).copy())
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        self.close()
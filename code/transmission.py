@@ -0,0 +1,96 @@
+"""
+    The rates at which spreaders infect the susceptible characters around them. A TransmissionTable gives the
+    probability that a spreader infects a susceptible contact during one turn, by the age group of the contact,
+    and optionally scales it by the type of the contact. The type of a contact is its squared distance from the
+    spreader in squares: 1 for characters side by side, 2 for diagonal neighbours, 4 for characters two squares
+    apart and so on (see SimulationWorld.set_contact_radius).
+
+    Any number of age groups from 0 to MAX_AGE_GROUP can be given rates; characters whose age group has no rate
+    are never infected.
+    Both engines take a table with set_transmission, and both use DEFAULT_RATES until then.
+
+    Tables can also be written as text, e.g. "1=0.25,2=0.5,3=0.75" for the rates and "1=1,2=0.5" for the
+    contact factors, see parse_table().
+"""
+
+# the infection rates of young people, adults and elderly people
+DEFAULT_RATES = {1: 0.25, 2: 0.5, 3: 0.75}
+MAX_AGE_GROUP = 127     # the largest age group the ages of the characters (one signed byte) can hold
+
+
+def parse_table(text, key_type=int, value_type=float):
+    """
+    Reads a table written as comma separated key=value pairs, e.g. "1=0.25,2=0.5".
+
+    Raises ValueError if the text is not a table.
+
+    Returns the table: dict
+    """
+    table = {}
+    for item in text.split(","):
+        key, separator, value = item.partition("=")
+        if not separator:
+            raise ValueError(f"Expected key=value instead of {item!r}")
+        table[key_type(key.strip())] = value_type(value.strip())
+    return table
+
+
+class TransmissionTable:
+
+    def __init__(self, rates=None, contact_factors=None):
+        """
+        Creates a table of infection rates.
+
+        Parameter rates maps each age group to the probability of infecting a susceptible contact of that age
+        group during one turn, or None for DEFAULT_RATES: dict
+
+        Parameter contact_factors maps a squared distance to the factor the rates of contacts at that distance
+        are multiplied by, or None. Distances that are not given have the factor 1: dict
+
+        Raises ValueError if an age group is not between 0 and MAX_AGE_GROUP, or if a rate, or a rate multiplied
+        by a contact factor, is not a probability.
+        """
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        for age in self.rates:
+            if age not in range(MAX_AGE_GROUP + 1):
+                raise ValueError(f"The age group {age} must be a whole number from 0 to {MAX_AGE_GROUP}.")
+        self.contact_factors = dict(contact_factors or {})
+        largest_factor = max(list(self.contact_factors.values()) + [1])
+        for age, rate in self.rates.items():
+            if not 0 <= rate <= 1 or rate * largest_factor > 1:
+                raise ValueError(f"The infection rate of age group {age} must be a probability.")
+        if min(list(self.contact_factors.values()) + [1]) < 0:
+            raise ValueError("The contact factors cannot be negative.")
+
+    def has_contact_factors(self):
+        """
+        Returns True if some contact type has a factor other than 1: boolean
+        """
+        return any(factor != 1 for factor in self.contact_factors.values())
+
+    def get_rate(self, age, squared_distance=None):
+        """
+        Returns the probability that a spreader infects a susceptible contact of the given age group during one
+        turn, 0 for age groups without a rate: float
+
+        Parameter squared_distance is the type of the contact, see above, or None to ignore it: int
+        """
+        rate = self.rates.get(age, 0)
+        if squared_distance is not None:
+            rate *= self.contact_factors.get(squared_distance, 1)
+        return rate
+
+    def get_rate_list(self):
+        """
+        Returns the rates indexed by age group, 0 for the age groups without a rate: list of float
+        """
+        rates = [0.0] * (max(list(self.rates) + [0]) + 1)
+        for age, rate in self.rates.items():
+            rates[age] = rate
+        return rates
+
+    def get_factors(self, squared_distances):
+        """
+        Returns the contact factor of each of the given squared distances: list of float
+        """
+        return [self.contact_factors.get(squared_distance, 1) for squared_distance in squared_distances]
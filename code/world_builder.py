@@ -0,0 +1,133 @@
+from simulation_world import SimulationWorld
+from character import Character
+from susceptible import SUSCEPTIBLE
+from spreader import SPREADER
+from direction import Direction
+
+import math
+
+YOUNG = 1    # lower chance of getting infected
+ADULT = 2    # moderate chance of getting infected
+ELDERLY = 3  # high chance of getting infected
+
+
+def get_world_size(population_size):
+    """
+    Returns the width (and height) of a square world that fits the given population. Larger populations get
+    more room per person: int
+    """
+    if population_size >= 100:
+        grid_size = math.sqrt(10 * population_size)
+        size = math.ceil(grid_size)
+    elif population_size >= 50:
+        grid_size = math.sqrt(7.5 * population_size)
+        size = math.ceil(grid_size)
+    elif population_size >= 15:
+        grid_size = math.sqrt(5 * population_size)
+        size = math.ceil(grid_size)
+    else:
+        size = math.ceil(population_size*1.5)
+    return size
+
+
+def check_parameters(population_size, number_of_spreaders, duration, mortality_rate):
+    """
+    Checks that the simulation parameters make sense and raises ValueError with an explanation if they do not.
+    """
+    if population_size < 0 or number_of_spreaders < 0 or mortality_rate < 0:
+        raise ValueError("The simulation parameters must be positive integers.")
+    elif population_size < number_of_spreaders:
+        raise ValueError("The size of the population must be larger than the number of spreaders.")
+    elif mortality_rate > 100:
+        raise ValueError("The mortality rate must be an integer between 0 and 100.")
+    elif duration <= 0:
+        raise ValueError("The duration of the disease must be a positive integer.")
+
+
+def create_world(name, population_size, number_of_spreaders, duration, mortality_rate, seed=None):
+    """
+    Creates a simulation world and fills it with a randomly placed population, without asking the user anything.
+
+    Parameter name is the name of the disease: str
+
+    Parameter population_size is the number of characters in the world: int
+
+    Parameter number_of_spreaders is the number of initially infected characters: int
+
+    Parameter duration is the average duration of the disease in turns: int
+
+    Parameter mortality_rate is the mortality rate of the disease in percents: int
+
+    Parameter seed is the seed of the world's random number generator, or None for a random seed: int
+
+    Returns: A tuple containing the simulation world object and the size of the world grid.
+    """
+    check_parameters(population_size, number_of_spreaders, duration, mortality_rate)
+
+    size = get_world_size(population_size)
+    world = SimulationWorld(size, size)
+    world.name = name
+    world.set_mortality_rate(mortality_rate)
+    world.set_seed(seed)
+    generator = world.random
+
+    # distinct squares for everyone at once (sampling without replacement), and the ages and facings in bulk
+    squares = generator.sample(range(size * size), population_size)
+    ages = generator.choices([YOUNG, ADULT, ELDERLY], k=population_size)
+    facings = generator.choices(range(len(Direction.VALUES)), k=population_size)
+
+    place_population(world, squares, ages, facings, number_of_spreaders, duration)
+    return world, size
+
+
+def place_population(world, squares, ages, facings, number_of_spreaders, duration):
+    """
+    Adds a population in the given empty world. The first number_of_spreaders characters are spreaders.
+
+    Parameter squares are the squares of the characters, numbered row by row (y * size + x): sequence of int
+
+    Parameter ages are the age groups of the characters: sequence of int
+
+    Parameter facings are the indices of the directions the characters are facing in Direction.VALUES:
+    sequence of int
+
+    Parameter duration is the average duration of the disease in turns: int
+    """
+    characters = []
+    for i in range(0, len(squares)):  # stepper
+        body = Character()
+        body.age = ages[i]
+        if i < number_of_spreaders:
+            body.infect()
+            body.set_brain(SPREADER)
+            body.disease_length = duration
+        else:
+            body.set_brain(SUSCEPTIBLE)
+        characters.append(body)
+
+    width = world.get_width()
+    world.add_characters(characters, [world.get_index(square % width, square // width) for square in squares],
+                         [Direction.VALUES[facing] for facing in facings])
+
+
+def create_world_from_population(name, population, duration, mortality_rate, seed=None):
+    """
+    Creates a simulation world with the population of the given template instead of a random one. The data of
+    the template is copied, so the template can be closed afterwards.
+
+    Parameter population is the initial population: population.PopulationTemplate
+
+    Parameter seed is the seed of the world's random number generator, which only decides what happens after
+    the population has been placed: int
+
+    Returns: A tuple containing the simulation world object and the size of the world grid.
+    """
+    check_parameters(population.get_population_size(), population.number_of_spreaders, duration, mortality_rate)
+
+    world = SimulationWorld(population.size, population.size)
+    world.name = name
+    world.set_mortality_rate(mortality_rate)
+    world.set_seed(seed)
+    place_population(world, population.squares, population.ages, population.facings,
+                     population.number_of_spreaders, duration)
+    return world, population.size
@@ -0,0 +1,83 @@
+from PyQt6 import QtWidgets, QtGui, QtCore
+
+from character_graphics_item import get_character_color
+
+
+class WorldRasterItem(QtWidgets.QGraphicsPixmapItem):
+
+    """
+        The class WorldRasterItem draws a whole SimulationWorld as a single image, one pixel per square,
+        scaled up to the size of the squares. It is used instead of one QGraphicsRectItem per square and one
+        CharacterGraphicsItem per character when the population is too large for those, so the scene only has
+        one item however many characters there are. Characters are drawn in the same colours as by
+        CharacterGraphicsItem, but their facing is not shown.
+    """
+
+    BACKGROUND = QtGui.QColor(211, 211, 211)   # the colour of an empty square
+    WALL = QtGui.QColor(105, 105, 105)         # the colour of a wall square
+
+    def __init__(self, world, square_size):
+        # Call init of the parent object
+        super(WorldRasterItem, self).__init__()
+
+        self.world = world
+        self.drawn_squares = {}     # the square index each character was last drawn in
+        self.image = QtGui.QImage(world.get_width(), world.get_height(), QtGui.QImage.Format.Format_RGB32)
+        self.setScale(square_size)
+        self.setTransformationMode(QtCore.Qt.TransformationMode.FastTransformation)   # sharp square edges
+        self.redraw()
+
+    def redraw(self):
+        """
+        Draws the whole world again: the empty squares, the walls and every character.
+        """
+        self.image.fill(WorldRasterItem.BACKGROUND)
+        wall = WorldRasterItem.WALL.rgb()
+        for y in range(self.world.get_height()):  # stepper
+            for x in range(self.world.get_width()):  # stepper
+                if self.world.is_wall_at(self.world.get_index(x, y)):
+                    self.image.setPixel(x, y, wall)
+
+        self.drawn_squares = {}
+        for character in self.world.get_characters():
+            self.draw_character(character)
+        self.setPixmap(QtGui.QPixmap.fromImage(self.image))
+
+    def draw_character(self, character):
+        """
+        Draws the given character in its current square and clears the square it was drawn in before, if it has
+        moved since then.
+        """
+        index = character.get_index()
+        previous_index = self.drawn_squares.get(character)
+        if previous_index is not None and previous_index != index \
+                and self.world.get_character_at(previous_index) is None:
+            self.image.setPixel(self.world.get_x(previous_index), self.world.get_y(previous_index),
+                                WorldRasterItem.BACKGROUND.rgb())
+
+        color = get_character_color(character)
+        if color is not None:
+            self.image.setPixel(self.world.get_x(index), self.world.get_y(index), color.rgb())
+        self.drawn_squares[character] = index
+
+    def update_characters(self, characters):
+        """
+        Draws the given characters (usually the ones that have changed since the last frame) and shows the
+        updated image. If there are no characters, the image is left as it is. The squares the characters have
+        left are cleared first, so a character that has moved into one of them is drawn over it.
+
+        Parameter characters maps each character to its values, see simulation_worker.Snapshot: dict
+        """
+        if not characters:
+            return
+        background = WorldRasterItem.BACKGROUND.rgb()
+        for character, (index, x, y, facing, color) in characters.items():
+            previous_index = self.drawn_squares.get(character)
+            if previous_index is not None and previous_index != index:
+                self.image.setPixel(self.world.get_x(previous_index), self.world.get_y(previous_index), background)
+
+        for character, (index, x, y, facing, color) in characters.items():
+            if color is not None:
+                self.image.setPixel(x, y, color.rgb())
+            self.drawn_squares[character] = index
+        self.setPixmap(QtGui.QPixmap.fromImage(self.image))